@@ -0,0 +1,123 @@
+"""Prompt-size / latency benchmark for host history compaction.
+
+Simulates a long Routing_agent session (user message -> send_message call ->
+large aggregated tool response -> model answer per turn) and reports, per
+turn, the estimated prompt tokens with and without compaction, the time spent
+compacting, and a modelled model latency (``base_ms + tokens / prefill_tps``).
+
+Usage (from the repository root):
+
+    python benchmarks/compaction_bench.py [--turns 50] [--keep-turns 3] [--budget 6000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'host_agent'))
+
+from google.genai import types  # noqa: E402
+from history_compaction import (  # noqa: E402
+    CompactionConfig,
+    CompactionStats,
+    compact_contents,
+    estimate_tokens,
+)
+
+
+KEYWORDS = ['Weather', 'Accommodations', 'TripAdvisor']
+LISTING = (
+    '* **Cozy loft near downtown** - $142/night, 4.87 (213 reviews) '
+    '[View listing](https://www.airbnb.com/rooms/{i}{j})\n'
+)
+
+
+def simulated_turn(i: int) -> list[types.Content]:
+    keyword = KEYWORDS[i % len(KEYWORDS)]
+    task = f'{keyword} request #{i} for Austin, TX next week, 2 adults'
+    tool_output = ''.join(LISTING.format(i=i, j=j) for j in range(30)) * 3
+    answer = f'Here is what I found for request #{i}:\n' + tool_output[:1500]
+    return [
+        types.Content(role='user', parts=[types.Part(text=task)]),
+        types.Content(
+            role='model',
+            parts=[
+                types.Part(
+                    function_call=types.FunctionCall(
+                        id=f'call-{i}',
+                        name='send_message',
+                        args={'keyword': keyword, 'task': task},
+                    )
+                )
+            ],
+        ),
+        types.Content(
+            role='user',
+            parts=[
+                types.Part(
+                    function_response=types.FunctionResponse(
+                        id=f'call-{i}', name='send_message', response={'result': tool_output}
+                    )
+                )
+            ],
+        ),
+        types.Content(role='model', parts=[types.Part(text=answer)]),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--turns', type=int, default=50)
+    parser.add_argument('--keep-turns', type=int, default=3)
+    parser.add_argument('--budget', type=int, default=6000)
+    parser.add_argument('--prefill-tps', type=float, default=5000.0)
+    parser.add_argument('--base-ms', type=float, default=400.0)
+    args = parser.parse_args()
+
+    config = CompactionConfig(keep_turns=args.keep_turns, token_budget=args.budget)
+    stats = CompactionStats()
+    history: list[types.Content] = []
+    rows = []
+    for i in range(1, args.turns + 1):
+        history.extend(simulated_turn(i))
+        # 模型在第 i 轮看到的请求：历史 + 本轮工具结果
+        start = time.perf_counter()
+        compacted = compact_contents(history, config, stats)
+        compaction_ms = (time.perf_counter() - start) * 1000
+        raw_tokens, tokens = estimate_tokens(history), estimate_tokens(compacted)
+        rows.append(
+            (
+                i,
+                raw_tokens,
+                tokens,
+                compaction_ms,
+                args.base_ms + raw_tokens / args.prefill_tps * 1000,
+                args.base_ms + tokens / args.prefill_tps * 1000,
+            )
+        )
+
+    print(
+        f"{'turn':>5} {'raw_tok':>9} {'compact_tok':>12} {'compact_ms':>11} "
+        f"{'raw_lat_ms':>11} {'lat_ms':>8}"
+    )
+    for row in rows:
+        if row[0] == 1 or row[0] % 5 == 0:
+            print(
+                f'{row[0]:>5} {row[1]:>9} {row[2]:>12} {row[3]:>11.2f} '
+                f'{row[4]:>11.0f} {row[5]:>8.0f}'
+            )
+    tail = rows[args.keep_turns :]
+    if tail:
+        sizes = [r[2] for r in tail]
+        print(
+            f'\ncompacted prompt after warm-up: min={min(sizes)} max={max(sizes)} tokens '
+            f'(raw grows to {rows[-1][1]}); '
+            f'max compaction time {max(r[3] for r in rows):.2f} ms'
+        )
+    print(f'stats: {stats.as_dict()}')
+
+
+if __name__ == '__main__':
+    main()
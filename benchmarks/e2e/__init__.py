@@ -0,0 +1,17 @@
+"""Offline end-to-end load benchmark: host -> registry -> A2A agents -> MCP.
+
+Starts the host API and the weather, airbnb and tripadvisor agent servers as
+subprocesses. Every LLM is replaced by a deterministic scripted model
+(:mod:`scripted_models`) and every MCP server by a local stub
+(:mod:`stub_mcp`), so no API key or network access is needed and latencies
+only move when the code does. The registry is a fixed keyword -> agent map.
+
+Usage (from the repository root):
+
+    python -m benchmarks.e2e --conversations 40 --concurrency 8 \\
+        [--json out.json] [--baseline previous.json --max-regression 0.2]
+
+The report gives p50/p95/p99 latency per stage, throughput and the host's
+own routing counters. With ``--baseline``, the exit status is 1 when p95
+latency or throughput regressed by more than ``--max-regression``.
+"""
@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+import httpx
+
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+
+from load import build_conversations, run_load  # noqa: E402
+from report import compare, format_report, summarize  # noqa: E402
+from servers import registry_seed  # noqa: E402
+
+
+AGENTS = ('weather', 'airbnb', 'tripadvisor')
+BIND = '127.0.0.1'
+AGENT_CARD_PATH = '/.well-known/agent-card.json'
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.e2e',
+        description='End-to-end latency benchmark with scripted LLMs and stub MCP servers.',
+    )
+    parser.add_argument('--conversations', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--base-port', type=int, default=18100)
+    parser.add_argument('--llm-latency-ms', type=float, default=50)
+    parser.add_argument('--mcp-latency-ms', type=float, default=30)
+    parser.add_argument('--response-cache', action='store_true', help='keep the host response cache on')
+    parser.add_argument('--startup-timeout', type=float, default=90)
+    parser.add_argument('--turn-timeout', type=float, default=120)
+    parser.add_argument('--json', type=Path, help='write the summary here')
+    parser.add_argument('--baseline', type=Path, help='summary JSON of a previous run')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    return parser.parse_args()
+
+
+def _spawn(role: str, port: int, env: dict, log_dir: Path) -> subprocess.Popen:
+    log = open(log_dir / f'{role}.log', 'w', encoding='utf-8')
+    return subprocess.Popen(
+        [sys.executable, str(HERE / 'servers.py'), role, '--port', str(port)],
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def _check_alive(processes: dict) -> None:
+    for role, process in processes.items():
+        if process.poll() is not None:
+            raise RuntimeError(f'{role} exited with status {process.returncode}')
+
+
+async def _wait_for(processes: dict, url: str, timeout: float, ready) -> dict:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=5, trust_env=False) as client:
+        while time.monotonic() < deadline:
+            _check_alive(processes)
+            try:
+                response = await client.get(url)
+                body = response.json()
+                if ready(response, body):
+                    return body
+            except (httpx.HTTPError, ValueError):
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f'{url} not ready after {timeout:.0f}s')
+
+
+async def start_stack(args: argparse.Namespace, log_dir: Path, processes: dict) -> str:
+    """Start the agents, then the host once every agent serves its card.
+
+    The host warm-up probes the agents, so ``/api/ready`` turning ready
+    means the whole path is up.
+    """
+    ports = {name: args.base_port + 1 + i for i, name in enumerate(AGENTS)}
+    agent_urls = {name: f'http://{BIND}:{port}' for name, port in ports.items()}
+    env = {
+        **os.environ,
+        'BENCH_LLM_LATENCY_MS': str(args.llm_latency_ms),
+        'BENCH_MCP_LATENCY_MS': str(args.mcp_latency_ms),
+        'PYTHONUNBUFFERED': '1',
+    }
+    for name in AGENTS:
+        processes[name] = _spawn(name, ports[name], env, log_dir)
+    await asyncio.gather(*(
+        _wait_for(
+            processes,
+            f'{url}{AGENT_CARD_PATH}',
+            args.startup_timeout,
+            lambda response, body: response.status_code == 200,
+        )
+        for url in agent_urls.values()
+    ))
+
+    # host 经由真实的 routing 层与进程内向量 Registry 解析 agent
+    registry_file = log_dir / 'registry.json'
+    registry_file.write_text(json.dumps(registry_seed(agent_urls), indent=2))
+    host_env = {
+        **env,
+        'REGISTRY_LOCAL': 'true',
+        'REGISTRY_LOCAL_FILE': str(registry_file),
+        'HOST_GRADIO_ENABLED': 'false',
+        'HOST_WARMUP': 'true',
+        'HOST_WARMUP_BLOCKING': 'false',
+        'HOST_LOG_PATH': str(log_dir / 'host_events.jsonl'),
+        'RESPONSE_CACHE_ENABLED': 'true' if args.response_cache else 'false',
+        'PREFETCH_ENABLED': 'false',
+    }
+    # 会话与响应缓存只放内存，避免复用上一次运行的数据
+    host_env.pop('HOST_SESSION_DB', None)
+    host_env.pop('RESPONSE_CACHE_DB', None)
+    processes['host'] = _spawn('host', args.base_port, host_env, log_dir)
+    api_url = f'http://{BIND}:{args.base_port}'
+    state = await _wait_for(
+        processes,
+        f'{api_url}/api/ready',
+        args.startup_timeout,
+        lambda response, body: body.get('status') in ('ready', 'degraded'),
+    )
+    if state['status'] != 'ready':
+        raise RuntimeError(f'host warm-up degraded: {state}')
+    return api_url
+
+
+def stop_processes(processes: dict) -> None:
+    for process in processes.values():
+        if process.poll() is None:
+            process.terminate()
+    for process in processes.values():
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def fetch_debug(api_url: str) -> dict:
+    async with httpx.AsyncClient(timeout=10, trust_env=False) as client:
+        response = await client.get(f'{api_url}/api/debug')
+        response.raise_for_status()
+        return response.json()
+
+
+async def bench(args: argparse.Namespace, log_dir: Path, processes: dict) -> dict:
+    api_url = await start_stack(args, log_dir, processes)
+    conversations = build_conversations(args.conversations, args.seed)
+    samples, wall = await run_load(api_url, conversations, args.concurrency, args.turn_timeout)
+    config = {
+        k: getattr(args, k)
+        for k in (
+            'conversations', 'concurrency', 'seed', 'llm_latency_ms',
+            'mcp_latency_ms', 'response_cache',
+        )
+    }
+    config['registry'] = 'local (in-process vector registry)'
+    return summarize(samples, wall, config, await fetch_debug(api_url))
+
+
+def main() -> int:
+    args = parse_args()
+    log_dir = Path(tempfile.mkdtemp(prefix='e2e-bench-'))
+    processes: dict[str, subprocess.Popen] = {}
+    try:
+        summary = asyncio.run(bench(args, log_dir, processes))
+    finally:
+        stop_processes(processes)
+        print(f'server logs: {log_dir}')
+
+    print(format_report(summary))
+    if args.json:
+        args.json.write_text(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.baseline:
+        regressions = compare(
+            summary, json.loads(args.baseline.read_text()), args.max_regression
+        )
+        for line in regressions:
+            print(f'REGRESSION: {line}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Concurrent scripted conversations against the host SSE API.
+
+Each conversation is a short sequence of turns on its own session; up to
+``concurrency`` conversations run at once. Every turn records when its
+events arrived, which :mod:`report` turns into per-stage latencies.
+"""
+
+import asyncio
+import random
+import sys
+import time
+import uuid
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'host_agent'))
+
+from api import stream_remote_turn  # noqa: E402
+
+
+CITIES = [
+    ('Los Angeles', 'CA'), ('Austin', 'TX'), ('Seattle', 'WA'), ('Boston', 'MA'),
+    ('Denver', 'CO'), ('Chicago', 'IL'), ('Miami', 'FL'), ('Portland', 'OR'),
+]
+DATES = ['April 15, 2026', 'May 2, 2026', 'June 10, 2026', 'July 4, 2026']
+
+# 每个会话的轮次模板：单领域、多领域与追问
+CONVERSATIONS: list[list[str]] = [
+    ['What is the weather in {city}, {state}?'],
+    ['Please find a room in {city}, {state}, {date}, checkout 3 days later, 2 adults'],
+    ['Show me attractions in {city}, {state}'],
+    [
+        'Please find a room in {city}, {state}, {date}, checkout 3 days later, 2 adults',
+        'What is the weather forecast in {city}, {state} for those days?',
+    ],
+    ['I need a room in {city}, {state} and the weather forecast there for {date}'],
+]
+
+
+def build_conversations(count: int, seed: int = 0) -> list[list[str]]:
+    rng = random.Random(seed)
+    conversations = []
+    for _ in range(count):
+        city, state = rng.choice(CITIES)
+        values = {'city': city, 'state': state, 'date': rng.choice(DATES)}
+        conversations.append([turn.format(**values) for turn in rng.choice(CONVERSATIONS)])
+    return conversations
+
+
+@dataclass
+class TurnSample:
+    conversation: int
+    turn: int
+    message: str
+    started: float
+    # 事件类型 -> 到达时刻（first_* 取首次、last_* 取最后一次）
+    marks: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 'final' in self.marks
+
+
+async def run_turn(
+    client: httpx.AsyncClient, api_url: str, sample: TurnSample, session_id: str
+) -> None:
+    marks = sample.marks
+    try:
+        async for event in stream_remote_turn(client, api_url, sample.message, session_id):
+            now = time.perf_counter()
+            kind = event.get('type')
+            if kind in ('tool_call', 'tool_response', 'progress'):
+                marks.setdefault(f'first_{kind}', now)
+                marks[f'last_{kind}'] = now
+            elif kind == 'final':
+                marks['final'] = now
+            elif kind == 'error':
+                sample.error = event.get('message', 'error')
+    except Exception as e:
+        sample.error = f'{type(e).__name__}: {e}'
+    sample.marks['end'] = time.perf_counter()
+
+
+async def run_load(
+    api_url: str, conversations: list[list[str]], concurrency: int, timeout: float
+) -> tuple[list[TurnSample], float]:
+    """Run all conversations; returns the turn samples and the wall time."""
+    samples: list[TurnSample] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def conversation(index: int, turns: list[str]) -> None:
+        async with semaphore:
+            session_id = f'bench-{index}-{uuid.uuid4().hex[:8]}'
+            for turn, message in enumerate(turns):
+                sample = TurnSample(index, turn, message, time.perf_counter())
+                samples.append(sample)
+                await run_turn(client, api_url, sample, session_id)
+
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits, trust_env=False) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(conversation(i, turns) for i, turns in enumerate(conversations)))
+        wall = time.perf_counter() - started
+    return samples, wall
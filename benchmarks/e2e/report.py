@@ -0,0 +1,146 @@
+"""Latency percentiles, per-stage breakdown and baseline comparison.
+
+Stages are derived from event arrival times seen by the client:
+
+* ``routing``: request sent -> first ``tool_call`` (host model picks agents)
+* ``first_chunk``: request sent -> first streamed sub-agent ``progress``
+* ``agents``: first ``tool_call`` -> last ``tool_response`` (registry, A2A
+  call, agent model and MCP); the registry is the in-process vector registry,
+  so this stage includes no registry network round trip
+* ``compose``: last ``tool_response`` -> ``final`` (host answer)
+* ``total``: request sent -> ``final``
+
+Turns answered without a tool call (e.g. by the pre-router) only report
+``total`` and ``first_chunk``.
+"""
+
+import math
+
+from typing import Any
+
+from load import TurnSample
+
+
+STAGES = ('total', 'routing', 'first_chunk', 'agents', 'compose')
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted ``values``."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+def stage_durations(sample: TurnSample) -> dict[str, float]:
+    marks, start = sample.marks, sample.started
+    stages = {'total': marks['final'] - start}
+    if 'first_progress' in marks:
+        stages['first_chunk'] = marks['first_progress'] - start
+    if 'first_tool_call' in marks:
+        stages['routing'] = marks['first_tool_call'] - start
+        if 'last_tool_response' in marks:
+            stages['agents'] = marks['last_tool_response'] - marks['first_tool_call']
+            stages['compose'] = marks['final'] - marks['last_tool_response']
+    return stages
+
+
+def _distribution(values: list[float]) -> dict[str, float]:
+    values = sorted(values)
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values) * 1000, 1) if values else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 1),
+        'p95_ms': round(percentile(values, 95) * 1000, 1),
+        'p99_ms': round(percentile(values, 99) * 1000, 1),
+        'max_ms': round(values[-1] * 1000, 1) if values else 0.0,
+    }
+
+
+def _server_summary(debug: dict[str, Any]) -> dict[str, Any]:
+    """The parts of the host's /api/debug snapshot worth keeping in a report."""
+    return {
+        'agent_latency_s': {
+            row.get('name') or row.get('url'): row.get('ewma_latency')
+            for row in debug.get('agent_health', [])
+        },
+        'admission': {
+            k: debug.get('admission', {}).get(k)
+            for k in ('wait_avg_ms', 'wait_p95_ms', 'max_queue_depth', 'rejected')
+        },
+        'registry': debug.get('registry_client'),
+        'registry_cache': {
+            k: debug.get('registry_cache', {}).get(k) for k in ('hits', 'misses', 'hit_rate')
+        },
+        'adaptive_topk': {
+            k: debug.get('adaptive_topk', {}).get(k) for k in ('avg_k', 'agent_calls_saved')
+        },
+        'pre_router': debug.get('pre_router'),
+    }
+
+
+def summarize(
+    samples: list[TurnSample], wall: float, config: dict[str, Any], debug: dict[str, Any]
+) -> dict[str, Any]:
+    ok = [s for s in samples if s.ok]
+    per_stage: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    for sample in ok:
+        for stage, value in stage_durations(sample).items():
+            per_stage[stage].append(value)
+    errors: dict[str, int] = {}
+    for sample in samples:
+        if not sample.ok:
+            key = (sample.error or 'no final response')[:120]
+            errors[key] = errors.get(key, 0) + 1
+    return {
+        'config': config,
+        'turns': len(samples),
+        'succeeded': len(ok),
+        'error_rate': round(1 - len(ok) / len(samples), 4) if samples else 0.0,
+        'errors': errors,
+        'wall_s': round(wall, 3),
+        'throughput_turns_per_s': round(len(ok) / wall, 3) if wall else 0.0,
+        'stages': {stage: _distribution(values) for stage, values in per_stage.items()},
+        'server': _server_summary(debug),
+    }
+
+
+def format_report(summary: dict[str, Any]) -> str:
+    lines = [
+        f"turns={summary['turns']} ok={summary['succeeded']} "
+        f"error_rate={summary['error_rate']:.2%} wall={summary['wall_s']:.1f}s "
+        f"throughput={summary['throughput_turns_per_s']:.2f} turns/s",
+        '',
+        f"{'stage':<12}{'n':>6}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)",
+    ]
+    for stage, dist in summary['stages'].items():
+        lines.append(
+            f"{stage:<12}{dist['count']:>6}{dist['mean_ms']:>10.1f}{dist['p50_ms']:>10.1f}"
+            f"{dist['p95_ms']:>10.1f}{dist['p99_ms']:>10.1f}{dist['max_ms']:>10.1f}"
+        )
+    for error, count in summary['errors'].items():
+        lines.append(f'  error x{count}: {error}')
+    lines.append('')
+    for key, value in summary['server'].items():
+        lines.append(f'{key}: {value}')
+    return '\n'.join(lines)
+
+
+def compare(
+    summary: dict[str, Any], baseline: dict[str, Any], max_regression: float
+) -> list[str]:
+    """Describe every metric that is worse than ``baseline`` by more than the ratio."""
+    regressions = []
+    for stage, dist in summary['stages'].items():
+        before = baseline.get('stages', {}).get(stage, {}).get('p95_ms')
+        after = dist['p95_ms']
+        if before and dist['count'] and after > before * (1 + max_regression):
+            regressions.append(f'{stage} p95 {before:.1f}ms -> {after:.1f}ms')
+    before = baseline.get('throughput_turns_per_s')
+    after = summary['throughput_turns_per_s']
+    if before and after < before * (1 - max_regression):
+        regressions.append(f'throughput {before:.2f} -> {after:.2f} turns/s')
+    before = baseline.get('error_rate', 0.0)
+    if summary['error_rate'] > before + max_regression / 10:
+        regressions.append(f"error rate {before:.2%} -> {summary['error_rate']:.2%}")
+    return regressions
@@ -0,0 +1,196 @@
+"""Deterministic stand-ins for the LLMs of the host and the three agents.
+
+:class:`ScriptedLlm` is an ADK model (host, weather, tripadvisor): on a new
+user message it calls a tool chosen from the message text, and once the tool
+results are in it answers with them. :class:`ScriptedChatModel` does the same
+for the LangGraph airbnb agent, including the final structured response.
+Both sleep ``BENCH_LLM_LATENCY_MS`` per call to model inference time.
+"""
+
+import asyncio
+import os
+import re
+import time
+import uuid
+
+from collections.abc import AsyncGenerator, Callable
+from typing import Any
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+def llm_latency() -> float:
+    return float(os.getenv('BENCH_LLM_LATENCY_MS', 50)) / 1000
+
+
+# 关键词 -> 触发词；与 host 的五个路由关键词一致
+HOST_KEYWORDS: list[tuple[str, tuple[str, ...]]] = [
+    ('Accommodations', ('room', 'stay', 'airbnb', 'hotel', 'accommodation', 'apartment')),
+    ('Weather', ('weather', 'forecast', 'rain', 'temperature')),
+    ('TripAdvisor', ('attraction', 'restaurant', 'things to do', 'museum')),
+    ('Location', ('where is', 'address', 'coordinates')),
+    ('Transport', ('train', 'bus', 'flight', 'subway')),
+]
+
+_PLACE_RE = re.compile(
+    r'\bin ([A-Z][A-Za-z .]*?[A-Za-z])(?:,\s*([A-Z]{2})\b)?(?=[,.?!]|\s+(?:on|for|from|and)\b|$)'
+)
+
+
+def extract_place(text: str) -> tuple[str, str]:
+    """``(city, state)`` from "... in Austin, TX ..."; defaults to Los Angeles."""
+    match = _PLACE_RE.search(text)
+    if not match:
+        return 'Los Angeles', 'CA'
+    return match.group(1).strip(), match.group(2) or 'CA'
+
+
+def _user_text(contents: list[types.Content]) -> str:
+    for content in reversed(contents):
+        if content.role == 'user' and content.parts:
+            text = ''.join(p.text for p in content.parts if p.text)
+            if text:
+                return text
+    return ''
+
+
+def _function_responses(contents: list[types.Content]) -> list[types.FunctionResponse]:
+    if not contents or not contents[-1].parts:
+        return []
+    return [p.function_response for p in contents[-1].parts if p.function_response]
+
+
+def _call(name: str, args: dict[str, Any]) -> types.Part:
+    return types.Part(
+        function_call=types.FunctionCall(id=f'bench-{uuid.uuid4().hex[:8]}', name=name, args=args)
+    )
+
+
+def _host_calls(text: str, tools: dict[str, Any]) -> list[types.Part]:
+    if 'send_message' not in tools:
+        return []
+    lowered = text.lower()
+    return [
+        _call('send_message', {'keyword': keyword, 'task': text})
+        for keyword, triggers in HOST_KEYWORDS
+        if any(t in lowered for t in triggers)
+    ]
+
+
+def _weather_calls(text: str, tools: dict[str, Any]) -> list[types.Part]:
+    city, state = extract_place(text)
+    if 'get_forecast_by_city' in tools:
+        return [_call('get_forecast_by_city', {'city': city, 'state': state})]
+    return []
+
+
+def _tripadvisor_calls(text: str, tools: dict[str, Any]) -> list[types.Part]:
+    if 'search_locations' in tools:
+        return [_call('search_locations', {'query': text, 'category': 'attractions'})]
+    return []
+
+
+SCRIPTS: dict[str, Callable[[str, dict[str, Any]], list[types.Part]]] = {
+    'host': _host_calls,
+    'weather': _weather_calls,
+    'tripadvisor': _tripadvisor_calls,
+}
+
+
+def _response_text(response: Any) -> str:
+    if isinstance(response, dict):
+        response = response.get('result', response.get('response', response))
+    if isinstance(response, dict) and 'content' in response:
+        content = response['content']
+        if isinstance(content, list):
+            return '\n'.join(str(c.get('text', c)) if isinstance(c, dict) else str(c) for c in content)
+    return str(response)
+
+
+class ScriptedLlm(BaseLlm):
+    """ADK model that calls the scripted tools once, then echoes their output."""
+
+    model: str = 'scripted'
+    script: str = 'host'
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r'scripted']
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(llm_latency())
+        responses = _function_responses(llm_request.contents)
+        if responses:
+            text = '\n\n'.join(_response_text(r.response) for r in responses)
+            parts = [types.Part(text=f'Here is what I found:\n\n{text}')]
+        else:
+            text = _user_text(llm_request.contents)
+            parts = SCRIPTS[self.script](text, llm_request.tools_dict) or [
+                types.Part(text=f'I can only help with travel questions. You asked: {text}')
+            ]
+        yield LlmResponse(content=types.Content(role='model', parts=parts))
+
+
+class ScriptedChatModel(BaseChatModel):
+    """LangChain chat model for the LangGraph airbnb agent.
+
+    Calls ``tool_name`` for a new request, summarizes the tool output after
+    it, and fills the ``ResponseFormat`` tool when asked for structured
+    output.
+    """
+
+    tool_name: str = 'airbnb_search'
+    bound_tools: list[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return 'scripted'
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> 'ScriptedChatModel':
+        names = [convert_to_openai_tool(t)['function']['name'] for t in tools]
+        return self.model_copy(update={'bound_tools': names})
+
+    def _reply(self, messages: list[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        if 'ResponseFormat' in self.bound_tools:
+            # create_react_agent 的结构化输出：把上一轮回答原样放进 ResponseFormat
+            answer = next(
+                (m.content for m in reversed(messages) if isinstance(m, AIMessage) and m.content),
+                str(last.content),
+            )
+            args = {'status': 'completed', 'message': answer}
+            return AIMessage(
+                content='', tool_calls=[{'name': 'ResponseFormat', 'args': args, 'id': 'bench-format'}]
+            )
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=f'Here are the listings I found:\n\n{last.content}')
+        if self.tool_name in self.bound_tools:
+            text = next(
+                (str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), ''
+            )
+            city, state = extract_place(text)
+            args = {'location': f'{city}, {state}', 'adults': 2}
+            return AIMessage(
+                content='',
+                tool_calls=[{'name': self.tool_name, 'args': args, 'id': f'bench-{uuid.uuid4().hex[:8]}'}],
+            )
+        return AIMessage(content='No search tool is available.')
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(llm_latency())
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(
+        self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        await asyncio.sleep(llm_latency())
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
@@ -0,0 +1,149 @@
+"""Run one component of the benchmark with scripted models and stub MCP.
+
+    python servers.py {host,weather,airbnb,tripadvisor} --port PORT
+
+Each agent is started through its own ``__main__.main`` so the real A2A
+server, executor and agent wiring are measured; only the model factory and
+the MCP server command are swapped. The host resolves agents through the
+real routing layer backed by the in-process vector registry
+(``REGISTRY_LOCAL``), seeded by :func:`registry_seed` with the benchmark
+agents' URLs.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import sys
+
+from pathlib import Path
+from types import ModuleType
+
+
+HERE = Path(__file__).resolve().parent
+REPO = HERE.parents[1]
+STUB_MCP = str(HERE / 'stub_mcp.py')
+BIND = '127.0.0.1'
+
+# registry 关键词 -> benchmark agent
+KEYWORD_AGENTS = {
+    'Weather': 'weather',
+    'Accommodations': 'airbnb',
+    'TripAdvisor': 'tripadvisor',
+    'Location': 'tripadvisor',
+    'Transport': 'tripadvisor',
+}
+AGENT_NAMES = {
+    'weather': 'Weather Agent',
+    'airbnb': 'Airbnb Agent',
+    'tripadvisor': 'TripAdvisor Agent',
+}
+AGENT_DESCRIPTIONS = {
+    'weather': 'Handles weather queries and forecasts for cities and states',
+    'airbnb': 'Handles accommodation search and booking queries on airbnb',
+    'tripadvisor': 'Searches attractions, restaurants, locations and transport on TripAdvisor',
+}
+
+
+def registry_seed(agent_urls: dict[str, str]) -> dict[str, list[dict]]:
+    """``REGISTRY_LOCAL_FILE`` contents pointing every keyword at its benchmark agent."""
+    return {
+        keyword: [
+            {
+                'agent_id': f'bench-{kind}',
+                'name': AGENT_NAMES[kind],
+                'description': AGENT_DESCRIPTIONS[kind],
+                'url': agent_urls[kind],
+            }
+        ]
+        for keyword, kind in KEYWORD_AGENTS.items()
+        if kind in agent_urls
+    }
+
+
+def _load_main(agent_dir: Path, name: str) -> ModuleType:
+    """Import ``agent_dir/__main__.py`` as ``name`` without running it."""
+    sys.path.insert(0, str(agent_dir))
+    spec = importlib.util.spec_from_file_location(name, agent_dir / '__main__.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _stub_stdio(kind: str):
+    from google.adk.tools.mcp_tool.mcp_toolset import StdioServerParameters
+
+    def factory(command: str, args: list[str], **kwargs) -> StdioServerParameters:
+        return StdioServerParameters(command=sys.executable, args=[STUB_MCP, kind])
+
+    return factory
+
+
+def _prepare_env() -> None:
+    os.environ.setdefault('GOOGLE_API_KEY', 'benchmark')
+    os.environ.pop('GOOGLE_GENAI_USE_VERTEXAI', None)
+
+
+def serve_adk_agent(kind: str, module_name: str, port: int) -> None:
+    agent_dir = REPO / f'{kind}_agent'
+    sys.path.insert(0, str(agent_dir))
+    from scripted_models import ScriptedLlm
+
+    agent_module = importlib.import_module(module_name)
+    agent_module.LiteLlm = lambda model: ScriptedLlm(script=kind)
+    agent_module.StdioServerParameters = _stub_stdio(kind)
+    main = _load_main(agent_dir, f'{kind}_main')
+    _prepare_env()
+    main.main(host=BIND, port=port)
+
+
+def serve_airbnb(port: int) -> None:
+    agent_dir = REPO / 'airbnb_agent'
+    sys.path.insert(0, str(agent_dir))
+    from scripted_models import ScriptedChatModel
+
+    import airbnb_agent
+
+    airbnb_agent.ChatGoogleGenerativeAI = lambda model: ScriptedChatModel()
+    main = _load_main(agent_dir, 'airbnb_main')
+    main.SERVER_CONFIGS = {
+        'bnb': {'command': sys.executable, 'args': [STUB_MCP, 'airbnb'], 'transport': 'stdio'},
+    }
+    # airbnb 的 __main__ 导入时会 load_dotenv(override=True)，之后再覆盖
+    _prepare_env()
+    os.environ['GOOGLE_GENAI_MODEL'] = 'scripted'
+    main.main(host=BIND, port=port, log_level='warning')
+
+
+def serve_host(port: int) -> None:
+    host_dir = REPO / 'host_agent'
+    sys.path.insert(0, str(host_dir))
+    os.environ['HOST_PORT'] = str(port)
+    os.environ['HOST_BIND'] = BIND
+    os.environ.setdefault('HOST_GRADIO_ENABLED', 'false')
+    from scripted_models import ScriptedLlm
+
+    import routing_agent
+
+    routing_agent.root_agent.model = ScriptedLlm(script='host')
+    main = _load_main(host_dir, 'host_main')
+    asyncio.run(main.main())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('role', choices=['host', 'weather', 'airbnb', 'tripadvisor'])
+    parser.add_argument('--port', type=int, required=True)
+    args = parser.parse_args()
+    if args.role == 'host':
+        serve_host(args.port)
+    elif args.role == 'airbnb':
+        serve_airbnb(args.port)
+    elif args.role == 'weather':
+        serve_adk_agent('weather', 'weather_agent', args.port)
+    else:
+        serve_adk_agent('tripadvisor', 'tripadvisor_agent', args.port)
+
+
+if __name__ == '__main__':
+    main()
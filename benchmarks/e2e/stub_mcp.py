@@ -0,0 +1,127 @@
+"""Local stub MCP servers with the tool names of the real ones.
+
+    python stub_mcp.py {weather,airbnb,tripadvisor}
+
+Results are deterministic for given arguments and sized like real
+responses; each call sleeps ``BENCH_MCP_LATENCY_MS`` to model the external
+API round trip.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import zlib
+
+from mcp.server.fastmcp import FastMCP
+
+
+async def _latency() -> None:
+    await asyncio.sleep(float(os.getenv('BENCH_MCP_LATENCY_MS', 30)) / 1000)
+
+
+def _seed(*args) -> int:
+    return zlib.crc32(json.dumps(args).encode())
+
+
+def build_weather() -> FastMCP:
+    mcp = FastMCP('weather')
+
+    @mcp.tool()
+    async def get_alerts(state: str) -> str:
+        await _latency()
+        return f'No active alerts for {state}.'
+
+    @mcp.tool()
+    async def get_forecast(latitude: float, longitude: float) -> str:
+        await _latency()
+        return _forecast(_seed(latitude, longitude), f'{latitude:.2f},{longitude:.2f}')
+
+    @mcp.tool()
+    async def get_forecast_by_city(city: str, state: str) -> str:
+        await _latency()
+        return _forecast(_seed(city, state), f'{city}, {state}')
+
+    return mcp
+
+
+def _forecast(seed: int, where: str) -> str:
+    periods = []
+    for i, name in enumerate(['Tonight', 'Monday', 'Monday Night', 'Tuesday', 'Tuesday Night']):
+        temp = 50 + (seed >> i) % 35
+        periods.append(
+            f'{name}:\nTemperature: {temp}°F\nWind: {5 + i} mph NW\n'
+            f'Forecast: Mostly sunny, with a high near {temp}.'
+        )
+    return f'Forecast for {where}:\n\n' + '\n---\n'.join(periods)
+
+
+def build_airbnb() -> FastMCP:
+    mcp = FastMCP('airbnb')
+
+    @mcp.tool()
+    async def airbnb_search(
+        location: str,
+        checkin: str | None = None,
+        checkout: str | None = None,
+        adults: int = 1,
+    ) -> str:
+        await _latency()
+        seed = _seed(location, checkin, checkout, adults)
+        listings = [
+            {
+                'id': str(10_000_000 + (seed + i * 7919) % 9_000_000),
+                'url': f'https://www.airbnb.com/rooms/{10_000_000 + (seed + i * 7919) % 9_000_000}',
+                'name': f'Listing {i + 1} in {location}',
+                'rating': round(4 + ((seed >> i) % 100) / 100, 2),
+                'price': f'${80 + (seed >> (i + 3)) % 300} night',
+            }
+            for i in range(10)
+        ]
+        return json.dumps({'searchUrl': f'https://www.airbnb.com/s/{location}', 'searchResults': listings})
+
+    @mcp.tool()
+    async def airbnb_listing_details(id: str) -> str:
+        await _latency()
+        return json.dumps({'id': id, 'url': f'https://www.airbnb.com/rooms/{id}', 'details': 'Entire home'})
+
+    return mcp
+
+
+def build_tripadvisor() -> FastMCP:
+    mcp = FastMCP('tripadvisor')
+
+    @mcp.tool()
+    async def search_locations(query: str, category: str | None = None) -> str:
+        await _latency()
+        seed = _seed(query, category)
+        data = [
+            {
+                'location_id': str(100_000 + (seed + i * 104_729) % 900_000),
+                'name': f'{(category or "place").title()} #{i + 1}',
+                'address_obj': {'address_string': f'{i + 1} Main St'},
+            }
+            for i in range(10)
+        ]
+        return json.dumps({'data': data}, indent=2)
+
+    @mcp.tool()
+    async def get_nearby_locations(
+        latitude: float, longitude: float, category: str | None = None
+    ) -> str:
+        await _latency()
+        return await search_locations(f'{latitude},{longitude}', category)
+
+    @mcp.tool()
+    async def get_location_details_tool(location_id: int) -> str:
+        await _latency()
+        return json.dumps({'location_id': location_id, 'rating': '4.5', 'num_reviews': '1200'})
+
+    return mcp
+
+
+SERVERS = {'weather': build_weather, 'airbnb': build_airbnb, 'tripadvisor': build_tripadvisor}
+
+
+if __name__ == '__main__':
+    SERVERS[sys.argv[1]]().run(transport='stdio')
@@ -0,0 +1,133 @@
+"""Offline accuracy / latency benchmark for the host pre-router.
+
+Usage (from the repository root):
+
+    python benchmarks/pre_router_bench.py [--threshold 0.2] [--min-margin 0.1]
+
+``None`` labels mark queries the pre-router must leave to the LLM
+(multi-domain requests, follow-ups, chit-chat). The queries are held out:
+none of them appears in the skill corpus the pre-router is trained on.
+Follow-ups that only make sense with history ("book it for 3 adults") are
+not scored here; the host never pre-routes a session that has prior turns.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'host_agent'))
+
+from pre_router import SKILL_CORPUS, PreRouter, tokenize  # noqa: E402
+
+
+# 留出集：不与 SKILL_CORPUS 中的任何示例重复（run() 会校验），避免在训练数据上打分
+LABELLED_QUERIES: list[tuple[str, str | None]] = [
+    ("What's the forecast for Seattle this weekend?", 'Weather'),
+    ('Will it rain in Boston tomorrow?', 'Weather'),
+    ('How cold is it in Chicago right now', 'Weather'),
+    ('temperature in Austin, TX next week', 'Weather'),
+    ('Is it going to snow in Denver on Friday?', 'Weather'),
+    ('humidity in Miami this afternoon', 'Weather'),
+    ('Do I need an umbrella in Portland today?', 'Weather'),
+    ('weather outlook for Phoenix, AZ', 'Weather'),
+    ('Find an airbnb in Paris for 3 nights', 'Accommodations'),
+    ('I need a place to stay in Tokyo for 2 adults', 'Accommodations'),
+    ('Book a hotel room near Central Park', 'Accommodations'),
+    ('Any apartments available in Lisbon from May 2 to May 6?', 'Accommodations'),
+    ('accommodation in Washington D.C. for November 8th, 2 guests', 'Accommodations'),
+    ('cheap rooms in Berlin with check-in on June 3', 'Accommodations'),
+    ('a cabin to rent near Lake Tahoe for four guests', 'Accommodations'),
+    ('Show me hotels in Austin for next weekend', 'Accommodations'),
+    ('What are the best things to do in Rome?', 'TripAdvisor'),
+    ('top rated museums in London', 'TripAdvisor'),
+    ('Reviews of sightseeing tours in Barcelona', 'TripAdvisor'),
+    ('good places for dining in San Francisco', 'TripAdvisor'),
+    ('Which restaurants near the Colosseum have the best reviews?', 'TripAdvisor'),
+    ('family friendly attractions in Orlando', 'TripAdvisor'),
+    ('Where is the Eiffel Tower located?', 'Location'),
+    ('What is the address of the Louvre?', 'Location'),
+    ('coordinates of Mount Fuji', 'Location'),
+    ('How far is Oakland from San Jose distance', 'Location'),
+    ('show the Golden Gate Bridge on a map', 'Location'),
+    ('Which train goes from Boston to New York?', 'Transport'),
+    ('bus schedule from downtown to the airport', 'Transport'),
+    ('How do I get from JFK to Manhattan by subway?', 'Transport'),
+    ('cheapest flight route from Berlin to Madrid', 'Transport'),
+    ('Is there a metro line to the stadium?', 'Transport'),
+    # 多领域 / 追问 / 闲聊：应交给 LLM
+    ('weather, a place to stay and things to do in Austin next week', None),
+    ('Find me a hotel in Rome and tell me the forecast there', None),
+    ('Find me hotels in Austin and the weather there', None),
+    ('book an airbnb in Kyoto and suggest some restaurants nearby', None),
+    ('train to Florence and then a hotel for two nights', None),
+    ('yes, please go ahead', None),
+    ('2 adults', None),
+    ('thanks!', None),
+    ('what did you say earlier?', None),
+    ('sounds good', None),
+]
+
+
+def check_held_out() -> None:
+    training = {tuple(tokenize(t)) for texts in SKILL_CORPUS.values() for t in texts}
+    leaked = [text for text, _ in LABELLED_QUERIES if tuple(tokenize(text)) in training]
+    if leaked:
+        raise SystemExit(f'benchmark queries copied from SKILL_CORPUS: {leaked}')
+
+
+def run(threshold: float, min_margin: float, repeat: int) -> dict:
+    check_held_out()
+    router = PreRouter(threshold=threshold, min_margin=min_margin)
+    latencies = []
+    dispatched = correct = false_dispatch = routable = 0
+    errors = []
+    for i in range(repeat):
+        for text, label in LABELLED_QUERIES:
+            start = time.perf_counter()
+            pred = router.predict(text)
+            latencies.append((time.perf_counter() - start) * 1e6)
+            if i > 0:
+                continue
+            routable += label is not None
+            if pred.dispatch:
+                dispatched += 1
+                if label is None:
+                    false_dispatch += 1
+                    errors.append((text, label, pred.keyword, pred.confidence))
+                elif pred.keyword == label:
+                    correct += 1
+                else:
+                    errors.append((text, label, pred.keyword, pred.confidence))
+    latencies.sort()
+    return {
+        'queries': len(LABELLED_QUERIES),
+        'dispatched': dispatched,
+        'precision': round(correct / dispatched, 4) if dispatched else 0.0,
+        'coverage': round(correct / routable, 4) if routable else 0.0,
+        'false_dispatch': false_dispatch,
+        'latency_us_p50': round(statistics.median(latencies), 1),
+        'latency_us_p95': round(latencies[int(len(latencies) * 0.95) - 1], 1),
+        'errors': errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threshold', type=float, default=0.2)
+    parser.add_argument('--min-margin', type=float, default=0.1)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    report = run(args.threshold, args.min_margin, args.repeat)
+    errors = report.pop('errors')
+    for key, value in report.items():
+        print(f'{key:>16}: {value}')
+    for text, label, got, conf in errors:
+        print(f'  ✗ {text!r}: expected {label}, got {got} ({conf})')
+
+
+if __name__ == '__main__':
+    main()
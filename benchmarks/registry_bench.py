@@ -0,0 +1,119 @@
+"""Top-k latency of the local vector registry over many registered agents.
+
+Usage (from the repository root):
+
+    python benchmarks/registry_bench.py [--agents 10000] [--queries 2000] [--top-k 3]
+
+Registers ``--agents`` synthetic agents under one keyword (the worst case:
+every query scans all of them), then measures end-to-end ``search`` latency
+(query embedding + cosine scores + top-k) and incremental registration cost.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from routing.local_registry import HashedNgramEmbedder, LocalRegistry  # noqa: E402
+from routing.registry_models import RegistryRegisterReq  # noqa: E402
+
+
+DOMAINS = [
+    ('weather', ['forecast', 'temperature', 'rain', 'storm alerts', 'humidity']),
+    ('lodging', ['airbnb', 'hotel rooms', 'apartments', 'vacation rentals', 'hostels']),
+    ('dining', ['restaurants', 'cafes', 'street food', 'wine bars', 'bakeries']),
+    ('sights', ['museums', 'attractions', 'landmarks', 'parks', 'guided tours']),
+    ('transit', ['trains', 'buses', 'subway', 'flights', 'ferries']),
+]
+CITIES = ['Paris', 'Tokyo', 'Austin', 'Lisbon', 'Seattle', 'Rome', 'Boston', 'Denver']
+QUERIES = [
+    'weather forecast in Seattle this weekend',
+    'find a hotel room in Paris for 2 adults',
+    'best restaurants near the Louvre',
+    'museums and landmarks to visit in Rome',
+    'train from Boston to New York tomorrow',
+]
+
+
+def synthetic_agents(count: int, seed: int = 0) -> list[RegistryRegisterReq]:
+    rng = random.Random(seed)
+    agents = []
+    for i in range(count):
+        domain, topics = rng.choice(DOMAINS)
+        picked = rng.sample(topics, 2)
+        city = rng.choice(CITIES)
+        agents.append(
+            RegistryRegisterReq(
+                agent_id=f'agent-{i}',
+                name=f'{domain.title()} Agent {i}',
+                description=f'Answers questions about {picked[0]} and {picked[1]} in {city}',
+                url=f'http://10.0.{i // 250}.{i % 250}:8000',
+            )
+        )
+    return agents
+
+
+def run(agents: int, queries: int, top_k: int, dim: int) -> dict:
+    registry = LocalRegistry(HashedNgramEmbedder(dim))
+    population = synthetic_agents(agents)
+
+    start = time.perf_counter()
+    registry.register_many('bench', population)
+    bulk_s = time.perf_counter() - start
+
+    # 增量注册：逐个注册（含更新已有 agent）
+    extra = synthetic_agents(200, seed=1)
+    start = time.perf_counter()
+    for agent in extra:
+        registry.register('bench', agent)
+    incremental_us = (time.perf_counter() - start) / len(extra) * 1e6
+
+    for text in QUERIES:  # 预热
+        registry.search('bench', text, top_k)
+    latencies = []
+    for i in range(queries):
+        text = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        registry.search('bench', text, top_k)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+
+    examples = {
+        text: [(a.name, round(a.score, 3)) for a in registry.search('bench', text, top_k)]
+        for text in QUERIES[:2]
+    }
+    return {
+        'agents': registry.stats()['families']['bench'],
+        'dim': dim,
+        'bulk_register_ms': round(bulk_s * 1000, 1),
+        'incremental_register_us': round(incremental_us, 1),
+        'search_us_p50': round(statistics.median(latencies), 1),
+        'search_us_p95': round(latencies[int(len(latencies) * 0.95) - 1], 1),
+        'search_us_p99': round(latencies[int(len(latencies) * 0.99) - 1], 1),
+        'examples': examples,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--agents', type=int, default=10_000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--dim', type=int, default=256)
+    args = parser.parse_args()
+
+    report = run(args.agents, args.queries, args.top_k, args.dim)
+    examples = report.pop('examples')
+    for key, value in report.items():
+        print(f'{key:>24}: {value}')
+    for text, hits in examples.items():
+        print(f'  {text!r} -> {hits}')
+
+
+if __name__ == '__main__':
+    main()
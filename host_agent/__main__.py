@@ -1,5 +1,6 @@
 import json
 import asyncio
+import contextlib
 import traceback  # Import the traceback module
 import json
 import datetime
@@ -8,61 +9,56 @@ from collections.abc import AsyncIterator
 from pprint import pformat
 
 import gradio as gr
+import uvicorn
 
 from google.adk.events import Event
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.genai import types
+from api import create_api, stream_remote_turn
+from connection_pool import SHARED_POOL
+from log_sink import LOG_SINK
+from session_store import BoundedSessionService
+from turns import ERROR_MESSAGE, TurnRunner
+from warmup import WarmupConfig
 from routing_agent import (
     root_agent as routing_agent,
 )
+from routing_agent import routing_agent_instance
 
 
 APP_NAME = 'routing_app'
 USER_ID = 'default_user'
-SESSION_ID = 'default_session'
+# 每个浏览器会话（gr.Request.session_hash）对应一个独立的 ADK 会话
+DEFAULT_SESSION_ID = 'default_session'
 
-SESSION_SERVICE = InMemorySessionService()
+SESSION_SERVICE = BoundedSessionService.from_env()
 ROUTING_AGENT_RUNNER = Runner(
     agent=routing_agent,
     app_name=APP_NAME,
     session_service=SESSION_SERVICE,
 )
-LOG_PATH = "/mnt/ssd2/dh/Agent/logs/session_trace.log"
-LOGPATH = "/mnt/ssd2/dh/Agent/logs/prompt_debug.log"
-os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+# 回合执行与前端解耦：SSE API 与 Gradio UI 消费同一个事件流
+TURNS = TurnRunner(
+    ROUTING_AGENT_RUNNER,
+    SESSION_SERVICE,
+    APP_NAME,
+    USER_ID,
+    instruction=routing_agent.instruction,
+)
+HOST_GRADIO_ENABLED = os.getenv('HOST_GRADIO_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# 设置后 Gradio 通过该地址的 /api/chat 调用远端 host（纯 UI 进程）
+HOST_API_URL = os.getenv('HOST_API_URL') or None
+WARMUP_CONFIG = WarmupConfig.from_env()
+
+
 def log_json(obj, header=""):
-    """简单的 JSON 打印/记录函数"""
-    import json, os
-    os.makedirs(os.path.dirname(LOGPATH), exist_ok=True)
-    with open(LOGPATH, "a", encoding="utf-8") as f:
-        f.write(f"\n=== {header} @ {datetime.datetime.now().isoformat()} ===\n")
-        try:
-            import dataclasses
-            if hasattr(obj, "model_dump"):
-                f.write(json.dumps(obj.model_dump(exclude_none=True), indent=2, ensure_ascii=False))
-            else:
-                f.write(json.dumps(obj, indent=2, ensure_ascii=False))
-        except Exception:
-            f.write(str(obj))
-        f.write("\n------------------------------------\n")
+    """记录结构化对象（经 LOG_SINK 异步批量写入，不阻塞事件循环）"""
+    LOG_SINK.debug(header or "json", payload=obj)
+
 
 def log_event(user_message: str, event_obj: object):
-    """记录单个事件到日志文件"""
-    try:
-        timestamp = datetime.now().isoformat()
-        with open(LOG_PATH, "a", encoding="utf-8") as f:
-            f.write(f"\n=== New Event @ {timestamp} ===\n")
-            f.write(f"User Message: {user_message}\n")
-            if event_obj:
-                try:
-                    json_data = event_obj.model_dump(exclude_none=True)
-                except Exception:
-                    json_data = str(event_obj)
-                f.write(json.dumps(json_data, indent=2, ensure_ascii=False))
-                f.write("\n---------------------------------------\n")
-    except Exception as e:
-        print(f"[LOG ERROR] Failed to write event log: {e}")
+    """记录单个事件到日志"""
+    LOG_SINK.debug("event", user_message=user_message, adk_event=event_obj)
 
 """
 async def get_response_from_agent(
@@ -137,115 +133,126 @@ from typing import AsyncIterator
 from google.genai import types
 from google.adk.events import Event
 
-LOG_DIR = "./logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-SESSION_LOG = os.path.join(LOG_DIR, f"session_{datetime.date.today()}.log")
+PLAN_STATUS_ICONS = {
+    "running": "⏳", "done": "✅", "failed": "❌", "skipped": "⏭️",
+}
 
-def write_log(data: dict, header: str = None):
-    """Append structured data to daily log file."""
-    with open(SESSION_LOG, "a", encoding="utf-8") as f:
-        f.write("\n" + "=" * 100 + "\n")
-        if header:
-            f.write(f"=== {header} @ {datetime.datetime.now()} ===\n")
-        json.dump(data, f, ensure_ascii=False, indent=2)
-        f.write("\n" + "=" * 100 + "\n")
 
-async def get_response_from_agent(
-    message: str,
-    history: list[gr.ChatMessage],
-) -> AsyncIterator[gr.ChatMessage]:
-    """Get response from host agent and log full runtime info."""
-
-    start_time = time.time()
-    runtime_record = {
-        "timestamp": datetime.datetime.now().isoformat(),
-        "user_message": message,
-        "events": [],
-        "final_response": None,
-        "error": None,
-    }
+def _plan_to_chat_message(progress: dict, plan: dict[str, dict]) -> gr.ChatMessage:
+    """Render the plan executor's step statuses as one checklist message."""
+    if progress.get("type") == "plan_step":
+        plan[progress["step"]] = progress
+    lines = []
+    for step_id, step in plan.items():
+        icon = PLAN_STATUS_ICONS.get(step.get("status"), "•")
+        line = f"{icon} `{step_id}` {step.get('keyword', '')} — {step.get('status')}"
+        if step.get("status") in ("done", "failed"):
+            line += f" ({step.get('elapsed', 0):.1f}s)"
+        if step.get("error"):
+            line += f": {step['error']}"
+        lines.append(line)
+    title = "🗺️ Trip plan"
+    if progress.get("type") == "plan_done":
+        title += f" finished in {progress.get('elapsed', 0):.1f}s"
+    return gr.ChatMessage(
+        role="assistant",
+        content="\n".join(lines),
+        metadata={"title": title},
+    )
 
-    try:
-        print(f"[DEBUG] Runner.run_async() called with message: {message}")
-        ctx = await SESSION_SERVICE.get_session(
-            app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID
-        )
-        prompt_text = routing_agent.instruction(ctx)
-        write_log({"system_prompt": prompt_text, "user_message": message}, "MODEL PROMPT")
 
-        event_iterator: AsyncIterator[Event] = ROUTING_AGENT_RUNNER.run_async(
-            user_id=USER_ID,
-            session_id=SESSION_ID,
-            new_message=types.Content(role="user", parts=[types.Part(text=message)]),
-        )
+def _progress_to_chat_message(
+    progress: dict, streamed: dict[str, str], plan: dict[str, dict]
+) -> gr.ChatMessage | None:
+    """Turn a streamed agent chunk or plan update into a chat message."""
+    if progress.get("type") in ("plan_step", "plan_done"):
+        return _plan_to_chat_message(progress, plan)
+    if progress.get("type") != "agent_chunk":
+        return None
+    agent = progress.get("agent", "agent")
+    text = progress.get("text") or ""
+    if progress.get("kind") == "artifact" and progress.get("append"):
+        streamed[agent] = streamed.get(agent, "") + text
+    else:
+        streamed[agent] = text
+    return gr.ChatMessage(
+        role="assistant",
+        content=streamed[agent],
+        metadata={"title": f"📡 Streaming from {agent}"},
+    )
 
-        async for event in event_iterator:
-            # --- 记录事件
-            runtime_record["events"].append({
-                "time": time.time(),
-                "event_type": event.type if hasattr(event, "type") else "unknown",
-                "content": str(event.content)[:300] if event.content else None,
-            })
-            log_json(event, header="MODEL RESPONSE EVENT")
 
-            if event.content and event.content.parts:
-                for part in event.content.parts:
-                    if part.function_call:
-                        formatted_call = f"```python\n{pformat(part.function_call.model_dump(exclude_none=True), indent=2, width=80)}\n```"
-                        yield gr.ChatMessage(
-                            role="assistant",
-                            content=f"🛠️ **Tool Call: {part.function_call.name}**\n{formatted_call}",
-                        )
+def session_id_for(request: gr.Request | None) -> str:
+    """Map a Gradio browser session onto its own ADK session id."""
+    session_hash = getattr(request, 'session_hash', None)
+    return f'web-{session_hash}' if session_hash else DEFAULT_SESSION_ID
 
-                    elif part.function_response:
-                        response_content = part.function_response.response
-                        if isinstance(response_content, dict) and "response" in response_content:
-                            formatted_response_data = response_content["response"]
-                        else:
-                            formatted_response_data = response_content
-                        formatted_response = f"```json\n{pformat(formatted_response_data, indent=2, width=80)}\n```"
-                        yield gr.ChatMessage(
-                            role="assistant",
-                            content=f"⚡ **Tool Response from {part.function_response.name}**\n{formatted_response}",
-                        )
 
-            # --- 最终响应阶段
-            if event.is_final_response():
-                final_response_text = ""
-                if event.content and event.content.parts:
-                    final_response_text = "".join(
-                        [p.text for p in event.content.parts if p.text]
-                    )
-                elif event.actions and event.actions.escalate:
-                    final_response_text = f"Agent escalated: {event.error_message or 'No specific message.'}"
+async def _turn_events(message: str, session_id: str) -> AsyncIterator[dict]:
+    """Events of one turn: in-process, or from a remote host API if configured."""
+    if HOST_API_URL:
+        async for event in stream_remote_turn(
+            SHARED_POOL.client, HOST_API_URL, message, session_id
+        ):
+            yield event
+    else:
+        async for event in TURNS.run_turn(message, session_id):
+            yield event
 
-                runtime_record["final_response"] = final_response_text
-                if final_response_text:
-                    yield gr.ChatMessage(role="assistant", content=final_response_text)
-                break
 
+async def get_response_from_agent(
+    message: str,
+    history: list[gr.ChatMessage],
+    request: gr.Request = None,
+) -> AsyncIterator[gr.ChatMessage]:
+    """Render the turn's event stream as chat messages (thin UI client)."""
+    session_id = session_id_for(request)
+    streamed: dict[str, str] = {}
+    plan: dict[str, dict] = {}
+    try:
+        async for event in _turn_events(message, session_id):
+            kind = event.get("type")
+            if kind == "progress":
+                chat_message = _progress_to_chat_message(event["event"], streamed, plan)
+                if chat_message is not None:
+                    yield chat_message
+            elif kind == "tool_call":
+                formatted_call = f"```python\n{pformat(event['call'], indent=2, width=80)}\n```"
+                yield gr.ChatMessage(
+                    role="assistant",
+                    content=f"🛠️ **Tool Call: {event['name']}**\n{formatted_call}",
+                )
+            elif kind == "tool_response":
+                formatted_response = f"```json\n{pformat(event['response'], indent=2, width=80)}\n```"
+                yield gr.ChatMessage(
+                    role="assistant",
+                    content=f"⚡ **Tool Response from {event['name']}**\n{formatted_response}",
+                )
+            elif kind == "final":
+                if event["text"]:
+                    yield gr.ChatMessage(role="assistant", content=event["text"])
+            elif kind == "error":
+                yield gr.ChatMessage(role="assistant", content=event["message"])
     except Exception as e:
-        runtime_record["error"] = str(e)
-        print(f"❌ Error in get_response_from_agent (Type: {type(e)}): {e}")
-        traceback.print_exc()
-        yield gr.ChatMessage(
-            role="assistant",
-            content="An error occurred while processing your request. Please check the server logs for details.",
-        )
+        # 仅远程模式会走到这里（本地回合的异常已在 TurnRunner 中转换为 error 事件）
+        LOG_SINK.error("ui_turn_error", error_type=type(e).__name__, error=str(e))
+        yield gr.ChatMessage(role="assistant", content=ERROR_MESSAGE)
 
-    finally:
-        runtime_record["duration_sec"] = round(time.time() - start_time, 3)
-        runtime_record["status"] = "completed" if not runtime_record["error"] else "error"
-        write_log(runtime_record, "SESSION SUMMARY")
 
-async def main():
-    """Main gradio app."""
-    print('Creating ADK session...')
-    await SESSION_SERVICE.create_session(
-        app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID
-    )
-    print('ADK session created successfully.')
+def get_routing_debug() -> dict:
+    """Expose per-agent health and routing counters (also at /routing_debug)."""
+    if routing_agent_instance is None:
+        return {}
+    return {
+        **routing_agent_instance.debug_snapshot(),
+        'sessions': SESSION_SERVICE.stats(),
+        'turns': TURNS.stats(),
+    }
 
+
+def build_ui() -> gr.Blocks:
+    """The Gradio chat UI; a thin client of the turn event stream."""
+    # ADK 会话按浏览器会话按需创建（见 session_id_for / ensure_session）
     with gr.Blocks(
         theme=gr.themes.Ocean(), title='A2A Host Agent with Logo'
     ) as demo:
@@ -264,13 +271,70 @@ async def main():
             title='A2A Host Agent',
             description='This assistant can help you to check weather and find airbnb accommodation',
         )
+        with gr.Accordion('Routing debug', open=False):
+            debug_view = gr.JSON(label='Agent health / routing stats')
+            gr.Button('Refresh').click(
+                get_routing_debug, outputs=debug_view, api_name='routing_debug'
+            )
+    return demo
+
+
+def get_readiness() -> dict:
+    if routing_agent_instance is None:
+        return {'status': 'degraded', 'error': 'routing agent failed to initialize'}
+    if not WARMUP_CONFIG.enabled:
+        return {'status': 'ready', 'warmup': 'disabled'}
+    return routing_agent_instance.readiness.as_dict()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # 持久化模式下接管上次进程留下的会话，使其也参与 LRU/TTL 淘汰
+    await SESSION_SERVICE.restore(app_name=APP_NAME, user_id=USER_ID)
+    warmup_task: asyncio.Task | None = None
+    if WARMUP_CONFIG.enabled and routing_agent_instance is not None:
+        # 预热 registry 查询、连接池与 agent 探测；阻塞模式下预热完成才开始接流量
+        warmup_task = asyncio.create_task(routing_agent_instance.warm_up(WARMUP_CONFIG))
+        if WARMUP_CONFIG.blocking:
+            readiness = await warmup_task
+            print(f'Warm-up finished: {readiness.status} in {readiness.elapsed:.2f}s')
+    try:
+        yield
+    finally:
+        if warmup_task is not None and not warmup_task.done():
+            warmup_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await warmup_task
+        # 显式释放共享的 HTTP 连接池，避免遗留 socket
+        if routing_agent_instance is not None:
+            await routing_agent_instance.aclose()
+        else:
+            await SHARED_POOL.aclose()
+        print('Remote agent connections closed.')
+        LOG_SINK.close()
+
+
+async def main():
+    """Serve the headless SSE API and, optionally, the Gradio UI on one port."""
+    app = create_api(
+        TURNS, debug=get_routing_debug, readiness=get_readiness, lifespan=lifespan
+    )
+    if HOST_GRADIO_ENABLED:
+        app = gr.mount_gradio_app(app, build_ui(), path='/')
 
-    print('Launching Gradio interface...')
-    demo.queue().launch(
-        server_name='0.0.0.0',
-        server_port=8083,
+    host = os.getenv('HOST_BIND', '0.0.0.0')
+    port = int(os.getenv('HOST_PORT', 8083))
+    server = uvicorn.Server(
+        uvicorn.Config(app=app, host=host, port=port, lifespan='on')
+    )
+    print(
+        f'Launching host API at http://{host}:{port}/api/chat'
+        + (' with Gradio UI at /' if HOST_GRADIO_ENABLED else ' (headless)')
     )
-    print('Gradio application has been shut down.')
+    try:
+        await server.serve()
+    finally:
+        print('Host application has been shut down.')
 
 
 if __name__ == '__main__':
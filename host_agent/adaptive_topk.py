@@ -0,0 +1,134 @@
+"""Per-request choice of how many agents to fan out to.
+
+Instead of always calling three agents, k starts at the number of candidates
+whose quality (registry score times recent success rate) is within
+``score_gap`` of the best one, so a clearly dominant first candidate is
+called alone. One extra agent is added
+as a hedge when the best candidate's recent success rate is below
+``min_success`` (or unknown), and another when its EWMA latency uses too
+much of the fan-out deadline (or is unknown). The result is clamped to
+``[min_k, max_k]``.
+
+Savings are measured against what a fixed top-``max_k`` fan-out would have
+called, i.e. ``min(max_k, candidates)`` per request, so families with fewer
+than ``max_k`` agents do not count as savings.
+"""
+
+import os
+
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from agent_health import HealthTracker
+
+
+@dataclass
+class TopKConfig:
+    adaptive: bool = True
+    min_k: int = 1
+    max_k: int = 3
+    score_gap: float = 0.15
+    min_success: float = 0.9
+    latency_share: float = 0.5
+
+    @classmethod
+    def from_env(cls) -> 'TopKConfig':
+        min_k = max(1, int(os.getenv('TOPK_MIN', 1)))
+        return cls(
+            adaptive=os.getenv('TOPK_ADAPTIVE', 'true').lower() in ('1', 'true', 'yes'),
+            min_k=min_k,
+            max_k=max(min_k, int(os.getenv('TOPK_MAX', 3))),
+            score_gap=float(os.getenv('TOPK_SCORE_GAP', 0.15)),
+            min_success=float(os.getenv('TOPK_MIN_SUCCESS', 0.9)),
+            latency_share=float(os.getenv('TOPK_LATENCY_SHARE', 0.5)),
+        )
+
+
+class AdaptiveTopK:
+    """Chooses k per request and reports how many agent calls it saved."""
+
+    def __init__(self, config: TopKConfig, health: HealthTracker):
+        self.config = config
+        self.health = health
+        self.requests = 0
+        self.agent_calls = 0
+        # 固定 top-max_k 时本应调用的次数（候选不足 max_k 时按候选数计）
+        self.baseline_calls = 0
+        self.k_histogram: Counter[int] = Counter()
+        self.reasons: Counter[str] = Counter()
+
+    def _quality(self, candidate: Any) -> float:
+        # 分差只看质量（registry 分数 × 成功率）；延迟单独按时间预算判断
+        success = self.health.success_rate(candidate.url)
+        return candidate.score * (1.0 if success is None else success)
+
+    def choose(
+        self, candidates: Sequence[Any], latency_budget: float | None = None
+    ) -> tuple[int, list[str]]:
+        """Return ``(k, reasons)`` for registry ``candidates`` (``url``/``score``)."""
+        config = self.config
+        if not config.adaptive:
+            return config.max_k, ['fixed']
+
+        callable_ = [c for c in candidates if self.health.would_allow(c.url)] or list(
+            candidates
+        )
+        scored = sorted(
+            ((self._quality(c), c) for c in callable_),
+            key=lambda item: item[0],
+            reverse=True,
+        )
+        if not scored:
+            return config.min_k, ['no_candidates']
+
+        best_score, best = scored[0]
+        reasons = []
+        # 1️⃣ 与最优候选分差在 score_gap 以内的都视为"难分高下"
+        floor = best_score * (1 - config.score_gap) if best_score > 0 else float('-inf')
+        k = sum(1 for score, _ in scored if score >= floor)
+        reasons.append('dominant' if k == 1 else f'close_scores={k}')
+
+        # 2️⃣ 最优候选近期成功率不足（或未知）时多调用一个作为对冲
+        success = self.health.success_rate(best.url)
+        if success is None or success < config.min_success:
+            k += 1
+            reasons.append('unproven' if success is None else f'success={success:.2f}')
+
+        # 3️⃣ 最优候选的延迟占用过多剩余时间预算时再加一个
+        if latency_budget:
+            latency = self.health.get(best.url).ewma_latency
+            if latency is None or latency > latency_budget * config.latency_share:
+                k += 1
+                reasons.append(
+                    'latency_unknown' if latency is None else f'latency={latency:.1f}s'
+                )
+
+        k = max(config.min_k, min(config.max_k, k, len(scored)))
+        return k, reasons
+
+    def record(self, k: int, reasons: list[str], available: int) -> None:
+        """Record one fan-out of ``k`` agents out of ``available`` candidates."""
+        self.requests += 1
+        self.agent_calls += k
+        self.baseline_calls += min(self.config.max_k, available)
+        self.k_histogram[k] += 1
+        for reason in reasons:
+            self.reasons[reason.split('=')[0]] += 1
+
+    def stats(self) -> dict:
+        baseline = self.baseline_calls
+        saved = baseline - self.agent_calls
+        return {
+            'adaptive': self.config.adaptive,
+            'range': [self.config.min_k, self.config.max_k],
+            'requests': self.requests,
+            'agent_calls': self.agent_calls,
+            'baseline_calls': baseline,
+            'agent_calls_saved': saved,
+            'saved_ratio': round(saved / baseline, 4) if baseline else 0.0,
+            'avg_k': round(self.agent_calls / self.requests, 3) if self.requests else 0.0,
+            'k_histogram': dict(sorted(self.k_histogram.items())),
+            'reasons': dict(self.reasons),
+        }
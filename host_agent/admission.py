@@ -0,0 +1,217 @@
+"""Admission control for outbound remote agent calls.
+
+Every call to a remote agent takes a slot: at most ``global_limit`` calls run
+at once across the host, and at most ``per_agent_limit`` against one agent
+URL. Calls that find no free slot wait in a bounded priority queue
+(interactive requests ahead of background work such as prefetch). When the
+queue is full, or a call waited longer than ``max_wait``, it is rejected
+right away with :class:`AdmissionRejected` instead of piling more load on
+the downstream servers. Background calls never queue.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import os
+import time
+
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass, field
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+BUSY_MESSAGE = (
+    'The travel agents are busy right now (too many requests in flight). '
+    'Please try again in a few seconds.'
+)
+
+_PRIORITY: contextvars.ContextVar[int] = contextvars.ContextVar(
+    'admission_priority', default=PRIORITY_INTERACTIVE
+)
+
+
+@contextlib.contextmanager
+def admission_priority(priority: int) -> Iterator[None]:
+    """Run the calls made inside this block at ``priority`` (lower is sooner)."""
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def current_priority() -> int:
+    return _PRIORITY.get()
+
+
+class AdmissionRejected(Exception):
+    """Raised when an outbound call is refused; ``reason`` says why."""
+
+    def __init__(self, reason: str, key: str):
+        super().__init__(f'{reason}: {key}')
+        self.reason = reason
+        self.key = key
+        self.user_message = BUSY_MESSAGE
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    key: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class AdmissionController:
+    """Global + per-agent concurrency caps with a bounded priority wait queue."""
+
+    def __init__(
+        self,
+        global_limit: int = 16,
+        per_agent_limit: int = 4,
+        max_queue: int = 64,
+        max_wait: float = 10.0,
+    ):
+        self.global_limit = global_limit
+        self.per_agent_limit = per_agent_limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._active_total = 0
+        self._active: dict[str, int] = {}
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._wait_times: deque[float] = deque(maxlen=512)
+        self.admitted = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.rejected: dict[str, int] = {'queue_full': 0, 'timeout': 0, 'busy': 0}
+
+    @classmethod
+    def from_env(cls) -> 'AdmissionController':
+        return cls(
+            global_limit=int(os.getenv('ADMISSION_GLOBAL_LIMIT', 16)),
+            per_agent_limit=int(os.getenv('ADMISSION_PER_AGENT_LIMIT', 4)),
+            max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', 64)),
+            max_wait=float(os.getenv('ADMISSION_MAX_WAIT', 10)),
+        )
+
+    def _has_capacity(self, key: str) -> bool:
+        return (
+            self._active_total < self.global_limit
+            and self._active.get(key, 0) < self.per_agent_limit
+        )
+
+    def _take(self, key: str) -> None:
+        self._active_total += 1
+        self._active[key] = self._active.get(key, 0) + 1
+        self.admitted += 1
+
+    def _queue_depth(self) -> int:
+        return sum(not w.future.done() for w in self._waiters)
+
+    def _blocked_by_waiters(self, priority: int) -> bool:
+        # 有同等或更高优先级、且现在就能运行的等待者时，不插队
+        return any(
+            not w.future.done() and w.priority <= priority and self._has_capacity(w.key)
+            for w in self._waiters
+        )
+
+    async def acquire(self, key: str, priority: int | None = None) -> None:
+        priority = current_priority() if priority is None else priority
+        if self._has_capacity(key) and not self._blocked_by_waiters(priority):
+            self._take(key)
+            self._wait_times.append(0.0)
+            return
+
+        if priority >= PRIORITY_BACKGROUND:
+            self.rejected['busy'] += 1
+            raise AdmissionRejected('busy', key)
+        depth = self._queue_depth()
+        if depth >= self.max_queue:
+            self.rejected['queue_full'] += 1
+            raise AdmissionRejected('queue_full', key)
+
+        waiter = _Waiter(
+            priority, next(self._seq), key, asyncio.get_running_loop().create_future()
+        )
+        heapq.heappush(self._waiters, waiter)
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, depth + 1)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self._prune()
+                self.rejected['timeout'] += 1
+                raise AdmissionRejected('timeout', key) from None
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(key)  # 已获得名额但调用方被取消
+            else:
+                waiter.future.cancel()
+                self._prune()
+            raise
+        self._wait_times.append(time.monotonic() - started)
+
+    def release(self, key: str) -> None:
+        self._active_total -= 1
+        remaining = self._active.get(key, 0) - 1
+        if remaining > 0:
+            self._active[key] = remaining
+        else:
+            self._active.pop(key, None)
+        self._wake()
+
+    def _prune(self) -> None:
+        self._waiters = [w for w in self._waiters if not w.future.done()]
+        heapq.heapify(self._waiters)
+
+    def _wake(self) -> None:
+        """Hand free slots to waiters in priority order."""
+        self._prune()
+        for waiter in sorted(self._waiters):
+            if self._active_total >= self.global_limit:
+                break
+            if self._has_capacity(waiter.key):
+                self._take(waiter.key)
+                waiter.future.set_result(None)
+        self._prune()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key: str, priority: int | None = None) -> AsyncIterator[None]:
+        await self.acquire(key, priority)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def stats(self) -> dict:
+        waits = sorted(self._wait_times)
+        return {
+            'active': self._active_total,
+            'active_per_agent': dict(self._active),
+            'queue_depth': self._queue_depth(),
+            'max_queue_depth': self.max_queue_depth,
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'rejected': dict(self.rejected),
+            'wait_avg_ms': round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+            'wait_p95_ms': (
+                round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2)
+                if waits
+                else 0.0
+            ),
+            'limits': {
+                'global': self.global_limit,
+                'per_agent': self.per_agent_limit,
+                'max_queue': self.max_queue,
+                'max_wait': self.max_wait,
+            },
+        }
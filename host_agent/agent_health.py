@@ -0,0 +1,215 @@
+"""Per-agent health model used to re-rank registry candidates."""
+
+import os
+import time
+
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from enum import Enum
+from typing import Any
+
+
+class CircuitState(str, Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+@dataclass
+class AgentHealth:
+    """Rolling health statistics for one agent URL."""
+
+    url: str
+    name: str = ''
+    ewma_latency: float | None = None
+    ewma_error: float = 0.0
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    state: CircuitState = CircuitState.CLOSED
+    opened_at: float = 0.0
+    probe_in_flight: bool = False
+
+    @property
+    def samples(self) -> int:
+        return self.successes + self.failures
+
+
+class HealthTracker:
+    """Tracks EWMA latency, EWMA error rate and a circuit breaker per agent.
+
+    A circuit opens after ``failure_threshold`` consecutive failures, or when
+    the error rate exceeds ``error_rate_threshold`` over at least
+    ``min_samples`` calls. After ``open_seconds`` a single half-open probe is
+    let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        failure_threshold: int = 3,
+        error_rate_threshold: float = 0.5,
+        min_samples: int = 5,
+        open_seconds: float = 30.0,
+        latency_ref: float = 5.0,
+    ):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.open_seconds = open_seconds
+        self.latency_ref = latency_ref
+        self._agents: dict[str, AgentHealth] = {}
+
+    @classmethod
+    def from_env(cls) -> 'HealthTracker':
+        return cls(
+            alpha=float(os.getenv('HEALTH_EWMA_ALPHA', 0.3)),
+            failure_threshold=int(os.getenv('HEALTH_FAILURE_THRESHOLD', 3)),
+            error_rate_threshold=float(os.getenv('HEALTH_ERROR_RATE_THRESHOLD', 0.5)),
+            min_samples=int(os.getenv('HEALTH_MIN_SAMPLES', 5)),
+            open_seconds=float(os.getenv('HEALTH_OPEN_SECONDS', 30.0)),
+            latency_ref=float(os.getenv('HEALTH_LATENCY_REF_SEC', 5.0)),
+        )
+
+    def get(self, url: str, name: str = '') -> AgentHealth:
+        health = self._agents.get(url)
+        if health is None:
+            health = self._agents[url] = AgentHealth(url=url, name=name)
+        elif name and not health.name:
+            health.name = name
+        return health
+
+    def _observe_latency(self, health: AgentHealth, latency: float) -> None:
+        if health.ewma_latency is None:
+            health.ewma_latency = latency
+        else:
+            health.ewma_latency += self.alpha * (latency - health.ewma_latency)
+
+    def record_success(self, url: str, latency: float, name: str = '') -> None:
+        health = self.get(url, name)
+        self._observe_latency(health, latency)
+        health.ewma_error *= 1 - self.alpha
+        health.successes += 1
+        health.consecutive_failures = 0
+        health.probe_in_flight = False
+        health.state = CircuitState.CLOSED
+
+    def record_failure(
+        self, url: str, latency: float | None = None, name: str = ''
+    ) -> None:
+        health = self.get(url, name)
+        if latency is not None:
+            self._observe_latency(health, latency)
+        health.ewma_error += self.alpha * (1 - health.ewma_error)
+        health.failures += 1
+        health.consecutive_failures += 1
+        health.probe_in_flight = False
+        if (
+            health.state is CircuitState.HALF_OPEN
+            or health.consecutive_failures >= self.failure_threshold
+            or (
+                health.samples >= self.min_samples
+                and health.ewma_error >= self.error_rate_threshold
+            )
+        ):
+            health.state = CircuitState.OPEN
+            health.opened_at = time.monotonic()
+
+    def record_cancelled(self, url: str, elapsed: float) -> None:
+        """A call was cancelled (e.g. a fan-out straggler).
+
+        The elapsed time is a lower bound on the agent's latency, so it is fed
+        into the EWMA without counting as an error.
+        """
+        health = self.get(url)
+        self._observe_latency(health, max(elapsed, health.ewma_latency or 0.0))
+        health.probe_in_flight = False
+
+    def release_probe(self, url: str) -> None:
+        """Give back a claimed half-open probe that never reached the agent.
+
+        Used when the call was rejected or cancelled before it was sent, so
+        no outcome will be recorded for it.
+        """
+        health = self._agents.get(url)
+        if health is not None:
+            health.probe_in_flight = False
+
+    def allow(self, url: str) -> bool:
+        """Whether ``url`` may be called now (claims the half-open probe)."""
+        health = self.get(url)
+        if health.state is CircuitState.CLOSED:
+            return True
+        if health.state is CircuitState.OPEN:
+            if time.monotonic() - health.opened_at < self.open_seconds:
+                return False
+            health.state = CircuitState.HALF_OPEN
+        if health.probe_in_flight:
+            return False
+        health.probe_in_flight = True
+        return True
+
+    def would_allow(self, url: str) -> bool:
+        """Like :meth:`allow`, but without claiming the half-open probe."""
+        health = self._agents.get(url)
+        if health is None or health.state is CircuitState.CLOSED:
+            return True
+        if (
+            health.state is CircuitState.OPEN
+            and time.monotonic() - health.opened_at < self.open_seconds
+        ):
+            return False
+        return not health.probe_in_flight
+
+    def success_rate(self, url: str) -> float | None:
+        """Recent success rate (1 - EWMA error), ``None`` before any call."""
+        health = self._agents.get(url)
+        if health is None or health.samples == 0:
+            return None
+        return 1 - health.ewma_error
+
+    def effective_score(self, url: str, registry_score: float) -> float:
+        """Registry score discounted by error rate and observed latency."""
+        health = self._agents.get(url)
+        if health is None:
+            return registry_score
+        latency_factor = 1.0
+        if health.ewma_latency is not None:
+            latency_factor = self.latency_ref / (self.latency_ref + health.ewma_latency)
+        return registry_score * (1 - health.ewma_error) * latency_factor
+
+    def rank(self, candidates: Sequence[Any], k: int) -> list[Any]:
+        """Pick up to ``k`` callable candidates by health-adjusted score.
+
+        ``candidates`` are registry items exposing ``url`` and ``score``. If
+        every circuit is open the best-scored candidate is still returned, so
+        the fan-out never ends up empty.
+        """
+        ordered = sorted(
+            candidates,
+            key=lambda c: self.effective_score(c.url, c.score),
+            reverse=True,
+        )
+        chosen = []
+        for item in ordered:
+            if len(chosen) >= k:
+                break
+            if self.allow(item.url):
+                chosen.append(item)
+        if not chosen and ordered:
+            chosen.append(ordered[0])
+        return chosen
+
+    def snapshot(self) -> list[dict]:
+        rows = []
+        for health in self._agents.values():
+            row = asdict(health)
+            row['state'] = health.state.value
+            row['ewma_latency'] = (
+                round(health.ewma_latency, 3) if health.ewma_latency is not None else None
+            )
+            row['ewma_error'] = round(health.ewma_error, 4)
+            row.pop('opened_at')
+            rows.append(row)
+        return rows
@@ -0,0 +1,294 @@
+"""Token-budgeted aggregation of the answers returned by a fan-out.
+
+With top-k fan-out several agents often return nearly the same listings. The
+answers are split into units (paragraphs and top-level list items together
+with their nested lines), units that nearly duplicate one kept from another
+agent are removed with word-shingle MinHash, the remaining
+units are picked round-robin in registry-score order until the token budget
+is spent, and the result is rendered per agent. Markdown links are never cut
+in half: a unit that has to be truncated keeps its links.
+"""
+
+import os
+import random
+import re
+
+from dataclasses import dataclass, field
+
+from history_compaction import CHARS_PER_TOKEN
+
+
+SEPARATOR = '\n\n---\n\n'
+
+_LINK_RE = re.compile(r'\[[^\]]*\]\([^)\s]+\)|https?://\S+')
+_LIST_ITEM_RE = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+')
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+_URL_QUERY_RE = re.compile(r'[?#][^)\s]*')
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+@dataclass
+class AggregationConfig:
+    enabled: bool = True
+    token_budget: int = 1500
+    dedup_threshold: float = 0.8
+    shingle_size: int = 3
+    num_perm: int = 32
+    min_truncate_tokens: int = 40
+
+    @classmethod
+    def from_env(cls) -> 'AggregationConfig':
+        return cls(
+            enabled=os.getenv('AGGREGATION_ENABLED', 'true').lower()
+            in ('1', 'true', 'yes'),
+            token_budget=int(os.getenv('AGGREGATION_TOKEN_BUDGET', 1500)),
+            dedup_threshold=float(os.getenv('AGGREGATION_DEDUP_THRESHOLD', 0.8)),
+            shingle_size=int(os.getenv('AGGREGATION_SHINGLE_SIZE', 3)),
+            num_perm=int(os.getenv('AGGREGATION_NUM_PERM', 32)),
+        )
+
+
+@dataclass
+class AggregationStats:
+    calls: int = 0
+    units_in: int = 0
+    duplicates_removed: int = 0
+    truncated_units: int = 0
+    dropped_units: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    last: dict = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'units_in': self.units_in,
+            'duplicates_removed': self.duplicates_removed,
+            'truncated_units': self.truncated_units,
+            'dropped_units': self.dropped_units,
+            'tokens_in': self.tokens_in,
+            'tokens_out': self.tokens_out,
+            'last': self.last,
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def split_blocks(text: str) -> list[tuple[int, str]]:
+    """Split Markdown into ``(paragraph index, unit)`` pairs.
+
+    Each top-level list item is its own unit and keeps its indented lines
+    (nested items, ``- Price: ...`` details) with it.
+    """
+    units: list[tuple[int, str]] = []
+    for block_idx, block in enumerate(re.split(r'\n\s*\n', text.strip())):
+        lines = block.splitlines()
+        item_indents = [_indent(line) for line in lines if _LIST_ITEM_RE.match(line)]
+        top = min(item_indents) if item_indents else 0
+        current: list[str] = []
+        for line in lines:
+            if _LIST_ITEM_RE.match(line) and _indent(line) <= top and current:
+                units.append((block_idx, '\n'.join(current)))
+                current = []
+            current.append(line)
+        if current:
+            units.append((block_idx, '\n'.join(current)))
+    return [(idx, u.rstrip()) for idx, u in units if u.strip()]
+
+
+def split_units(text: str) -> list[str]:
+    """Split Markdown into paragraphs and top-level list items."""
+    return [unit for _, unit in split_blocks(text)]
+
+
+def join_units(units: list[tuple[int, str]]) -> str:
+    """Inverse of :func:`split_blocks`: list items of one paragraph stay tight."""
+    parts: list[str] = []
+    previous = None
+    for block_idx, unit in units:
+        if parts:
+            parts.append('\n' if block_idx == previous else '\n\n')
+        parts.append(unit)
+        previous = block_idx
+    return ''.join(parts)
+
+
+def shingles(text: str, size: int) -> set[str]:
+    # 去掉链接的查询参数：不同 agent 给同一房源的链接常常只差跟踪参数
+    words = _WORD_RE.findall(_URL_QUERY_RE.sub(' ', text).lower())
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures over string shingles (universal hashing mod 2^61-1)."""
+
+    def __init__(self, num_perm: int = 32, seed: int = 1):
+        rng = random.Random(seed)
+        self.params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, items: set[str]) -> tuple[int, ...]:
+        if not items:
+            return ()
+        hashes = [hash(item) & _MAX_HASH for item in items]
+        return tuple(
+            min([(a * h + b) % _MERSENNE_PRIME for h in hashes]) for a, b in self.params
+        )
+
+    @staticmethod
+    def similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+        if not sig_a or not sig_b:
+            return 0.0
+        return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def truncate_keeping_links(text: str, max_chars: int) -> str:
+    """Cut ``text`` to about ``max_chars`` without breaking Markdown links.
+
+    Links from the cut-off tail are appended, so the reader can still follow
+    every source the unit referenced.
+    """
+    if len(text) <= max_chars:
+        return text
+    cut = max_chars
+    for match in _LINK_RE.finditer(text):
+        if match.start() < cut < match.end():
+            cut = match.start()
+            break
+    space = text.rfind(' ', 0, cut)
+    if space > cut // 2:
+        cut = space
+    head = text[:cut].rstrip()
+    tail_links = [m.group(0) for m in _LINK_RE.finditer(text, cut)]
+    suffix = ' …' + (' ' + ' '.join(tail_links) if tail_links else '')
+    return head + suffix
+
+
+class Aggregator:
+    """Deduplicates, ranks and budget-truncates per-agent answers."""
+
+    def __init__(self, config: AggregationConfig | None = None):
+        self.config = config or AggregationConfig()
+        self.hasher = MinHasher(self.config.num_perm)
+        self.stats = AggregationStats()
+
+    def _is_duplicate(
+        self,
+        sig: tuple[int, ...],
+        items: set[str],
+        agent_idx: int,
+        kept: list[tuple[int, tuple[int, ...], set[str]]],
+    ) -> bool:
+        threshold = self.config.dedup_threshold
+        for other_agent, other_sig, other_items in kept:
+            # 只和其他 agent 已保留的单元比较：同一回答内相似的条目（如两个
+            # 房源都有 "Price: $120 per night"）是不同的内容
+            if other_agent == agent_idx:
+                continue
+            # MinHash 估计做初筛，命中后用精确 Jaccard 复核，避免误删相近但不同的房源
+            if self.hasher.similarity(sig, other_sig) >= threshold - 0.1:
+                union = len(items | other_items)
+                if union and len(items & other_items) / union >= threshold:
+                    return True
+        return False
+
+    def aggregate(self, answers: list[tuple[str, str, float]]) -> str:
+        """Combine ``(agent_name, text, registry_score)`` answers into one text."""
+        config = self.config
+        if not config.enabled or not answers:
+            return SEPARATOR.join(text.strip() for _, text, _ in answers)
+
+        ordered = sorted(
+            enumerate(answers), key=lambda item: (-item[1][2], item[0])
+        )
+
+        # 1️⃣ 拆分并跨 agent 去重：高分 agent 的单元优先保留
+        kept: list[tuple[int, tuple[int, ...], set[str]]] = []
+        per_agent: list[tuple[str, list[tuple[int, str]]]] = []
+        units_in = duplicates = tokens_in = 0
+        for agent_idx, (_, (name, text, _score)) in enumerate(ordered):
+            tokens_in += estimate_tokens(text)
+            units = []
+            for block_idx, unit in split_blocks(text):
+                units_in += 1
+                items = shingles(unit, config.shingle_size)
+                sig = self.hasher.signature(items)
+                if sig and self._is_duplicate(sig, items, agent_idx, kept):
+                    duplicates += 1
+                    continue
+                if sig:
+                    kept.append((agent_idx, sig, items))
+                units.append((block_idx, unit))
+            per_agent.append((name, units))
+
+        # 2️⃣ 按分数轮询选取单元，直到预算耗尽
+        budget = config.token_budget
+        chosen: dict[tuple[int, int], str] = {}
+        truncated = 0
+        exhausted = False
+        depth = max((len(units) for _, units in per_agent), default=0)
+        for position in range(depth):
+            for agent_idx, (_, units) in enumerate(per_agent):
+                if exhausted or position >= len(units):
+                    continue
+                _, unit = units[position]
+                cost = estimate_tokens(unit) + 1
+                if cost <= budget:
+                    chosen[(agent_idx, position)] = unit
+                    budget -= cost
+                elif budget >= config.min_truncate_tokens:
+                    chosen[(agent_idx, position)] = truncate_keeping_links(
+                        unit, budget * CHARS_PER_TOKEN
+                    )
+                    truncated += 1
+                    budget = 0
+                    exhausted = True
+                else:
+                    exhausted = True
+        total_units = sum(len(units) for _, units in per_agent)
+        dropped = total_units - len(chosen)
+
+        # 3️⃣ 按 agent 输出，保持各自原有顺序
+        sections = []
+        for agent_idx, (_, units) in enumerate(per_agent):
+            body = [
+                (units[pos][0], chosen[(agent_idx, pos)])
+                for pos in range(len(units))
+                if (agent_idx, pos) in chosen
+            ]
+            if body:
+                sections.append(join_units(body))
+        if dropped:
+            sections.append(
+                f'({dropped} more item(s) omitted to stay within the answer budget)'
+            )
+        final_text = SEPARATOR.join(sections)
+
+        tokens_out = estimate_tokens(final_text)
+        self.stats.calls += 1
+        self.stats.units_in += units_in
+        self.stats.duplicates_removed += duplicates
+        self.stats.truncated_units += truncated
+        self.stats.dropped_units += dropped
+        self.stats.tokens_in += tokens_in
+        self.stats.tokens_out += tokens_out
+        self.stats.last = {
+            'agents': len(answers),
+            'units': units_in,
+            'duplicates': duplicates,
+            'dropped': dropped,
+            'tokens_in': tokens_in,
+            'tokens_out': tokens_out,
+        }
+        return final_text
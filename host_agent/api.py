@@ -0,0 +1,155 @@
+"""Headless HTTP API for the routing agent.
+
+``POST /api/chat`` runs one turn and streams its events as Server-Sent
+Events (``event: <type>`` / ``data: <json>``), ending with ``event: done``.
+The body is ``{"message": ..., "session_id": ...}``; without a session id a
+new one is generated and announced in the first ``session`` event and the
+``X-Session-Id`` header. Turns of different sessions run concurrently, turns
+of one session are serialized.
+
+``GET /api/health`` and ``GET /api/debug`` expose liveness and routing stats;
+``GET /api/ready`` answers 503 until the startup warm-up has found a
+responding agent for every keyword.
+:func:`stream_remote_turn` is the matching client, used by the Gradio UI when
+it runs as a separate process.
+"""
+
+import asyncio
+import json
+import re
+import uuid
+
+from collections.abc import AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager
+from typing import Any
+
+import httpx
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from turns import TurnRunner
+
+
+KEEPALIVE_SECONDS = 15.0
+_SESSION_ID_RE = re.compile(r'^[A-Za-z0-9_.:\-]{1,128}$')
+
+
+class ChatRequest(BaseModel):
+    message: str = Field(min_length=1)
+    session_id: str | None = None
+
+
+def sse_event(event: dict[str, Any]) -> str:
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    return f"event: {event.get('type', 'message')}\ndata: {data}\n\n"
+
+
+async def _with_keepalive(
+    events: AsyncIterator[dict[str, Any]], interval: float
+) -> AsyncIterator[str]:
+    """Serialize ``events`` as SSE, sending comment pings while idle.
+
+    Long remote agent calls can leave the stream silent for a while; the
+    pings keep proxies and load balancers from closing the connection.
+    """
+    pending: asyncio.Future | None = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(events.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield ': keep-alive\n\n'
+                continue
+            try:
+                event = pending.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+            yield sse_event(event)
+        yield sse_event({'type': 'done'})
+    finally:
+        # 客户端断开：取消正在进行的回合，释放会话锁
+        if pending is not None and not pending.done():
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration):
+                pass
+        await events.aclose()
+
+
+def _json_response(payload: Any, status_code: int = 200) -> Response:
+    return Response(
+        json.dumps(payload, ensure_ascii=False, default=str),
+        status_code=status_code,
+        media_type='application/json',
+    )
+
+
+def create_api(
+    turns: TurnRunner,
+    debug: Callable[[], dict] | None = None,
+    readiness: Callable[[], dict] | None = None,
+    lifespan: Callable[[FastAPI], AbstractAsyncContextManager] | None = None,
+    keepalive: float = KEEPALIVE_SECONDS,
+) -> FastAPI:
+    """Build the ASGI app; the Gradio UI can be mounted on it afterwards."""
+    app = FastAPI(title='A2A Host Agent API', lifespan=lifespan)
+
+    @app.post('/api/chat')
+    async def chat(body: ChatRequest) -> StreamingResponse:
+        session_id = body.session_id or f'api-{uuid.uuid4().hex}'
+        if not _SESSION_ID_RE.match(session_id):
+            raise HTTPException(status_code=400, detail='Invalid session_id.')
+        return StreamingResponse(
+            _with_keepalive(turns.run_turn(body.message, session_id), keepalive),
+            media_type='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no',
+                'X-Session-Id': session_id,
+            },
+        )
+
+    @app.get('/api/health')
+    async def health() -> Response:
+        ready = readiness() if readiness is not None else {'status': 'ready'}
+        return _json_response({'status': 'ok', 'readiness': ready['status'], **turns.stats()})
+
+    @app.get('/api/ready')
+    async def ready() -> Response:
+        # 未启用预热时视为就绪
+        state = readiness() if readiness is not None else {'status': 'ready'}
+        return _json_response(state, 200 if state['status'] == 'ready' else 503)
+
+    @app.get('/api/debug')
+    async def debug_snapshot() -> Response:
+        return _json_response(debug() if debug is not None else {})
+
+    return app
+
+
+async def stream_remote_turn(
+    client: httpx.AsyncClient, api_url: str, message: str, session_id: str
+) -> AsyncIterator[dict[str, Any]]:
+    """Run a turn on a remote host API and yield its events (minus ``done``)."""
+    async with client.stream(
+        'POST',
+        f"{api_url.rstrip('/')}/api/chat",
+        json={'message': message, 'session_id': session_id},
+        headers={'Accept': 'text/event-stream'},
+    ) as response:
+        response.raise_for_status()
+        data_lines: list[str] = []
+        async for line in response.aiter_lines():
+            if line.startswith('data:'):
+                data_lines.append(line[5:].lstrip())
+            elif not line and data_lines:
+                event = json.loads('\n'.join(data_lines))
+                data_lines = []
+                if event.get('type') == 'done':
+                    return
+                yield event
@@ -0,0 +1,137 @@
+"""Small in-process caching primitives shared by the host routing layer."""
+
+import asyncio
+import re
+import time
+
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case and collapse whitespace so trivially different tasks match."""
+    return _WHITESPACE.sub(' ', (text or '').strip().lower())
+
+
+class TTLCache:
+    """A size-bounded LRU mapping whose entries expire after ``ttl`` seconds.
+
+    ``ttl`` may be overridden per entry in :meth:`set`.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def keys(self) -> list[Hashable]:
+        return list(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one in-flight awaitable.
+
+    The first caller runs ``fn``; callers arriving while it is pending await
+    the same future and receive the same result (or exception). If the
+    leader is cancelled, followers that were not cancelled themselves retry,
+    and one of them becomes the new leader.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+        self.leader_cancelled = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while (future := self._inflight.get(key)) is not None:
+            self.shared += 1
+            try:
+                # shield: 一个等待者被取消不应取消其他人共享的请求
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                current = asyncio.current_task()
+                if not future.cancelled() or current is None or current.cancelling():
+                    raise
+                # 领头的调用被取消（例如其用户断开），本调用未被取消：重新发起
+                self.leader_cancelled += 1
+
+        self.calls += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+                # 没有其他等待者时避免 "exception was never retrieved"
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            'calls': self.calls,
+            'shared': self.shared,
+            'leader_cancelled': self.leader_cancelled,
+            'inflight': len(self._inflight),
+        }
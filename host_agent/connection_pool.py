@@ -0,0 +1,173 @@
+"""Process-wide HTTP connection pool for host -> remote agent traffic."""
+
+import asyncio
+import os
+
+import httpx
+
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_PER_HOST = 10
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _PerOriginTransport(httpx.AsyncBaseTransport):
+    """Routes each request to a transport of its own origin (scheme, host, port).
+
+    httpx's ``Limits`` apply to a whole connection pool, so a single pool
+    cannot cap keep-alive connections per host; one pool per origin can.
+    """
+
+    def __init__(self, factory) -> None:
+        self._factory = factory
+        self._transports: dict[tuple, httpx.AsyncHTTPTransport] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        origin = (request.url.scheme, request.url.host, request.url.port)
+        transport = self._transports.get(origin)
+        if transport is None:
+            transport = self._factory()
+            self._transports[origin] = transport
+        return await transport.handle_async_request(request)
+
+    @property
+    def origins(self) -> int:
+        return len(self._transports)
+
+    async def aclose(self) -> None:
+        transports, self._transports = self._transports, {}
+        for transport in transports.values():
+            await transport.aclose()
+
+
+class SharedHttpPool:
+    """Owns the httpx clients shared by every RemoteAgentConnections.
+
+    One ``httpx.AsyncClient`` is kept per event loop (Gradio and the bootstrap
+    code run on different loops, and pooled sockets cannot cross loops);
+    clients of loops that have since closed are dropped. Inside a client each
+    origin gets its own connection pool, so ``max_connections`` and
+    ``max_keepalive_per_host`` are per-host limits. Idle keep-alive
+    connections are evicted after ``keepalive_expiry`` seconds.
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_per_host: int = DEFAULT_MAX_KEEPALIVE_PER_HOST,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        http2: bool = False,
+    ):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive_per_host = max_keepalive_per_host
+        self.keepalive_expiry = keepalive_expiry
+        if http2 and not _http2_available():
+            print(
+                '[HttpPool] ⚠️ HOST_HTTP2 requested but `h2` is not installed; '
+                'falling back to HTTP/1.1.'
+            )
+            http2 = False
+        self.http2 = http2
+        self._clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._transports: dict[asyncio.AbstractEventLoop, _PerOriginTransport] = {}
+
+    @classmethod
+    def from_env(cls) -> 'SharedHttpPool':
+        """Build a pool configured from HOST_HTTP_* environment variables."""
+        return cls(
+            timeout=float(os.getenv('HOST_HTTP_TIMEOUT', DEFAULT_TIMEOUT)),
+            max_connections=int(
+                os.getenv('HOST_HTTP_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)
+            ),
+            max_keepalive_per_host=int(
+                os.getenv(
+                    'HOST_HTTP_MAX_KEEPALIVE_PER_HOST',
+                    DEFAULT_MAX_KEEPALIVE_PER_HOST,
+                )
+            ),
+            keepalive_expiry=float(
+                os.getenv('HOST_HTTP_KEEPALIVE_EXPIRY', DEFAULT_KEEPALIVE_EXPIRY)
+            ),
+            http2=_env_flag('HOST_HTTP2'),
+        )
+
+    def _build_transport(self) -> httpx.AsyncHTTPTransport:
+        # httpx 的 Limits 是按整个连接池计算的，所以每个 origin 单独一个池，
+        # 这里的上限即每个 host 的上限；HTTP/2 时单个连接即可多路复用。
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_per_host,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        return httpx.AsyncHTTPTransport(limits=limits, http2=self.http2)
+
+    def _build_client(self, loop: asyncio.AbstractEventLoop) -> httpx.AsyncClient:
+        transport = _PerOriginTransport(self._build_transport)
+        self._transports[loop] = transport
+        return httpx.AsyncClient(timeout=self.timeout, transport=transport, trust_env=False)
+
+    def _prune_closed_loops(self) -> None:
+        # 已关闭的事件循环上的 client 无法再使用，也无法在其上 aclose，直接丢弃
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            del self._clients[loop]
+            self._transports.pop(loop, None)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the client bound to the running event loop, creating it lazily."""
+        loop = asyncio.get_running_loop()
+        cli = self._clients.get(loop)
+        if cli is None or cli.is_closed:
+            self._prune_closed_loops()
+            cli = self._build_client(loop)
+            self._clients[loop] = cli
+        return cli
+
+    def stats(self) -> dict:
+        self._prune_closed_loops()
+        return {
+            'clients': len(self._clients),
+            'origins': sum(t.origins for t in self._transports.values()),
+            'http2': self.http2,
+            'max_connections': self.max_connections,
+            'max_keepalive_per_host': self.max_keepalive_per_host,
+            'keepalive_expiry': self.keepalive_expiry,
+        }
+
+    async def aclose(self) -> None:
+        """Close every pooled client. Safe to call more than once."""
+        clients, self._clients = self._clients, {}
+        self._transports = {}
+        for loop, cli in clients.items():
+            if loop.is_closed():
+                continue
+            try:
+                if loop.is_running() and loop is not asyncio.get_running_loop():
+                    # 该 client 属于另一个仍在运行的事件循环（如 Gradio 的线程）
+                    future = asyncio.run_coroutine_threadsafe(cli.aclose(), loop)
+                    await asyncio.wrap_future(future)
+                else:
+                    await cli.aclose()
+            except Exception as e:
+                print(f'[HttpPool] ⚠️ Failed to close pooled client: {e}')
+
+
+SHARED_POOL = SharedHttpPool.from_env()
@@ -0,0 +1,131 @@
+"""Completion policies for concurrent host -> agent fan-out."""
+
+import asyncio
+import os
+import time
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any
+
+
+class CompletionPolicy(str, Enum):
+    """When a fan-out is considered complete.
+
+    - ``all``:           wait for every candidate (bounded by the deadline).
+    - ``first_success``: return as soon as one candidate succeeds.
+    - ``best_of``:       collect until the deadline, keep the best ``n``
+                         successes by candidate rank.
+    - ``quorum``:        return once ``quorum`` candidates have succeeded.
+    """
+
+    ALL = 'all'
+    FIRST_SUCCESS = 'first_success'
+    BEST_OF = 'best_of'
+    QUORUM = 'quorum'
+
+
+@dataclass
+class FanoutConfig:
+    policy: CompletionPolicy = CompletionPolicy.ALL
+    deadline: float = 30.0
+    quorum: int = 2
+    best_of: int = 1
+
+    @classmethod
+    def from_env(cls) -> 'FanoutConfig':
+        return cls(
+            policy=CompletionPolicy(
+                os.getenv('FANOUT_POLICY', CompletionPolicy.ALL.value).lower()
+            ),
+            deadline=float(os.getenv('FANOUT_DEADLINE_SEC', 30.0)),
+            quorum=int(os.getenv('FANOUT_QUORUM', 2)),
+            best_of=int(os.getenv('FANOUT_BEST_OF', 1)),
+        )
+
+
+@dataclass
+class FanoutResult:
+    """Outcome of a fan-out, in candidate (rank) order."""
+
+    results: list[tuple[str, Any]] = field(default_factory=list)
+    cancelled: list[str] = field(default_factory=list)
+    timed_out: bool = False
+    elapsed: float = 0.0
+
+
+async def fan_out(
+    calls: list[tuple[str, Callable[[], Awaitable[Any]]]],
+    is_success: Callable[[Any], bool],
+    config: FanoutConfig,
+) -> FanoutResult:
+    """Run ``calls`` concurrently and stop according to ``config.policy``.
+
+    Args:
+        calls: ``(key, factory)`` pairs ordered by candidate rank; each factory
+            returns the awaitable for one remote call.
+        is_success: decides whether a completed call counts towards the policy.
+        config: completion policy, deadline and quorum/best-of sizes.
+
+    Unfinished calls are cancelled when the policy is satisfied or the deadline
+    expires; whatever completed by then is returned as a partial result.
+    Calls are tracked by position, so duplicate keys each keep their result.
+    """
+    start = time.monotonic()
+    tasks = {
+        asyncio.ensure_future(factory()): i for i, (_, factory) in enumerate(calls)
+    }
+    if config.policy is CompletionPolicy.FIRST_SUCCESS:
+        needed = 1
+    elif config.policy is CompletionPolicy.QUORUM:
+        needed = max(1, min(config.quorum, len(calls)))
+    else:
+        needed = None  # all / best_of 等待全部或截止时间
+
+    done_results: dict[int, Any] = {}
+    successes = 0
+    pending = set(tasks)
+    timed_out = False
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + config.deadline
+
+    try:
+        while pending:
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                timed_out = True
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                timed_out = True
+                break
+            for task in done:
+                try:
+                    result = task.result()
+                except Exception as e:
+                    result = {'error': str(e)}
+                done_results[tasks[task]] = result
+                if is_success(result):
+                    successes += 1
+            if needed is not None and successes >= needed:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    results = [(calls[i][0], done_results[i]) for i in sorted(done_results)]
+    if config.policy is CompletionPolicy.BEST_OF:
+        best = [kv for kv in results if is_success(kv[1])][: max(1, config.best_of)]
+        results = best or results
+
+    return FanoutResult(
+        results=results,
+        cancelled=[calls[i][0] for i in sorted(tasks[t] for t in pending)],
+        timed_out=timed_out,
+        elapsed=round(time.monotonic() - start, 3),
+    )
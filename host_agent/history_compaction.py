@@ -0,0 +1,173 @@
+"""Prompt-history compaction for the Routing_agent's model requests.
+
+The host session keeps every tool call and the full aggregated agent output,
+so each Gemini request grows with the conversation. Before every model call
+the request contents are rewritten: the last ``keep_turns`` user turns stay
+verbatim, older tool responses and long model texts are replaced by short
+summaries, and if the estimate is still above ``token_budget`` the oldest
+turns are dropped. The session itself is never modified.
+"""
+
+import json
+import os
+
+from dataclasses import dataclass, field
+
+from google.genai import types
+
+
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class CompactionConfig:
+    enabled: bool = True
+    keep_turns: int = 3
+    token_budget: int = 6000
+    summary_chars: int = 240
+
+    @classmethod
+    def from_env(cls) -> 'CompactionConfig':
+        return cls(
+            enabled=os.getenv('HISTORY_COMPACTION', 'true').lower()
+            in ('1', 'true', 'yes'),
+            keep_turns=int(os.getenv('HISTORY_KEEP_TURNS', 3)),
+            token_budget=int(os.getenv('HISTORY_TOKEN_BUDGET', 6000)),
+            summary_chars=int(os.getenv('HISTORY_SUMMARY_CHARS', 240)),
+        )
+
+
+@dataclass
+class CompactionStats:
+    requests: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+    summarized_parts: int = 0
+    dropped_turns: int = 0
+    last: dict = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            'requests': self.requests,
+            'tokens_before': self.tokens_before,
+            'tokens_after': self.tokens_after,
+            'summarized_parts': self.summarized_parts,
+            'dropped_turns': self.dropped_turns,
+            'last': self.last,
+        }
+
+
+def _part_chars(part: types.Part) -> int:
+    if part.text:
+        return len(part.text)
+    if part.function_call:
+        return len(json.dumps(part.function_call.args or {}, ensure_ascii=False, default=str))
+    if part.function_response:
+        return len(
+            json.dumps(part.function_response.response or {}, ensure_ascii=False, default=str)
+        )
+    return 0
+
+
+def estimate_tokens(contents: list[types.Content]) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    chars = sum(_part_chars(p) for c in contents for p in (c.parts or []))
+    return chars // CHARS_PER_TOKEN
+
+
+def _is_user_turn_start(content: types.Content) -> bool:
+    return content.role == 'user' and any(
+        p.text and not p.function_response for p in (content.parts or [])
+    )
+
+
+def split_turns(contents: list[types.Content]) -> list[list[types.Content]]:
+    """Group contents into turns, each starting at a user text message."""
+    turns: list[list[types.Content]] = []
+    for content in contents:
+        if not turns or _is_user_turn_start(content):
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = ' '.join(text.split())
+    return text if len(text) <= limit else text[:limit].rstrip() + '…'
+
+
+def _summarize_part(part: types.Part, limit: int) -> tuple[types.Part, bool]:
+    if part.function_response:
+        response = part.function_response.response or {}
+        raw = response.get('result', response) if isinstance(response, dict) else response
+        raw = raw if isinstance(raw, str) else json.dumps(raw, ensure_ascii=False, default=str)
+        if len(raw) <= limit:
+            return part, False
+        return (
+            types.Part(
+                function_response=types.FunctionResponse(
+                    id=part.function_response.id,
+                    name=part.function_response.name,
+                    response={
+                        'summary': _shorten(raw, limit),
+                        'note': f'older tool output compacted ({len(raw)} chars)',
+                    },
+                )
+            ),
+            True,
+        )
+    if part.text and not part.thought and len(part.text) > limit:
+        return types.Part(text=_shorten(part.text, limit)), True
+    return part, False
+
+
+def compact_contents(
+    contents: list[types.Content],
+    config: CompactionConfig,
+    stats: CompactionStats | None = None,
+) -> list[types.Content]:
+    """Return a compacted copy of ``contents`` (the input is not modified)."""
+    turns = split_turns(contents)
+    if len(turns) <= config.keep_turns:
+        return contents
+
+    old, recent = turns[: -config.keep_turns], turns[-config.keep_turns :]
+    recent_flat = [c for turn in recent for c in turn]
+    budget_left = config.token_budget - estimate_tokens(recent_flat)
+
+    # 从最近的旧轮次往前摘要；超出预算时丢弃更早的整轮（保证 call/response 成对）
+    summarized = 0
+    kept_old: list[list[types.Content]] = []
+    for turn in reversed(old):
+        if budget_left <= 0:
+            break
+        new_turn = []
+        for content in turn:
+            new_parts = []
+            for part in content.parts or []:
+                new_part, changed = _summarize_part(part, config.summary_chars)
+                summarized += changed
+                new_parts.append(new_part)
+            new_turn.append(types.Content(role=content.role, parts=new_parts))
+        cost = estimate_tokens(new_turn)
+        if cost > budget_left:
+            break
+        kept_old.insert(0, new_turn)
+        budget_left -= cost
+    dropped = len(old) - len(kept_old)
+
+    result = [c for turn in kept_old for c in turn] + recent_flat
+    if stats is not None:
+        before, after = estimate_tokens(contents), estimate_tokens(result)
+        stats.requests += 1
+        stats.tokens_before += before
+        stats.tokens_after += after
+        stats.summarized_parts += summarized
+        stats.dropped_turns += dropped
+        stats.last = {
+            'turns': len(turns),
+            'tokens_before': before,
+            'tokens_after': after,
+            'dropped_turns': dropped,
+        }
+    return result
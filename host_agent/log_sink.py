@@ -0,0 +1,226 @@
+"""Non-blocking structured logging for the host request path.
+
+Callers enqueue records with :meth:`LogSink.log` (a ``put_nowait``, never
+blocking the event loop); a background thread batches them into a JSON-lines
+file with size/time based rotation and echoes selected levels to stdout.
+"""
+
+import atexit
+import datetime
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+from typing import Any
+
+
+LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+
+_STOP = object()
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize pydantic models (ADK events, A2A objects); stringify the rest."""
+    if hasattr(value, 'model_dump'):
+        try:
+            return value.model_dump(mode='json', exclude_none=True)
+        except Exception:
+            pass
+    return str(value)
+
+
+def _parse_rates(spec: str | None) -> dict[str, float]:
+    """Parse ``"debug=0.1,info=1"`` into per-level sampling rates."""
+    rates = {level: 1.0 for level in LEVELS}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            level, rate = item.split('=', 1)
+            rates[level.strip().lower()] = float(rate)
+    return rates
+
+
+class LogSink:
+    """Queue + background writer producing rotated JSON-lines logs."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 10 * 1024 * 1024,
+        rotate_seconds: float = 24 * 60 * 60,
+        backups: int = 5,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        sample_rates: dict[str, float] | None = None,
+        min_level: str = 'debug',
+        echo_level: str = 'info',
+        queue_size: int = 10000,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backups = backups
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_rates = sample_rates or {level: 1.0 for level in LEVELS}
+        self.min_level = LEVELS.get(min_level, 10)
+        self.echo_level = LEVELS.get(echo_level, 20)
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._opened_at = 0.0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.written = 0
+
+    @classmethod
+    def from_env(cls) -> 'LogSink':
+        return cls(
+            path=os.getenv('HOST_LOG_PATH', './logs/host_events.jsonl'),
+            max_bytes=int(os.getenv('HOST_LOG_MAX_BYTES', 10 * 1024 * 1024)),
+            rotate_seconds=float(os.getenv('HOST_LOG_ROTATE_SECONDS', 24 * 60 * 60)),
+            backups=int(os.getenv('HOST_LOG_BACKUPS', 5)),
+            sample_rates=_parse_rates(os.getenv('HOST_LOG_SAMPLING', 'debug=0.1')),
+            min_level=os.getenv('HOST_LOG_LEVEL', 'debug').lower(),
+            echo_level=os.getenv('HOST_LOG_ECHO_LEVEL', 'info').lower(),
+        )
+
+    # ---------- producer side (event loop) ----------
+    def log(self, event: str, level: str = 'info', **fields: Any) -> None:
+        """Enqueue one record; drops it (and counts) if the queue is full."""
+        levelno = LEVELS.get(level, 20)
+        if levelno < self.min_level:
+            return
+        rate = self.sample_rates.get(level, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            self.sampled_out += 1
+            return
+        self._ensure_started()
+        record = {'ts': time.time(), 'level': level, 'event': event, **fields}
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self.log(event, 'debug', **fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self.log(event, 'info', **fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self.log(event, 'warning', **fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self.log(event, 'error', **fields)
+
+    def stats(self) -> dict:
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'sampled_out': self.sampled_out,
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='host-log-sink', daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    # ---------- consumer side (writer thread) ----------
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                batch.append(item)
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if _STOP in batch:
+                batch = [r for r in batch if r is not _STOP]
+                stop = True
+            if batch:
+                self._write(batch)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._opened_at = time.time()
+
+    def _should_rotate(self) -> bool:
+        if self._file is None:
+            return False
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return bool(
+            self.rotate_seconds and time.time() - self._opened_at >= self.rotate_seconds
+        )
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        for i in range(self.backups - 1, 0, -1):
+            src, dst = f'{self.path}.{i}', f'{self.path}.{i + 1}'
+            if os.path.exists(src):
+                os.replace(src, dst)
+        if self.backups > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+
+    def _write(self, batch: list[dict]) -> None:
+        try:
+            if self._should_rotate():
+                self._rotate()
+            if self._file is None:
+                self._open()
+            lines = []
+            for record in batch:
+                lines.append(
+                    json.dumps(record, ensure_ascii=False, default=_json_default)
+                )
+                if LEVELS.get(record['level'], 20) >= self.echo_level:
+                    self._echo(record)
+            self._file.write('\n'.join(lines) + '\n')
+            self._file.flush()
+            self.written += len(batch)
+        except Exception as e:
+            print(f'[LOG ERROR] Failed to write log batch: {e}', file=sys.stderr)
+
+    @staticmethod
+    def _echo(record: dict) -> None:
+        stamp = datetime.datetime.fromtimestamp(record['ts']).strftime('%H:%M:%S')
+        extras = ' '.join(
+            f'{k}={str(v)[:120]}'
+            for k, v in record.items()
+            if k not in ('ts', 'level', 'event')
+        )
+        print(f"{stamp} [{record['level'].upper()}] {record['event']} {extras}")
+
+    def close(self) -> None:
+        """Flush pending records and stop the writer thread."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout=5)
+        self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+LOG_SINK = LogSink.from_env()
@@ -0,0 +1,219 @@
+"""Dependency-aware execution of a small plan of keyword tasks.
+
+A plan is a DAG of steps ``{"id", "keyword", "task", "depends_on"}``. Every
+step starts as soon as all of its dependencies have finished, so independent
+steps run concurrently. The results of the dependencies are passed into the
+dependent step's task: ``{step_id}`` placeholders are replaced by the
+dependency's answer, otherwise the answers are appended as context. If a
+step fails (``dispatch`` raises, e.g. :class:`StepFailed` when no agent
+answered), the steps that depend on it are skipped.
+
+The dispatch function is injected, so the executor can be driven by stub
+agents without any registry or network.
+"""
+
+import asyncio
+import re
+import time
+
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+
+Dispatch = Callable[[str, str], Awaitable[str]]
+OnEvent = Callable[[dict[str, Any]], None]
+
+_PLACEHOLDER_RE = re.compile(r'\{([A-Za-z0-9_\-]+)\}')
+
+
+class PlanError(ValueError):
+    """Raised for malformed plans (duplicate ids, unknown deps, cycles)."""
+
+
+class StepFailed(RuntimeError):
+    """Raised by a dispatch whose step produced no usable answer."""
+
+
+@dataclass
+class PlanStep:
+    id: str
+    keyword: str
+    task: str
+    depends_on: list[str] = field(default_factory=list)
+    index: int = 0  # position in the submitted plan
+
+
+@dataclass
+class StepResult:
+    id: str
+    keyword: str
+    task: str
+    status: str = 'pending'  # pending / running / done / failed / skipped
+    response: str | None = None
+    error: str | None = None
+    elapsed: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        row: dict[str, Any] = {
+            'id': self.id,
+            'keyword': self.keyword,
+            'task': self.task,
+            'status': self.status,
+            'elapsed': round(self.elapsed, 3),
+        }
+        if self.response is not None:
+            row['response'] = self.response
+        if self.error is not None:
+            row['error'] = self.error
+        return row
+
+
+def parse_plan(steps: list[dict]) -> list[PlanStep]:
+    """Validate raw step dicts and return them in topological order."""
+    plan: dict[str, PlanStep] = {}
+    for index, raw in enumerate(steps or []):
+        raw = raw or {}
+        step_id = str(raw.get('id') or f'step{index + 1}')
+        keyword, task = raw.get('keyword'), raw.get('task')
+        if not keyword or not task:
+            raise PlanError(f'Step {step_id!r} needs a keyword and a task.')
+        if step_id in plan:
+            raise PlanError(f'Duplicate step id {step_id!r}.')
+        depends_on = raw.get('depends_on') or []
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        plan[step_id] = PlanStep(
+            step_id, str(keyword), str(task), [str(d) for d in depends_on], index
+        )
+    if not plan:
+        raise PlanError('The plan has no steps.')
+
+    for step in plan.values():
+        for dep in step.depends_on:
+            if dep not in plan:
+                raise PlanError(f'Step {step.id!r} depends on unknown step {dep!r}.')
+
+    # Kahn 拓扑排序，顺便检测环
+    indegree = {sid: len(set(s.depends_on)) for sid, s in plan.items()}
+    ready = [sid for sid, deg in indegree.items() if deg == 0]
+    ordered: list[PlanStep] = []
+    while ready:
+        sid = ready.pop(0)
+        ordered.append(plan[sid])
+        for other in plan.values():
+            if sid in other.depends_on:
+                indegree[other.id] -= 1
+                if indegree[other.id] == 0:
+                    ready.append(other.id)
+    if len(ordered) != len(plan):
+        cyclic = sorted(sid for sid, deg in indegree.items() if deg > 0)
+        raise PlanError(f'The plan has a dependency cycle between {cyclic}.')
+    return ordered
+
+
+def render_task(step: PlanStep, results: dict[str, StepResult], max_chars: int) -> str:
+    """Fill dependency answers into the step's task text."""
+    def answer(dep: str) -> str:
+        text = (results[dep].response or '').strip()
+        return text if len(text) <= max_chars else text[:max_chars].rstrip() + '…'
+
+    used: set[str] = set()
+
+    def substitute(match: re.Match) -> str:
+        dep = match.group(1)
+        if dep in step.depends_on:
+            used.add(dep)
+            return answer(dep)
+        return match.group(0)
+
+    task = _PLACEHOLDER_RE.sub(substitute, step.task)
+    context = [
+        f'Result of {dep} ({results[dep].keyword}):\n{answer(dep)}'
+        for dep in step.depends_on
+        if dep not in used
+    ]
+    if context:
+        task = task + '\n\nContext from earlier steps:\n' + '\n\n'.join(context)
+    return task
+
+
+async def execute_plan(
+    steps: list[dict],
+    dispatch: Dispatch,
+    on_event: OnEvent | None = None,
+    max_concurrency: int | None = None,
+    context_chars: int = 1500,
+) -> list[StepResult]:
+    """Run the plan and return one :class:`StepResult` per step.
+
+    Results are in the order the steps were given, not execution order.
+
+    ``dispatch(keyword, task)`` performs one step; ``on_event`` receives a
+    ``plan_step`` event whenever a step changes status.
+    """
+    plan = parse_plan(steps)
+    results = {s.id: StepResult(s.id, s.keyword, s.task) for s in plan}
+    done_events = {s.id: asyncio.Event() for s in plan}
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+    started = time.monotonic()
+
+    def emit(result: StepResult) -> None:
+        if on_event is None:
+            return
+        on_event({
+            'type': 'plan_step',
+            'step': result.id,
+            'keyword': result.keyword,
+            'status': result.status,
+            'elapsed': round(result.elapsed, 3),
+            'error': result.error,
+            'total': len(plan),
+            'finished': sum(r.status in ('done', 'failed', 'skipped') for r in results.values()),
+        })
+
+    async def run_step(step: PlanStep) -> None:
+        result = results[step.id]
+        try:
+            for dep in step.depends_on:
+                await done_events[dep].wait()
+            failed = [d for d in step.depends_on if results[d].status != 'done']
+            if failed:
+                result.status = 'skipped'
+                result.error = f'dependency failed: {", ".join(failed)}'
+                emit(result)
+                return
+
+            result.task = render_task(step, results, context_chars)
+            if semaphore is not None:
+                await semaphore.acquire()
+            try:
+                result.status = 'running'
+                emit(result)
+                step_started = time.monotonic()
+                try:
+                    response = await dispatch(step.keyword, result.task)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    result.status = 'failed'
+                    result.error = f'{type(e).__name__}: {e}'
+                else:
+                    result.status = 'done'
+                    result.response = response if isinstance(response, str) else str(response)
+                result.elapsed = time.monotonic() - step_started
+                emit(result)
+            finally:
+                if semaphore is not None:
+                    semaphore.release()
+        finally:
+            done_events[step.id].set()
+
+    await asyncio.gather(*(run_step(step) for step in plan))
+    if on_event is not None:
+        on_event({
+            'type': 'plan_done',
+            'total': len(plan),
+            'failed': [r.id for r in results.values() if r.status != 'done'],
+            'elapsed': round(time.monotonic() - started, 3),
+        })
+    return [results[s.id] for s in sorted(plan, key=lambda s: s.index)]
@@ -0,0 +1,193 @@
+"""Local keyword classifier that can skip the routing LLM for obvious queries.
+
+A small TF-IDF model is trained on the remote agents' ``AgentSkill`` examples,
+tags and descriptions (mirrored below from each agent's agent card) plus the
+keyword descriptions of the routing instruction. Queries are scored by cosine
+similarity against one centroid per keyword; only confident, single-domain
+queries are dispatched directly. Place names inside the examples ("LA, CA",
+"Paris") are not learned as domain words.
+
+The host only consults the pre-router for the first turn of a session:
+follow-ups ("book it for 3 adults") depend on history it does not see.
+"""
+
+import math
+import os
+import re
+
+from collections import Counter
+from dataclasses import dataclass
+
+
+# Mirrors the AgentSkill / AgentCard data served by the remote agents.
+SKILL_CORPUS: dict[str, list[str]] = {
+    'Weather': [
+        # weather_agent/__main__.py
+        'Search weather',
+        'Helps with weather in city, or states',
+        'weather',
+        'weather in LA, CA',
+        'Helps with weather',
+        # root_instruction
+        'climate, temperature, or forecasts',
+        'forecast rain snow wind sunny temperature humidity degrees',
+    ],
+    'Accommodations': [
+        # airbnb_agent/__main__.py
+        'Search airbnb accommodation',
+        'Helps with accommodation search using airbnb',
+        'airbnb accommodation',
+        'Please find a room in LA, CA, April 15, 2025, checkout date is april 18, 2 adults',
+        'Helps with searching accommodation',
+        # root_instruction
+        'accommodation, rooms, stays, or booking requests',
+        'hotel apartment place to stay night check-in checkout guests adults book',
+    ],
+    'TripAdvisor': [
+        # tripadvisor_agent/__main__.py
+        'Search TripAdvisor',
+        'Helps with finding attractions, restaurants, and reviews on TripAdvisor',
+        'tripadvisor travel attractions restaurants',
+        'Find restaurants in Paris',
+        'Show me attractions near Times Square',
+        # root_instruction
+        'reviews, sightseeing, attractions, or travel planning',
+        'things to do museums tours food dining rated',
+    ],
+    'Location': [
+        'questions involving specific places, addresses, or geographic information',
+        'where is address coordinates map located distance geography',
+    ],
+    'Transport': [
+        'inquiries about transportation options, routes, schedules, or travel methods',
+        'train bus flight metro subway taxi route schedule get from to',
+    ],
+}
+
+_STOP_WORDS = frozenset(
+    'a an and are as at be by can do for from i in is it me my of on or '
+    'please show tell the there this to using what with you your'.split()
+)
+_TOKEN = re.compile(r'[a-z]+')
+_WORD = re.compile(r'[A-Za-z]+')
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for tok in _TOKEN.findall(text.lower()):
+        if tok in _STOP_WORDS or len(tok) < 2:
+            continue
+        # 极简词干：去掉复数 s
+        if len(tok) > 3 and tok.endswith('s') and not tok.endswith('ss'):
+            tok = tok[:-1]
+        tokens.append(tok)
+    return tokens
+
+
+def corpus_tokens(text: str) -> list[str]:
+    """Like :func:`tokenize`, minus capitalized words after the first one.
+
+    Those are place names in the skill examples; learning them would tie a
+    city to whichever agent's example happened to mention it.
+    """
+    words = _WORD.findall(text)
+    kept = [w for i, w in enumerate(words) if i == 0 or not w[0].isupper()]
+    return tokenize(' '.join(kept))
+
+
+@dataclass
+class Prediction:
+    keyword: str | None
+    confidence: float
+    margin: float
+    scores: dict[str, float]
+
+    @property
+    def dispatch(self) -> bool:
+        return self.keyword is not None
+
+
+class PreRouter:
+    """TF-IDF centroid classifier over the keyword set."""
+
+    def __init__(
+        self,
+        corpus: dict[str, list[str]] | None = None,
+        threshold: float = 0.2,
+        min_margin: float = 0.1,
+        min_tokens: int = 2,
+    ):
+        self.threshold = threshold
+        self.min_margin = min_margin
+        # 过短的消息多为追问/确认（如 "2 adults"），缺乏上下文，交给 LLM
+        self.min_tokens = min_tokens
+        corpus = corpus or SKILL_CORPUS
+        docs = {
+            kw: Counter(tok for text in texts for tok in corpus_tokens(text))
+            for kw, texts in corpus.items()
+        }
+        n_docs = len(docs)
+        df = Counter(tok for counts in docs.values() for tok in counts)
+        self.idf = {
+            tok: math.log((1 + n_docs) / (1 + freq)) + 1.0 for tok, freq in df.items()
+        }
+        # 只出现在一个关键词语料里的词：查询同时含有两个领域的这类词即视为跨领域
+        self.exclusive = {
+            tok: kw for kw, counts in docs.items() for tok in counts if df[tok] == 1
+        }
+        self.centroids = {kw: self._vectorize(counts) for kw, counts in docs.items()}
+
+    @classmethod
+    def from_env(cls) -> 'PreRouter':
+        return cls(
+            threshold=float(os.getenv('PRE_ROUTER_THRESHOLD', 0.2)),
+            min_margin=float(os.getenv('PRE_ROUTER_MIN_MARGIN', 0.1)),
+            min_tokens=int(os.getenv('PRE_ROUTER_MIN_TOKENS', 2)),
+        )
+
+    def _vectorize(self, counts: Counter) -> dict[str, float]:
+        vec = {
+            tok: (1 + math.log(tf)) * self.idf[tok]
+            for tok, tf in counts.items()
+            if tok in self.idf
+        }
+        norm = math.sqrt(sum(v * v for v in vec.values()))
+        return {tok: v / norm for tok, v in vec.items()} if norm else {}
+
+    def scores(self, text: str) -> dict[str, float]:
+        query = self._vectorize(Counter(tokenize(text)))
+        return {
+            kw: sum(w * centroid.get(tok, 0.0) for tok, w in query.items())
+            for kw, centroid in self.centroids.items()
+        }
+
+    def domains(self, text: str) -> set[str]:
+        """Keywords the query names with a word specific to that keyword."""
+        return {self.exclusive[tok] for tok in tokenize(text) if tok in self.exclusive}
+
+    def predict(self, text: str) -> Prediction:
+        """Return the keyword to dispatch to, or ``keyword=None`` to defer.
+
+        Queries that span several domains (domain-specific words of more
+        than one keyword, or a runner-up that also clears the threshold) are
+        left to the LLM, which can batch them, as are very short messages
+        that are most likely follow-ups.
+        """
+        scores = self.scores(text)
+        n_tokens = len(tokenize(text))
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        (best, top), (_, second) = ranked[0], ranked[1]
+        margin = top - second
+        confident = (
+            n_tokens >= self.min_tokens
+            and top >= self.threshold
+            and margin >= self.min_margin
+            and second < self.threshold
+            and not self.domains(text) - {best}
+        )
+        return Prediction(
+            keyword=best if confident else None,
+            confidence=round(top, 4),
+            margin=round(margin, 4),
+            scores={kw: round(v, 4) for kw, v in ranked},
+        )
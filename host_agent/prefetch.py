@@ -0,0 +1,332 @@
+"""Opt-in speculative prefetch of related domains for the same destination.
+
+A user who asks about accommodations in a city usually asks about the
+weather and attractions there next. After a trigger request succeeds, the
+prefetcher extracts the destination (and dates) from its task, renders the
+generic task for each related keyword (``TASK_TEMPLATES``) and dispatches it
+in the background through the normal path, so the answer lands in the host
+response cache under that exact task. :func:`template_instructions` tells
+the routing model to phrase generic follow-ups the same way, so they hit the
+cache; any other wording (a specific question, other dates, no dates) is a
+different cache key and goes to the agent. A follow-up that arrives while
+its prefetch is still running waits for it instead of calling the agent
+twice.
+
+Prefetching is low priority: it starts after a short delay, is capped by
+``max_inflight`` (extra requests are skipped, never queued) and every
+prefetch is cancelled once it exceeds ``timeout`` seconds.
+"""
+
+import asyncio
+import contextvars
+import os
+import re
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from cache import TTLCache, normalize_text
+
+
+Dispatch = Callable[[str, str], Awaitable[str]]
+CacheRead = Callable[[str, str], Awaitable[str | None]]
+
+# 后台预取任务内为 True，防止预取再触发预取
+_PREFETCHING: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    'prefetching', default=False
+)
+
+DEFAULT_RELATED: dict[str, list[str]] = {
+    'accommodations': ['Weather', 'TripAdvisor'],
+}
+
+TASK_TEMPLATES: dict[str, str] = {
+    'weather': 'What is the weather forecast for {destination}{dates}?',
+    'tripadvisor': 'What are the top attractions and things to do in {destination}{dates}?',
+    'location': 'Give an overview of the main areas and landmarks of {destination}.',
+    'transport': 'What are the transportation options to get around {destination}{dates}?',
+}
+
+
+def render_template(keyword: str, destination: str, dates: tuple[str, ...]) -> str | None:
+    """The synthesized prefetch task for ``keyword``, or ``None`` without a template."""
+    template = TASK_TEMPLATES.get(normalize_text(keyword))
+    if template is None:
+        return None
+    date_text = f' from {dates[0]} to {dates[-1]}' if len(dates) > 1 else (
+        f' on {dates[0]}' if dates else ''
+    )
+    return template.format(destination=destination, dates=date_text)
+
+
+def template_instructions(keywords: list[str] | None = None) -> str:
+    """Prompt lines asking the model to send generic questions in template form."""
+    lines = []
+    for keyword in dict.fromkeys(keywords if keywords is not None else TASK_TEMPLATES):
+        template = TASK_TEMPLATES.get(normalize_text(keyword))
+        if template is None:
+            continue
+        example = template.format(
+            destination='<destination>', dates='[ on <date> | from <start> to <end>]'
+        )
+        lines.append(f'  - `"{keyword}"` → "{example}"')
+    return '\n'.join(lines)
+
+
+_MONTHS = (
+    'january|february|march|april|may|june|july|august|september|october|'
+    'november|december|jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec'
+)
+_NOT_PLACES = set(_MONTHS.split('|')) | {
+    'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday',
+    'sunday', 'the', 'a', 'an', 'my', 'our', 'i', 'we',
+}
+# 节日等以大写开头但不是地名的短语
+_NOT_PLACE_PHRASES = {
+    'new year', "new year's", "new year's eve", 'christmas', 'christmas eve',
+    'easter', 'thanksgiving', 'halloween', 'labor day', 'memorial day',
+    'independence day', 'spring break', 'the weekend',
+}
+# "for" 后面常是人数、场合或日期，只在没有其他介词给出地名时才采用
+_WEAK_PREPOSITIONS = {'for'}
+# 缩写（D.C.、U.K.）整体作为一个词，避免截成 "Washington D"
+_PLACE_WORD = r"(?:[A-Z]\.(?:[A-Z]\.)+|[A-Z][\w'\-]*\.?)"
+_ABBREVIATION_RE = re.compile(r'(?:[A-Z]\.){2,}$')
+_DESTINATION_RE = re.compile(
+    r'\b(in|to|at|near|around|visiting|visit|for)\s+'
+    rf"({_PLACE_WORD}(?:\s+(?:{_PLACE_WORD}|de|del|la|le|of))*"
+    rf"(?:,\s*{_PLACE_WORD}(?:\s+{_PLACE_WORD})*)?)"
+)
+_DATE_RE = re.compile(
+    r'\b\d{4}-\d{2}-\d{2}\b'
+    r'|\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b'
+    rf'|\b(?:{_MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s*\d{{4}})?\b',
+    re.IGNORECASE,
+)
+
+
+def _clean_place(candidate: str) -> str | None:
+    candidate = candidate.strip(' ,')
+    if candidate.endswith('.') and not _ABBREVIATION_RE.search(candidate):
+        candidate = candidate[:-1]
+    lowered = candidate.lower()
+    if lowered in _NOT_PLACE_PHRASES or lowered.split()[0].strip('.') in _NOT_PLACES:
+        return None
+    return candidate
+
+
+def extract_destination(task: str) -> tuple[str, tuple[str, ...]] | None:
+    """Return ``(destination, dates)`` mentioned in ``task``, if any."""
+    destination = fallback = None
+    for match in _DESTINATION_RE.finditer(task or ''):
+        candidate = _clean_place(match.group(2))
+        if candidate is None:
+            continue
+        if match.group(1).lower() not in _WEAK_PREPOSITIONS:
+            destination = candidate
+            break
+        fallback = fallback or candidate
+    destination = destination or fallback
+    if destination is None:
+        return None
+    dates = tuple(normalize_text(d) for d in _DATE_RE.findall(task))
+    return destination, dates
+
+
+@dataclass
+class PrefetchConfig:
+    enabled: bool = False
+    related: dict[str, list[str]] = field(default_factory=lambda: dict(DEFAULT_RELATED))
+    max_inflight: int = 2
+    timeout: float = 20.0
+    delay: float = 0.5
+    index_ttl: float = 30 * 60
+    index_size: int = 512
+
+    @classmethod
+    def from_env(cls) -> 'PrefetchConfig':
+        related = dict(DEFAULT_RELATED)
+        spec = os.getenv('PREFETCH_RELATED')  # "Accommodations=Weather+TripAdvisor"
+        if spec:
+            related = {}
+            for item in spec.split(','):
+                if '=' in item:
+                    trigger, targets = item.split('=', 1)
+                    related[normalize_text(trigger)] = [
+                        t.strip() for t in targets.split('+') if t.strip()
+                    ]
+        return cls(
+            enabled=os.getenv('PREFETCH_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+            related=related,
+            max_inflight=int(os.getenv('PREFETCH_MAX_INFLIGHT', 2)),
+            timeout=float(os.getenv('PREFETCH_TIMEOUT', 20)),
+            delay=float(os.getenv('PREFETCH_DELAY', 0.5)),
+            index_ttl=float(os.getenv('PREFETCH_INDEX_TTL', 30 * 60)),
+        )
+
+
+@dataclass
+class _Entry:
+    key: tuple[str, str]
+    task: str
+    job: asyncio.Task | None = None
+    used: bool = False
+
+
+class Prefetcher:
+    """Schedules background warm-up requests and tracks whether they are used.
+
+    The answers themselves live in the response cache; the index only maps
+    ``(keyword, task)`` of recent prefetches to their job and usage.
+    """
+
+    def __init__(
+        self,
+        config: PrefetchConfig,
+        dispatch: Dispatch,
+        cache_read: CacheRead,
+        ttl_for: Callable[[str], float] | None = None,
+    ):
+        self.config = config
+        self._dispatch = dispatch
+        self._cache_read = cache_read
+        self._ttl_for = ttl_for
+        self._index = TTLCache(maxsize=config.index_size, ttl=config.index_ttl)
+        self._jobs: set[asyncio.Task] = set()
+        self.counters = {
+            'scheduled': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'skipped_budget': 0,
+            'lookups': 0,
+            'hits': 0,
+            'useful': 0,
+            'joined_inflight': 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    def schedule(self, keyword: str, task: str) -> int:
+        """Warm the keywords related to ``keyword`` for the task's destination.
+
+        Returns the number of prefetches started.
+        """
+        if not self.config.enabled or _PREFETCHING.get():
+            return 0
+        targets = self.config.related.get(normalize_text(keyword))
+        extracted = extract_destination(task) if targets else None
+        if not extracted:
+            return 0
+        destination, dates = extracted
+        started = 0
+        for target in targets:
+            prefetch_task = render_template(target, destination, dates)
+            if prefetch_task is None:
+                continue
+            key = self._key(target, prefetch_task)
+            if self._index.get(key) is not None:
+                continue
+            if len(self._jobs) >= self.config.max_inflight:
+                self.counters['skipped_budget'] += 1
+                continue
+            entry = _Entry(key=key, task=prefetch_task)
+            entry.job = asyncio.create_task(self._run(target, entry))
+            self._jobs.add(entry.job)
+            entry.job.add_done_callback(self._jobs.discard)
+            ttl = self.config.index_ttl
+            if self._ttl_for is not None:
+                ttl = min(ttl, self._ttl_for(target))
+            self._index.set(key, entry, ttl=ttl)
+            self.counters['scheduled'] += 1
+            started += 1
+        return started
+
+    async def _run(self, keyword: str, entry: _Entry) -> bool:
+        _PREFETCHING.set(True)
+        try:
+            await asyncio.sleep(self.config.delay)
+            await asyncio.wait_for(self._dispatch(keyword, entry.task), self.config.timeout)
+        except asyncio.TimeoutError:
+            # 超出取消预算：放弃该预取，允许之后重新调度
+            self.counters['cancelled'] += 1
+            self._index.pop(entry.key)
+            return False
+        except asyncio.CancelledError:
+            self.counters['cancelled'] += 1
+            self._index.pop(entry.key)
+            raise
+        except Exception:
+            self.counters['failed'] += 1
+            self._index.pop(entry.key)
+            return False
+        self.counters['completed'] += 1
+        return True
+
+    @staticmethod
+    def _key(keyword: str, task: str) -> tuple[str, str]:
+        return normalize_text(keyword), normalize_text(task)
+
+    def _tracked(self, keyword: str) -> bool:
+        return (
+            self.config.enabled
+            and not _PREFETCHING.get()
+            and normalize_text(keyword) in TASK_TEMPLATES
+        )
+
+    def _mark_used(self, entry: _Entry) -> None:
+        self.counters['hits'] += 1
+        if not entry.used:
+            entry.used = True
+            self.counters['useful'] += 1
+
+    def record_cache_hit(self, keyword: str, task: str) -> None:
+        """Count a response-cache hit; it is a prefetch hit if a prefetch wrote it."""
+        if not self._tracked(keyword):
+            return
+        self.counters['lookups'] += 1
+        entry: _Entry | None = self._index.get(self._key(keyword, task))
+        if entry is not None and entry.job is not None and entry.job.done():
+            self._mark_used(entry)
+
+    async def lookup(self, keyword: str, task: str) -> str | None:
+        """After a response-cache miss, wait for a running prefetch of the same task.
+
+        Returns its answer, or ``None`` when no such prefetch is in flight or
+        it did not produce one.
+        """
+        if not self._tracked(keyword):
+            return None
+        self.counters['lookups'] += 1
+        entry: _Entry | None = self._index.get(self._key(keyword, task))
+        if entry is None or entry.job is None or entry.job.done():
+            return None
+        self.counters['joined_inflight'] += 1
+        try:
+            if not await asyncio.shield(entry.job):
+                return None
+        except asyncio.CancelledError:
+            if entry.job.cancelled():
+                return None
+            raise
+        value = await self._cache_read(keyword, entry.task)
+        if value is not None:
+            self._mark_used(entry)
+        return value
+
+    def stats(self) -> dict:
+        counters = dict(self.counters)
+        lookups, completed = counters['lookups'], counters['completed']
+        # 对可预取 keyword 的请求中，由预取结果应答的比例
+        counters['hit_rate'] = round(counters['hits'] / lookups, 4) if lookups else 0.0
+        # 预取结果中至少被使用过一次的比例（其余为浪费的远端调用）
+        counters['useful_rate'] = round(counters['useful'] / completed, 4) if completed else 0.0
+        return {'enabled': self.config.enabled, 'inflight': len(self._jobs), **counters}
+
+    async def aclose(self) -> None:
+        for job in list(self._jobs):
+            job.cancel()
+        if self._jobs:
+            await asyncio.gather(*self._jobs, return_exceptions=True)
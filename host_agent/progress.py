@@ -0,0 +1,54 @@
+"""Per-session side channel for progress published from inside tool calls.
+
+ADK tools can only return a final value, so incremental output (streamed
+agent chunks, plan progress, ...) is published here and drained by the UI
+generator that is running the same session.
+"""
+
+import asyncio
+
+from typing import Any
+
+
+class ProgressBus:
+    """Fan progress events out to the subscribers of a session."""
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    def subscribe(self, session_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.maxsize)
+        self._subscribers.setdefault(session_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, session_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(session_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[session_id]
+
+    def has_subscribers(self, session_id: str | None) -> bool:
+        return bool(session_id and self._subscribers.get(session_id))
+
+    def publish(self, session_id: str | None, event: dict[str, Any]) -> None:
+        """Deliver ``event`` to every subscriber; slow subscribers drop events."""
+        if not session_id:
+            return
+        for queue in self._subscribers.get(session_id, ()):
+            try:
+                queue.put_nowait(('progress', event))
+            except asyncio.QueueFull:
+                pass
+
+
+def session_id_of(tool_context: Any) -> str | None:
+    """Best-effort lookup of the ADK session id behind a ToolContext."""
+    invocation = getattr(tool_context, '_invocation_context', None)
+    session = getattr(invocation, 'session', None)
+    return getattr(session, 'id', None)
+
+
+PROGRESS_BUS = ProgressBus()
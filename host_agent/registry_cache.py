@@ -0,0 +1,73 @@
+"""Candidate-list cache in front of the registry lookup."""
+
+import os
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from cache import SingleFlight, TTLCache, normalize_text
+
+
+DEFAULT_TTL = 60.0
+DEFAULT_MAXSIZE = 512
+
+
+class RegistryCache:
+    """TTL + LRU cache of registry candidates with singleflight loading.
+
+    Entries are keyed by ``(keyword, normalized task, top_k)``. Concurrent
+    misses for the same key share a single registry round trip.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, maxsize: int = DEFAULT_MAXSIZE):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._flight = SingleFlight()
+
+    @classmethod
+    def from_env(cls) -> 'RegistryCache':
+        return cls(
+            ttl=float(os.getenv('REGISTRY_CACHE_TTL', DEFAULT_TTL)),
+            maxsize=int(os.getenv('REGISTRY_CACHE_SIZE', DEFAULT_MAXSIZE)),
+        )
+
+    @staticmethod
+    def make_key(keyword: str, task: str, top_k: int) -> tuple[str, str, int]:
+        return (normalize_text(keyword), normalize_text(task), top_k)
+
+    async def get_or_load(
+        self,
+        keyword: str,
+        task: str,
+        top_k: int,
+        loader: Callable[[], Awaitable[list[Any]]],
+    ) -> list[Any]:
+        """Return cached candidates, calling ``loader`` at most once per miss."""
+        key = self.make_key(keyword, task, top_k)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        async def _load() -> list[Any]:
+            candidates = await loader()
+            # 空结果不缓存，下次仍然回源
+            if candidates:
+                self._cache.set(key, list(candidates))
+            return candidates
+
+        return list(await self._flight.do(key, _load))
+
+    def invalidate(self, keyword: str, task: str, top_k: int) -> None:
+        self._cache.pop(self.make_key(keyword, task, top_k))
+
+    def invalidate_keyword(self, keyword: str) -> None:
+        """Drop every cached lookup for ``keyword`` (its registry family changed)."""
+        family = normalize_text(keyword)
+        for key in self._cache.keys():
+            if key[0] == family:
+                self._cache.pop(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), 'singleflight': self._flight.stats()}
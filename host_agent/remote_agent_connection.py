@@ -1,16 +1,19 @@
-from collections.abc import Callable
+from collections.abc import AsyncIterator, Callable
 
 import httpx
 
-from a2a.client import A2AClient
+from a2a.client import A2ACardResolver, A2AClient
 from a2a.types import (
     AgentCard,
     SendMessageRequest,
     SendMessageResponse,
+    SendStreamingMessageRequest,
+    SendStreamingMessageResponse,
     Task,
     TaskArtifactUpdateEvent,
     TaskStatusUpdateEvent,
 )
+from connection_pool import SHARED_POOL
 from dotenv import load_dotenv
 
 
@@ -21,16 +24,34 @@ TaskUpdateCallback = Callable[[TaskCallbackArg, AgentCard], Task]
 
 
 class RemoteAgentConnections:
-    """A class to hold the connections to the remote agents."""
-
-    def __init__(self, agent_card: AgentCard, agent_url: str):
-        print(f'agent_card: {agent_card}')
-        print(f'agent_url: {agent_url}')
-        self._httpx_client = httpx.AsyncClient(timeout=30)
-        self.agent_client = A2AClient(
-            self._httpx_client, agent_card, url=agent_url
-        )
+    """A class to hold the connections to the remote agents.
+
+    By default every connection borrows the process-wide ``SHARED_POOL`` so
+    keep-alive sockets are reused across agents; pass ``httpx_client`` to use
+    a dedicated client instead (it is then owned and closed by this object).
+    """
+
+    def __init__(
+        self,
+        agent_card: AgentCard,
+        agent_url: str,
+        httpx_client: httpx.AsyncClient | None = None,
+    ):
         self.card = agent_card
+        self.agent_url = agent_url
+        self._own_client = httpx_client
+        self._agent_client: A2AClient | None = None
+        self._bound_client: httpx.AsyncClient | None = None
+
+    @property
+    def agent_client(self) -> A2AClient:
+        httpx_client = self._own_client or SHARED_POOL.client
+        if self._agent_client is None or self._bound_client is not httpx_client:
+            self._agent_client = A2AClient(
+                httpx_client, self.card, url=self.agent_url
+            )
+            self._bound_client = httpx_client
+        return self._agent_client
 
     def get_agent(self) -> AgentCard:
         return self.card
@@ -39,3 +60,29 @@ class RemoteAgentConnections:
         self, message_request: SendMessageRequest
     ) -> SendMessageResponse:
         return await self.agent_client.send_message(message_request)
+
+    async def send_message_streaming(
+        self, message_request: SendStreamingMessageRequest
+    ) -> AsyncIterator[SendStreamingMessageResponse]:
+        """Yield the agent's SSE events (Task / status / artifact updates)."""
+        async for chunk in self.agent_client.send_message_streaming(
+            message_request
+        ):
+            yield chunk
+
+    async def probe(self) -> AgentCard:
+        """Fetch the agent card over the pooled client.
+
+        Used as a lightweight health probe; it also opens a keep-alive
+        connection to the agent in the shared pool.
+        """
+        resolver = A2ACardResolver(
+            httpx_client=self._own_client or SHARED_POOL.client,
+            base_url=self.agent_url,
+        )
+        return await resolver.get_agent_card()
+
+    async def aclose(self) -> None:
+        """Close a dedicated client; the shared pool is closed by its owner."""
+        if self._own_client is not None:
+            await self._own_client.aclose()
@@ -0,0 +1,186 @@
+"""Host-side cache of aggregated remote agent answers."""
+
+import asyncio
+import contextlib
+import contextvars
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+from cache import TTLCache, normalize_text
+
+
+# 各领域答案的有效期（秒）；天气变化快，地点信息基本不变
+DEFAULT_KEYWORD_TTLS: dict[str, float] = {
+    'weather': 30 * 60,
+    'accommodations': 10 * 60,
+    'tripadvisor': 60 * 60,
+    'location': 24 * 60 * 60,
+    'transport': 10 * 60,
+}
+
+_BYPASS: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    'response_cache_bypass', default=False
+)
+
+
+def _parse_ttls(spec: str | None) -> dict[str, float]:
+    """Parse ``"Weather=1800,Accommodations=600"`` into a TTL mapping."""
+    ttls = dict(DEFAULT_KEYWORD_TTLS)
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        keyword, seconds = item.split('=', 1)
+        ttls[normalize_text(keyword)] = float(seconds)
+    return ttls
+
+
+class _SqliteStore:
+    """Tiny persistent key/value store with per-entry expiry."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 读写在线程池中执行，共用一个连接，用锁串行化
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS response_cache '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'DELETE FROM response_cache WHERE expires_at <= ?', (time.time(),)
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM response_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+                self._conn.commit()
+                return None
+            return row[0], row[1]
+
+    def set(self, key: str, value: str, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO response_cache (key, value, expires_at) '
+                'VALUES (?, ?, ?)',
+                (key, value, expires_at),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """Caches final answers keyed by keyword, normalized task and date bucket.
+
+    The date bucket (today's date) keeps time-sensitive answers such as
+    "weather tomorrow" from being served on a later day. Entries live in an
+    in-memory LRU and, if ``db_path`` is set, in a SQLite file so they survive
+    restarts.
+    """
+
+    def __init__(
+        self,
+        ttls: dict[str, float] | None = None,
+        default_ttl: float = 5 * 60,
+        maxsize: int = 1024,
+        db_path: str | None = None,
+        enabled: bool = True,
+    ):
+        self.ttls = dict(DEFAULT_KEYWORD_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self._memory = TTLCache(maxsize=maxsize, ttl=default_ttl)
+        self._disk = _SqliteStore(db_path) if db_path else None
+        self.disk_hits = 0
+        self.bypassed = 0
+
+    @classmethod
+    def from_env(cls) -> 'ResponseCache':
+        return cls(
+            ttls=_parse_ttls(os.getenv('RESPONSE_CACHE_TTLS')),
+            default_ttl=float(os.getenv('RESPONSE_CACHE_DEFAULT_TTL', 5 * 60)),
+            maxsize=int(os.getenv('RESPONSE_CACHE_SIZE', 1024)),
+            db_path=os.getenv('RESPONSE_CACHE_DB') or None,
+            enabled=os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower()
+            in ('1', 'true', 'yes'),
+        )
+
+    @staticmethod
+    @contextlib.contextmanager
+    def bypass():
+        """Skip cache reads for calls made inside this block."""
+        token = _BYPASS.set(True)
+        try:
+            yield
+        finally:
+            _BYPASS.reset(token)
+
+    def ttl_for(self, keyword: str) -> float:
+        return self.ttls.get(normalize_text(keyword), self.default_ttl)
+
+    @staticmethod
+    def make_key(keyword: str, task: str, day: datetime.date | None = None) -> str:
+        day = day or datetime.date.today()
+        return f'{normalize_text(keyword)}|{day.isoformat()}|{normalize_text(task)}'
+
+    def readable(self, bypass: bool = False) -> bool:
+        if not self.enabled:
+            return False
+        if bypass or _BYPASS.get():
+            self.bypassed += 1
+            return False
+        return True
+
+    async def get(self, keyword: str, task: str) -> str | None:
+        key = self.make_key(keyword, task)
+        value = self._memory.get(key)
+        if value is not None or self._disk is None:
+            return value
+        row = await asyncio.to_thread(self._disk.get, key)
+        if row is None:
+            return None
+        value, expires_at = row
+        self.disk_hits += 1
+        self._memory.set(key, value, ttl=expires_at - time.time())
+        return value
+
+    async def set(self, keyword: str, task: str, value: str) -> None:
+        if not self.enabled or not value:
+            return
+        ttl = self.ttl_for(keyword)
+        if ttl <= 0:
+            return
+        key = self.make_key(keyword, task)
+        self._memory.set(key, value, ttl=ttl)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, key, value, time.time() + ttl)
+
+    def clear(self) -> None:
+        self._memory.clear()
+
+    def stats(self) -> dict:
+        return {
+            'enabled': self.enabled,
+            **self._memory.stats(),
+            'disk': self._disk is not None,
+            'disk_hits': self.disk_hits,
+            'bypassed': self.bypassed,
+        }
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
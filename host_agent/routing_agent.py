@@ -1,8 +1,10 @@
 # pylint: disable=logging-fstring-interpolation
 import asyncio
+import functools
 import json
 import os
 import sys
+import time
 import uuid
 from google.genai import types
 from typing import Any
@@ -12,18 +14,46 @@ from types import SimpleNamespace
 from a2a.client import A2ACardResolver
 from a2a.types import (
     AgentCard,
+    JSONRPCErrorResponse,
     MessageSendParams,
     Part,
     SendMessageRequest,
     SendMessageResponse,
     SendMessageSuccessResponse,
+    SendStreamingMessageRequest,
     Task,
+    TaskArtifactUpdateEvent,
+    TaskStatusUpdateEvent,
 )
 from dotenv import load_dotenv
 from google.adk import Agent
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.models import LlmRequest, LlmResponse
 from google.adk.tools.tool_context import ToolContext
+from admission import (
+    BUSY_MESSAGE,
+    PRIORITY_BACKGROUND,
+    AdmissionController,
+    AdmissionRejected,
+    admission_priority,
+    current_priority,
+)
+from adaptive_topk import AdaptiveTopK, TopKConfig
+from aggregation import Aggregator, AggregationConfig
+from agent_health import HealthTracker
+from cache import SingleFlight, normalize_text
+from connection_pool import SHARED_POOL
+from fanout import FanoutConfig, fan_out
+from history_compaction import CompactionConfig, CompactionStats, compact_contents
+from log_sink import LOG_SINK
+from plan_executor import Dispatch, PlanError, StepFailed, execute_plan as run_plan
+from pre_router import PreRouter
+from prefetch import PrefetchConfig, Prefetcher, template_instructions
+from progress import PROGRESS_BUS, session_id_of
+from registry_cache import RegistryCache
+from response_cache import ResponseCache
+from warmup import Readiness, WarmupConfig, run_warmup
 from remote_agent_connection import (
     RemoteAgentConnections,
     TaskUpdateCallback,
@@ -32,9 +62,11 @@ from a2a.types import Task, Message, Part, TextPart
 load_dotenv()
 from google import genai
 try:
+    from airbnb_planner_multiagent.routing.affinity import pick_replicas
     from airbnb_planner_multiagent.routing.routing_agent import RoutingAgent as routing
 except ImportError:
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    from routing.affinity import pick_replicas
     from routing.routing_agent import RoutingAgent as routing
 
 def convert_part(part: Part, tool_context: ToolContext):
@@ -53,6 +85,16 @@ def convert_parts(parts: list[Part], tool_context: ToolContext):
     return rval
 
 
+def parts_text(parts: list[Part] | None) -> str:
+    """Concatenate the text of A2A parts, ignoring non-text parts."""
+    texts = []
+    for p in parts or []:
+        text = getattr(getattr(p, 'root', p), 'text', None)
+        if text:
+            texts.append(text)
+    return ''.join(texts)
+
+
 def create_send_message_payload(
     text: str, task_id: str | None = None, context_id: str | None = None
 ) -> dict[str, Any]:
@@ -83,18 +125,75 @@ class RoutingAgent:
         task_callback: TaskUpdateCallback | None = None,
     ):
         self.task_callback = task_callback
+        # url -> connection；同一 URL 只建立一次连接
         self.remote_agent_connections: dict[str, RemoteAgentConnections] = {}
+        # agent_name -> 最近一次解析到的 url
+        self.agent_urls: dict[str, str] = {}
         self.cards: dict[str, AgentCard] = {}
         self.agents: str = ''
+        self.registry_router = routing()
+        self.registry_cache = RegistryCache.from_env()
+        if self.registry_router.watcher is not None:
+            # 订阅到某个家族变化时，丢弃该家族的缓存候选
+            self.registry_router.watcher.add_listener(self.registry_cache.invalidate_keyword)
+        self.response_cache = ResponseCache.from_env()
+        self.fanout_config = FanoutConfig.from_env()
+        # 出站调用准入控制：全局/单 agent 并发上限 + 有界优先级等待队列
+        self.admission = AdmissionController.from_env()
+        # 并发的相同 (keyword, task) 请求共享一次 fan-out
+        self.coalesce = os.getenv('DISPATCH_COALESCE', 'true').lower() in ('1', 'true', 'yes')
+        # 远端不保留会话状态的 keyword：任何轮次都可跨会话合并
+        self.shared_keywords = {
+            normalize_text(k)
+            for k in os.getenv('DISPATCH_SHARED_KEYWORDS', '').split(',')
+            if k.strip()
+        }
+        self.dispatch_flight = SingleFlight()
+        # 同一 agent 有多个副本时，按 contextId 做 rendezvous hashing 固定副本
+        self.sticky_routing = os.getenv('STICKY_ROUTING', 'true').lower() in ('1', 'true', 'yes')
+        self.coalesce_stats = {'saved_fanouts': 0, 'saved_agent_calls': 0, 'cross_session': 0}
+        # 投机预取：住宿请求成功后，后台预热同一目的地的天气/景点
+        self.prefetcher = Prefetcher(
+            PrefetchConfig.from_env(),
+            dispatch=self._prefetch_dispatch,
+            cache_read=self.response_cache.get,
+            ttl_for=self.response_cache.ttl_for,
+        )
+        # 本地预路由：置信度足够时跳过路由 LLM 调用（默认关闭）
+        self.pre_router = (
+            PreRouter.from_env()
+            if os.getenv('PRE_ROUTER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+            else None
+        )
+        self.pre_router_stats = {'seen': 0, 'dispatched': 0, 'skipped_history': 0}
+        self.compaction = CompactionConfig.from_env()
+        self.compaction_stats = CompactionStats()
+        self.aggregator = Aggregator(AggregationConfig.from_env())
+        # 计划执行器：可注入 dispatch(keyword, task)，便于用桩 agent 测试
+        self.plan_dispatch: Dispatch | None = None
+        self.plan_max_concurrency = int(os.getenv('PLAN_MAX_CONCURRENCY', 4))
+        self.health = HealthTracker.from_env()
+        self.health_overfetch = max(1, int(os.getenv('HEALTH_OVERFETCH', 2)))
+        # 按请求自适应选择 fan-out 的 agent 数量（TOPK_MIN..TOPK_MAX）
+        self.topk = AdaptiveTopK(TopKConfig.from_env(), self.health)
+        # 远端 agent 卡片均声明 streaming=True，默认走 A2A 流式调用
+        self.streaming = os.getenv('A2A_STREAMING', 'true').lower() in ('1', 'true', 'yes')
+        # 启动预热进度（/api/ready 据此判断是否可以接流量）
+        self.readiness = Readiness()
 
     async def _async_init_components(
         self,
         remote_agent_addresses: list[str],
         agent_names: list[str],
     ) -> None:
-        """Initialize connections to remote agents (no card fetching, use agent names)."""
+        """Initialize connections to remote agents (no card fetching).
+
+        Connections are keyed by URL, so each agent URL gets exactly one
+        connection no matter how often the registry returns it. All of them
+        share the pooled transport from ``connection_pool.SHARED_POOL``.
+        """
         for agent_name, address in zip(agent_names, remote_agent_addresses):
-            if agent_name in self.remote_agent_connections:
+            if address in self.remote_agent_connections:
                 continue
             try:
                 # 创建 RemoteAgentConnections 实例（不读取 agent card）
@@ -102,20 +201,86 @@ class RoutingAgent:
                     agent_card=None,  # 不加载
                     agent_url=address
                 )
+                self.remote_agent_connections[address] = remote_connection
+                self.agent_urls[agent_name] = address
 
-                # 用 agent_name 作为 key（替代原来的 URL）
-                self.remote_agent_connections[agent_name] = remote_connection
-
-                print(f"[RoutingAgent] 🔗 Connected (no-card) to {agent_name} @ {address}")
+                LOG_SINK.info("agent_connected", agent=agent_name, url=address)
 
             except Exception as e:
-                print(f"[RoutingAgent] ❌ Failed to connect to {agent_name} @ {address}: {e}")
+                LOG_SINK.error("agent_connect_failed", agent=agent_name, url=address, error=str(e))
 
         # 记录连接信息（仅作调试用途）
         self.agents = "\n".join(
-            [f"{{'name': '{name}', 'url': '{url}'}}" for name, url in zip(agent_names, remote_agent_addresses)]
+            [f"{{'name': '{name}', 'url': '{url}'}}" for name, url in self.agent_urls.items()]
         )
 
+    async def warm_up(self, config: WarmupConfig) -> Readiness:
+        """Resolve every keyword, open connections and probe the candidates.
+
+        The lookups bypass the registry cache: it is keyed by the task text,
+        which warm-up cannot know, so only the connections and the probe
+        results carry over to real requests. An agent that fails its probe
+        is reported to the health tracker right away.
+        """
+        fetch_k = self.topk.config.max_k * self.health_overfetch
+
+        async def resolve(keyword: str) -> list[Any]:
+            return await self.registry_router.resolve_candidates(keyword, keyword, fetch_k)
+
+        async def connect(candidates: list[Any]) -> None:
+            await self._async_init_components(
+                [c.url for c in candidates], [c.name for c in candidates]
+            )
+
+        async def probe(candidate: Any) -> None:
+            try:
+                await self.remote_agent_connections[candidate.url].probe()
+            except Exception:
+                self.health.record_failure(candidate.url, name=candidate.name)
+                raise
+
+        LOG_SINK.info("warmup_start", keywords=config.keywords)
+        await run_warmup(config, resolve, connect, probe, self.readiness)
+        LOG_SINK.info("warmup_done", **self.readiness.as_dict())
+        return self.readiness
+
+    def debug_snapshot(self) -> dict[str, Any]:
+        """Routing internals for the debug endpoint."""
+        return {
+            'readiness': self.readiness.as_dict(),
+            'agent_health': self.health.snapshot(),
+            'registry_cache': self.registry_cache.stats(),
+            'registry_client': (
+                self.registry_router.registry.stats()
+                if self.registry_router.registry is not None
+                else None
+            ),
+            'registry_watch': (
+                self.registry_router.watcher.stats()
+                if self.registry_router.watcher is not None
+                else None
+            ),
+            'pre_router': self.pre_router_stats,
+            'response_cache': self.response_cache.stats(),
+            'prefetch': self.prefetcher.stats(),
+            'coalescing': {**self.dispatch_flight.stats(), **self.coalesce_stats},
+            'admission': self.admission.stats(),
+            'adaptive_topk': self.topk.stats(),
+            'history_compaction': self.compaction_stats.as_dict(),
+            'aggregation': self.aggregator.stats.as_dict(),
+            'http_pool': SHARED_POOL.stats(),
+            'log_sink': LOG_SINK.stats(),
+        }
+
+    async def aclose(self) -> None:
+        """Release remote connections and the shared HTTP pool."""
+        await self.prefetcher.aclose()
+        for connection in self.remote_agent_connections.values():
+            await connection.aclose()
+        self.remote_agent_connections.clear()
+        await self.registry_router.aclose()
+        await SHARED_POOL.aclose()
+        self.response_cache.close()
 
     @classmethod
     async def create(
@@ -141,18 +306,33 @@ class RoutingAgent:
             ),
             tools=[
                 self.send_message,
+                self.send_batch_message,
+                self.execute_plan,
             ],
         )
 
     def root_instruction(self, context: ReadonlyContext) -> str:
         """Generate the root instruction for the RoutingAgent."""
         current_agent = self.check_active_agent(context)
+        generic_tasks = ''
+        if self.prefetcher.enabled:
+            # 通用追问按预取模板措辞，才能命中预取写入的响应缓存
+            targets = [k for ks in self.prefetcher.config.related.values() for k in ks]
+            generic_tasks = (
+                '* **Generic Questions:** When the user asks a general question about a '
+                'destination for one of these keywords, write the task exactly in this form '
+                '(include the dates only if the user gave them); write specific questions '
+                'in your own words:\n'
+                + template_instructions(targets)
+            )
         return f"""
         **Role:** You are an expert Routing Delegator. Your primary function is to accurately delegate user inquiries regarding Weather, Accommodations,TripAdvisor,Location or Transport searches to the appropriate specialized remote agents.
 
         **Core Directives:**
 
         * **Task Delegation:** Utilize the `send_message` function to assign actionable tasks to remote agents.
+        * **Batch Delegation:** When one user message needs several keywords (e.g. weather, accommodation and attractions for a trip), call `send_batch_message` ONCE with a list of {{"keyword", "task"}} objects instead of calling `send_message` repeatedly. The requests run concurrently.
+        * **Dependent Plans:** When a later subtask needs the result of an earlier one (e.g. find accommodation near the top attraction), call `execute_plan` ONCE with a list of steps {{"id", "keyword", "task", "depends_on"}}. Reference an earlier result with `{{step_id}}` in the task text; independent steps run concurrently.
         * **Contextual Awareness for Remote Agents:** If a remote agent repeatedly requests user confirmation, assume it lacks access to the         full conversation history. In such cases, enrich the task description with all necessary contextual information relevant to that         specific agent.
         * **Autonomous Agent Engagement:** Never seek user permission before engaging with remote agents. If multiple agents are required to         fulfill a request, connect with them directly without requesting user preference or confirmation.
         * **Transparent Communication:** Always present the complete and detailed response from the remote agent to the user.
@@ -170,6 +350,7 @@ class RoutingAgent:
           - `"TripAdvisor"` → for reviews, sightseeing, attractions, or travel planning
           - `"Location"` → for questions involving specific places, addresses, or geographic information 
           - `"Transport"` → for inquiries about transportation options, routes, schedules, or travel methods
+        {generic_tasks}
         **Agent Roster:**
 
         **Keyword Set:** ["Weather"," Accommodations"," TripAdvisor","Location","Transport"]
@@ -195,6 +376,87 @@ class RoutingAgent:
             if 'session_id' not in state:
                 state['session_id'] = str(uuid.uuid4())
             state['session_active'] = True
+        pre_routed = self._pre_route(callback_context, llm_request)
+        if pre_routed is not None:
+            return pre_routed
+
+        # 压缩历史：保留最近 N 轮原文，较早的工具输出替换为摘要
+        if self.compaction.enabled and llm_request.contents:
+            llm_request.contents = compact_contents(
+                llm_request.contents, self.compaction, self.compaction_stats
+            )
+        return None
+
+    def _pre_route(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> LlmResponse | None:
+        """Answer the model call locally when the pre-router is confident.
+
+        On the first model call of a turn, a confident prediction becomes a
+        synthetic ``send_message`` function call; on the follow-up call the
+        tool result is returned as the final answer. Both Gemini round trips
+        are skipped. Returning ``None`` lets the LLM handle the call.
+
+        Only the first turn of a session is pre-routed: later messages
+        usually refer back to it ("book it for 3 adults") and need the LLM
+        to rewrite them into a self-contained task.
+        """
+        if self.pre_router is None or not llm_request.contents:
+            return None
+        state = callback_context.state
+        last = llm_request.contents[-1]
+        parts = last.parts or []
+
+        # 第二次模型调用：直接把预路由的工具结果作为最终回答
+        if state.get('pre_routed_invocation') == callback_context.invocation_id:
+            state['pre_routed_invocation'] = None
+            for part in parts:
+                if part.function_response and part.function_response.name == 'send_message':
+                    response = part.function_response.response or {}
+                    text = response.get('result', response)
+                    return LlmResponse(
+                        content=types.Content(
+                            role='model', parts=[types.Part(text=str(text))]
+                        )
+                    )
+            return None
+
+        if last.role != 'user' or any(p.function_response for p in parts):
+            return None
+        text = ''.join(p.text for p in parts if p.text).strip()
+        if not text:
+            return None
+        if len(llm_request.contents) > 1:
+            # 会话已有历史：交给 LLM 结合上下文改写任务
+            self.pre_router_stats['skipped_history'] += 1
+            return None
+
+        prediction = self.pre_router.predict(text)
+        self.pre_router_stats['seen'] += 1
+        if not prediction.dispatch:
+            return None
+        self.pre_router_stats['dispatched'] += 1
+        LOG_SINK.info(
+            "pre_routed",
+            keyword=prediction.keyword,
+            confidence=prediction.confidence,
+            margin=prediction.margin,
+            text=text[:80],
+        )
+        state['pre_routed_invocation'] = callback_context.invocation_id
+        return LlmResponse(
+            content=types.Content(
+                role='model',
+                parts=[
+                    types.Part(
+                        function_call=types.FunctionCall(
+                            name='send_message',
+                            args={'keyword': prediction.keyword, 'task': text},
+                        )
+                    )
+                ],
+            )
+        )
 
     def list_remote_agents(self):
         """List the available remote agents you can use to delegate the task."""
@@ -210,44 +472,350 @@ class RoutingAgent:
             )
         return remote_agent_info
     
-    async def _connect_to_registry_(self, keyword: str, task: str, topk: int):
-        router = routing()  # ✅ 创建 RoutingAgent 实例
-        topk_list = await router.resolve_client(keyword, task, topk)
+    async def _stream_from_agent(
+        self,
+        agent_name: str,
+        client: RemoteAgentConnections,
+        message_request: SendStreamingMessageRequest,
+        session_id: str | None,
+    ) -> Task | str | dict:
+        """Consume one agent's A2A stream, relaying chunks to the UI.
+
+        Status-message and artifact chunks are published on ``PROGRESS_BUS``
+        as they arrive; the assembled answer is returned once the stream ends.
+        Errors before the first event are raised so the caller can fall back
+        to a blocking call; a stream that breaks after that returns an error
+        dict carrying the ``partial`` text received so far.
+        """
+        artifacts: dict[str, str] = {}
+        last_status_text = ''
+        final_task: Task | None = None
+        received = False
+
+        try:
+            async for chunk in client.send_message_streaming(message_request):
+                received = True
+                root = chunk.root
+                if isinstance(root, JSONRPCErrorResponse):
+                    return {"error": f"{agent_name}: {root.error.message}"}
+                event = root.result
+
+                if isinstance(event, Task):
+                    final_task = event
+                elif isinstance(event, Message):
+                    last_status_text = parts_text(event.parts)
+                    PROGRESS_BUS.publish(session_id, {
+                        "type": "agent_chunk", "agent": agent_name,
+                        "kind": "message", "text": last_status_text,
+                    })
+                elif isinstance(event, TaskStatusUpdateEvent):
+                    text = parts_text(event.status.message.parts) if event.status.message else ''
+                    if text:
+                        last_status_text = text
+                        PROGRESS_BUS.publish(session_id, {
+                            "type": "agent_chunk", "agent": agent_name,
+                            "kind": "status", "state": event.status.state.value,
+                            "text": text,
+                        })
+                    if event.final:
+                        break
+                elif isinstance(event, TaskArtifactUpdateEvent):
+                    text = parts_text(event.artifact.parts)
+                    art_id = event.artifact.artifact_id
+                    if event.append:
+                        artifacts[art_id] = artifacts.get(art_id, '') + text
+                    else:
+                        artifacts[art_id] = text
+                    if text:
+                        PROGRESS_BUS.publish(session_id, {
+                            "type": "agent_chunk", "agent": agent_name,
+                            "kind": "artifact", "text": text,
+                            "append": bool(event.append),
+                        })
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not received:
+                # 尚未收到任何事件：调用方可以安全地退回阻塞调用
+                raise
+            # 已有内容推送到 UI：不再重发任务（远端未必幂等），返回已收到的部分
+            return {
+                "error": f"{agent_name}: stream interrupted ({e})",
+                "partial": "\n\n".join(t for t in artifacts.values() if t) or last_status_text,
+            }
+
+        if artifacts:
+            return "\n\n".join(t for t in artifacts.values() if t)
+        if final_task is not None:
+            return final_task
+        if last_status_text:
+            return last_status_text
+        return {"error": f"{agent_name}: stream ended without a result"}
+
+    async def _connect_to_registry_(
+        self, keyword: str, task: str, topk: int, context_id: str | None = None
+    ):
+        # ✅ 复用同一个 registry 路由器，并经由 TTL/LRU 缓存 + singleflight 查询
+        # 多取一些候选，便于健康度过滤掉故障副本后仍能凑满 top-k
+        fetch_k = topk * self.health_overfetch
+        candidates = await self.registry_cache.get_or_load(
+            keyword,
+            task,
+            fetch_k,
+            lambda: self.registry_router.resolve_candidates(keyword, task, fetch_k),
+        )
+
+        # 同一 agent 的多个副本只保留本会话的粘性副本（熔断中则顺延到下一个）
+        if self.sticky_routing and context_id:
+            candidates = pick_replicas(candidates, context_id, self.health.would_allow)
+        # 同一 URL 只调用一次（不同名字登记的同一个 agent），保留排名靠前的那个
+        unique = {}
+        for c in candidates:
+            unique.setdefault(c.url, c)
+        candidates = list(unique.values())
+
+        # 1️⃣ 按分差、成功率与延迟预算决定本次调用几个 agent，
+        #    再结合 registry score 与健康度（EWMA 延迟/错误率/熔断）重排
+        k, reasons = self.topk.choose(candidates, self.fanout_config.deadline)
+        chosen = self.health.rank(candidates, k)
+        self.topk.record(len(chosen), reasons, len(candidates))
+        topk_list = [(c.name, c.url) for c in chosen]
+        scores = {c.name: c.score for c in chosen}
 
         # 2️⃣ 解包成两个列表
         agent_names = [a[0] for a in topk_list]
         agent_urls = [a[1] for a in topk_list]
 
-        # 3️⃣ 打印信息
-        print(f"[Registry] Keyword='{keyword}' → Found {len(topk_list)} agents:")
-        for name, url in topk_list:
-            print(f"  - {name} @ {url}")
+        # 3️⃣ 记录信息
+        LOG_SINK.info(
+            "registry_resolved", keyword=keyword, candidates=topk_list, k=k, reasons=reasons
+        )
 
-    # ✅ 返回 (全部agent名, 全部URL, 完整列表)
-        return agent_names, agent_urls, topk_list
+    # ✅ 返回 (全部agent名, 全部URL, 完整列表, registry 分数)
+        return agent_names, agent_urls, topk_list, scores
 
     async def send_message(
-        self, keyword: str, task:str, tool_context: ToolContext
+        self, keyword: str, task: str, tool_context: ToolContext
+    ):
+        """Send a task to the remote agents registered under a keyword.
+
+        Args:
+            keyword: One of "Weather", "Accommodations", "TripAdvisor",
+                "Location" or "Transport".
+            task: The self-contained task description for the remote agent.
+
+        Returns:
+            The aggregated Markdown answer of the selected agents.
+        """
+        return await self._dispatch(keyword, task, tool_context)
+
+    async def send_batch_message(
+        self, requests: list[dict], tool_context: ToolContext
+    ):
+        """Send several independent tasks at once, one per keyword.
+
+        Use this instead of repeated `send_message` calls when the user asks
+        about several domains in one message (e.g. weather, a place to stay
+        and things to do for the same trip).
+
+        Args:
+            requests: A list of objects, each with a "keyword" (one of
+                "Weather", "Accommodations", "TripAdvisor", "Location",
+                "Transport") and a "task" (the self-contained task text).
+
+        Returns:
+            A dict with one entry per request: its keyword, task and either
+            the aggregated "response" or an "error".
+        """
+        pairs = []
+        for req in requests or []:
+            keyword = (req or {}).get("keyword")
+            task = (req or {}).get("task")
+            if keyword and task:
+                pairs.append((str(keyword), str(task)))
+        if not pairs:
+            return {"results": [], "error": "No valid (keyword, task) pairs given."}
+
+        # 所有 (keyword, task) 的 registry 解析与 agent 调用并发进行
+        active_agents: list[str] = []
+        outcomes = await asyncio.gather(
+            *(
+                self._dispatch(keyword, task, tool_context, active_agents)
+                for keyword, task in pairs
+            ),
+            return_exceptions=True,
+        )
+
+        results = []
+        for (keyword, task), outcome in zip(pairs, outcomes):
+            entry: dict[str, Any] = {"keyword": keyword, "task": task}
+            if isinstance(outcome, BaseException):
+                entry["error"] = f"{type(outcome).__name__}: {outcome}"
+            else:
+                entry["response"] = outcome
+            results.append(entry)
+        if active_agents:
+            tool_context.state["active_agent"] = list(dict.fromkeys(active_agents))
+        return {"results": results}
+
+    async def execute_plan(
+        self, steps: list[dict], tool_context: ToolContext
     ):
-        topk=3
-        """Send a task to dynamically discovered agents.
+        """Run a small dependency graph of keyword tasks.
+
+        Independent steps run concurrently; a step starts once every step in
+        its "depends_on" list has finished and receives their answers.
+
+        Args:
+            steps: A list of objects, each with an "id", a "keyword" (one of
+                "Weather", "Accommodations", "TripAdvisor", "Location",
+                "Transport"), a "task" and an optional "depends_on" list of
+                step ids. Write "{step_id}" in a task to insert that step's
+                answer; otherwise the answers are appended as context.
+
+        Returns:
+            A dict with one entry per step, in the order given: id, keyword,
+            the task actually sent, status ("done", "failed" or "skipped")
+            and the "response" or "error". A step in which no agent answered
+            is "failed", and the steps depending on it are "skipped".
+        """
+        session_id = session_id_of(tool_context)
+        active_agents: list[str] = []
+        dispatch = self.plan_dispatch or (
+            lambda keyword, task: self._dispatch(
+                keyword, task, tool_context, active_agents, raise_on_failure=True
+            )
+        )
+
+        def on_event(event: dict[str, Any]) -> None:
+            PROGRESS_BUS.publish(session_id, event)
+            LOG_SINK.debug(event["type"], **{k: v for k, v in event.items() if k != "type"})
+
+        try:
+            results = await run_plan(
+                steps,
+                dispatch,
+                on_event=on_event,
+                max_concurrency=self.plan_max_concurrency or None,
+            )
+        except PlanError as e:
+            return {"steps": [], "error": str(e)}
+
+        if active_agents:
+            tool_context.state["active_agent"] = list(dict.fromkeys(active_agents))
+        return {"steps": [r.as_dict() for r in results]}
+
+    async def _dispatch(
+        self,
+        keyword: str,
+        task: str,
+        tool_context: ToolContext,
+        selected_agents: list[str] | None = None,
+        raise_on_failure: bool = False,
+    ) -> str:
+        """Route one (keyword, task) pair, coalescing identical in-flight calls.
+
+        Concurrent calls with the same keyword and normalized task share one
+        registry lookup and fan-out; every caller receives the answer and has
+        the selected agents recorded in its own session state. Calls that
+        carry no remote conversation state (the conversation has not reached
+        this keyword's agents yet, or the keyword is listed in
+        ``DISPATCH_SHARED_KEYWORDS``) coalesce across conversations; stateful
+        follow-ups only coalesce within their own contextId. With
+        ``raise_on_failure`` a dispatch in which no agent answered raises
+        :class:`StepFailed` instead of returning the error text.
+        """
+        # 固定本会话的 context_id（写回 state，后续轮次沿用，用于副本粘性）
+        state = tool_context.state
+        context_id = state.get("context_id") or str(uuid.uuid4())
+        state["context_id"] = context_id
+
+        if self.coalesce:
+            # 优先级也是键的一部分：前台请求不会挂在可能被拒绝的后台预取上。
+            # 远端按 contextId 保存会话：已与该 keyword 的 agent 对话过的会话
+            # 只在本会话内合并，无状态调用则跨会话共享一次调用
+            shared = self._stateless_dispatch(keyword, state)
+            key = (
+                normalize_text(keyword),
+                normalize_text(task),
+                current_priority(),
+                None if shared else context_id,
+            )
+            leader = False
+
+            async def run():
+                nonlocal leader
+                leader = True
+                return await self._dispatch_uncoalesced(keyword, task, tool_context)
+
+            # 领头的调用被取消时，未被取消的等待者由 SingleFlight 重新发起
+            text, agent_names, topk_list, ok = await self.dispatch_flight.do(key, run)
+            if not leader:
+                self.coalesce_stats['saved_fanouts'] += 1
+                self.coalesce_stats['saved_agent_calls'] += len(agent_names)
+                if shared:
+                    self.coalesce_stats['cross_session'] += 1
+                LOG_SINK.info("dispatch_coalesced", keyword=keyword, task=task[:80])
+        else:
+            text, agent_names, topk_list, ok = await self._dispatch_uncoalesced(
+                keyword, task, tool_context
+            )
+
+        if agent_names:
+            tool_context.state["active_agent"] = agent_names
+            tool_context.state["registry_candidates"] = topk_list
+            if selected_agents is not None:
+                selected_agents.extend(agent_names)
+        if raise_on_failure and not ok:
+            raise StepFailed(text or f"no agent answered for {keyword}")
+        return text
+
+    def _stateless_dispatch(self, keyword: str, state: Any) -> bool:
+        """Whether a call carries no remote conversation state for ``keyword``."""
+        keyword = normalize_text(keyword)
+        return keyword in self.shared_keywords or keyword not in state.get("remote_keywords", [])
+
+    async def _dispatch_uncoalesced(
+        self,
+        keyword: str,
+        task: str,
+        tool_context: ToolContext,
+    ) -> tuple[str, list[str], list[tuple[str, str]], bool]:
+        """Route one (keyword, task) pair through the registry and fan out.
 
         Dynamically connects to agents returned by the registry,
-        and sends the user's request to them concurrently.
+        and sends the user's request to them concurrently. Returns the
+        aggregated text, the selected agent names and (name, url) list, and
+        whether at least one agent produced an answer.
         """
+        topk = self.topk.config.max_k
         state = tool_context.state
 
+        # 0️⃣ 命中响应缓存则直接返回（state["response_cache_bypass"] 可强制回源）
+        if self.response_cache.readable(bypass=bool(state.get("response_cache_bypass"))):
+            cached = await self.response_cache.get(keyword, task)
+            if cached is not None:
+                LOG_SINK.info("response_cache_hit", keyword=keyword, task=task[:80])
+                self.prefetcher.record_cache_hit(keyword, task)
+                self.prefetcher.schedule(keyword, task)
+                return cached, [], [], True
+            prefetched = await self.prefetcher.lookup(keyword, task)
+            if prefetched is not None:
+                LOG_SINK.info("prefetch_hit", keyword=keyword, task=task[:80])
+                return prefetched, [], [], True
+
+        # context_id 已由 _dispatch 固定
+        context_id = state["context_id"]
+
         # 1️⃣ 向注册中心请求 agent 列表
-        agent_names, agent_urls, topk_list = await self._connect_to_registry_(keyword,task,topk)
-        state["active_agent"] = agent_names
-        state["registry_candidates"] = topk_list
+        agent_names, agent_urls, topk_list, scores = await self._connect_to_registry_(
+            keyword, task, topk, context_id
+        )
 
         # 2️⃣ 懒连接：仅连接尚未建立的 URL
-        for url in agent_urls:
-            await self._async_init_components(agent_urls,agent_names)
+        await self._async_init_components(agent_urls, agent_names)
 
         # 3️⃣ 构造消息 payload
-        context_id = state.get("context_id", str(uuid.uuid4()))
         input_metadata = state.get("input_message_metadata", {})
         message_id = input_metadata.get("message_id", str(uuid.uuid4()))
 
@@ -259,57 +827,119 @@ class RoutingAgent:
                 "contextId": context_id,
             }
         }
-        pretty_payload = json.dumps(payload, indent=4, ensure_ascii=False)
-        print("\n==============================")
-        print(f"[RoutingAgent] 📤 Sending payload to child agents ({keyword}):")
-        print(pretty_payload)
-        print("==============================\n")
+        LOG_SINK.debug("send_payload", keyword=keyword, payload=payload)
         message_request = SendMessageRequest(
             id=message_id, params=MessageSendParams.model_validate(payload)
         )
+        streaming_request = SendStreamingMessageRequest(
+            id=message_id, params=MessageSendParams.model_validate(payload)
+        )
+        session_id = session_id_of(tool_context)
 
         # 4️⃣ 定义子任务：并发访问每个 agent
-        async def query_agent(agent_name: str):
+        async def query_agent(agent_name: str, agent_url: str):
             from a2a.types import SendMessageSuccessResponse, Task, SendMessageResponse
 
-            client = self.remote_agent_connections.get(agent_name)
+            client = self.remote_agent_connections.get(agent_url)
             if not client:
-                return agent_name, {"error": f"No active connection for {agent_name}"}
+                return {"error": f"No active connection for {agent_name}"}
+
+            card = self.cards.get(agent_name)
+            capabilities = getattr(card, "capabilities", None)
+            if self.streaming and getattr(capabilities, "streaming", None) is not False:
+                try:
+                    return await self._stream_from_agent(
+                        agent_name, client, streaming_request, session_id
+                    )
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # 流在第一个事件之前就失败（如对端不支持流式）：退回阻塞调用
+                    LOG_SINK.warning("stream_fallback", agent=agent_name, error=str(e))
 
             try:
                 send_response = await client.send_message(message_request=message_request)
 
                 # --- 三层兼容结构 ---
                 if isinstance(send_response, Task):
-                    return agent_name, send_response
+                    return send_response
 
                 elif isinstance(send_response, SendMessageResponse):
                     if hasattr(send_response, "root") and isinstance(
                         send_response.root, SendMessageSuccessResponse
                     ):
                         if isinstance(send_response.root.result, Task):
-                            return agent_name, send_response.root.result
+                            return send_response.root.result
                         else:
-                            return agent_name, {
+                            return {
                                 "error": "SendMessageSuccessResponse has no Task result"
                             }
                     else:
-                        return agent_name, {
+                        return {
                             "error": f"Unexpected SendMessageResponse root type: {type(getattr(send_response, 'root', None))}"
                         }
 
                 elif isinstance(send_response, dict):
-                    return agent_name, send_response
+                    return send_response
 
                 else:
-                    return agent_name, {"error": f"Unknown response type: {type(send_response)}"}
+                    return {"error": f"Unknown response type: {type(send_response)}"}
 
             except Exception as e:
-                print(f"[RoutingAgent] ❌ Error calling {agent_name}: {e}")
-                return agent_name, {"error": str(e)}
+                LOG_SINK.error("agent_call_failed", agent=agent_name, error=str(e))
+                return {"error": str(e)}
 
-        # 5️⃣ 并发执行所有子请求
-        results = await asyncio.gather(*(query_agent(name) for name in agent_names))
+        async def tracked_query(agent_name: str, agent_url: str):
+            # 先取得准入名额；排队时间不计入健康度延迟
+            sent = False
+            try:
+                async with self.admission.slot(agent_url):
+                    # 记录每次调用的延迟与成败，供健康度模型使用
+                    sent = True
+                    started = time.monotonic()
+                    try:
+                        result = await query_agent(agent_name, agent_url)
+                    except asyncio.CancelledError:
+                        self.health.record_cancelled(agent_url, time.monotonic() - started)
+                        raise
+                    elapsed = time.monotonic() - started
+                    if isinstance(result, (Task, str)):
+                        self.health.record_success(agent_url, elapsed, agent_name)
+                    else:
+                        self.health.record_failure(agent_url, elapsed, agent_name)
+                    return result
+            except AdmissionRejected as e:
+                LOG_SINK.warning("admission_rejected", agent=agent_name, reason=e.reason)
+                return {"error": e.user_message, "rejected": e.reason}
+            finally:
+                # 被拒绝或在排队时被取消：请求没有发出，归还 rank() 占用的半开探测名额
+                if not sent:
+                    self.health.release_probe(agent_url)
+
+        # 5️⃣ 并发执行所有子请求，按完成策略提前结束并取消拖尾请求
+        names_by_url = dict(zip(agent_urls, agent_names))
+        fanout = await fan_out(
+            [
+                (url, functools.partial(tracked_query, name, url))
+                for name, url in zip(agent_names, agent_urls)
+            ],
+            is_success=lambda r: isinstance(r, (Task, str)),
+            config=self.fanout_config,
+        )
+        results = [(names_by_url[url], result) for url, result in fanout.results]
+        if results:
+            # 远端已按本会话的 contextId 建立会话：后续同 keyword 的调用不再跨会话合并
+            remote = state.get("remote_keywords", [])
+            if normalize_text(keyword) not in remote:
+                state["remote_keywords"] = [*remote, normalize_text(keyword)]
+        if fanout.cancelled:
+            LOG_SINK.info(
+                "fanout_cancelled",
+                policy=self.fanout_config.policy.value,
+                elapsed=fanout.elapsed,
+                cancelled=[names_by_url[u] for u in fanout.cancelled],
+                timed_out=fanout.timed_out,
+            )
 
         # 6️⃣ 聚合结果
         responses = {}
@@ -332,36 +962,81 @@ class RoutingAgent:
                         text = agent_msgs[-1].parts[0].root.text
 
                 responses[name] = text or "(no text)"
-                print(
-                    f"[RoutingAgent] ✅ {name} responded successfully: {responses[name][:100]}..."
-                )
+                LOG_SINK.info("agent_responded", agent=name, preview=responses[name][:100])
                 continue  # 🔹防止执行下面的 else
 
+            elif isinstance(result, str):
+                # 流式调用已拼装好的文本
+                responses[name] = result or "(no text)"
+                LOG_SINK.info("agent_streamed", agent=name, preview=responses[name][:100])
+
+            elif isinstance(result, dict) and result.get("partial"):
+                # 流中途断开：保留已推送的部分答案并注明（该结果不会进入缓存）
+                responses[name] = f"{result['partial']}\n\n({result['error']})"
+                LOG_SINK.warning("agent_stream_interrupted", agent=name, error=result["error"])
+
             else:
                 responses[name] = result
-                print(f"[RoutingAgent] ⚠️ {name} returned non-task result: {result}")
+                LOG_SINK.warning("agent_non_task_result", agent=name, result=result)
 
-        # 7️⃣ （可选）过滤掉空文本的 agent
+        # 7️⃣ 过滤掉空文本的 agent；文本答案去重、按分数排序并截断到 token 预算
         responses = {k: v for k, v in responses.items() if v and v != "(no text)"}
-        print(f"[RoutingAgent] ✅ Final aggregated Markdown output:\n{responses}")
-        combined_output = []
-        for text in responses.values():
+        answers = []
+        extra_output = []
+        for name, text in responses.items():
             if isinstance(text, str):
-                combined_output.append(text.strip())
+                answers.append((name, text, scores.get(name, 0.0)))
+            elif isinstance(text, dict) and text.get("rejected"):
+                continue  # 被准入控制拒绝的调用不输出原始错误
             elif isinstance(text, dict):
-                combined_output.append(str(text))  # 防止 strip 报错
+                extra_output.append(str(text))  # 防止 strip 报错
             else:
-                combined_output.append(repr(text))  # 兜底
+                extra_output.append(repr(text))  # 兜底
+        combined_output = [self.aggregator.aggregate(answers)] if answers else []
+        combined_output.extend(extra_output)
+        if not combined_output and any(
+            isinstance(r, dict) and r.get("rejected") for _, r in results
+        ):
+            # 全部因过载被拒：快速返回明确的提示，而不是排队等待
+            combined_output.append(BUSY_MESSAGE)
+
+        if fanout.timed_out and fanout.cancelled:
+            # 截止时间到：返回部分聚合结果，并注明未完成的 agent
+            combined_output.append(
+                "(partial result: no answer within "
+                f"{self.fanout_config.deadline:g}s from "
+                f"{', '.join(names_by_url[u] for u in fanout.cancelled)})"
+            )
 
         final_text = "\n\n---\n\n".join(combined_output)
-        print(f"[RoutingAgent] 🧩 Combined text output:\n{final_text}")
-        return final_text
+        LOG_SINK.debug("combined_output", keyword=keyword, agents=list(responses), text=final_text)
+
+        # 仅缓存完整成功的结果：无超时截断，且每个返回的 agent 都成功
+        # （否则 final_text 里带着失败 agent 的错误文本）
+        if (
+            not fanout.timed_out
+            and results
+            and all(isinstance(r, (Task, str)) for _, r in results)
+        ):
+            await self.response_cache.set(keyword, task, final_text)
+            self.prefetcher.schedule(keyword, task)
+        return final_text, agent_names, topk_list, bool(answers)
+
+    async def _prefetch_dispatch(self, keyword: str, task: str) -> str:
+        # 预取不属于任何会话：不写 session state，也不推送进度；低优先级且从不排队
+        with admission_priority(PRIORITY_BACKGROUND):
+            return await self._dispatch(keyword, task, SimpleNamespace(state={}))
+
+
+# 进程内唯一的 RoutingAgent 实例（供 __main__ 在关闭时释放连接池）
+routing_agent_instance: RoutingAgent | None = None
 
 
 def _get_initialized_routing_agent_sync() -> Agent:
     """Synchronously creates and initializes the RoutingAgent."""
 
     async def _async_main() -> Agent:
+        global routing_agent_instance
         routing_agent_instance = await RoutingAgent.create(
             remote_agent_addresses=[
             ]
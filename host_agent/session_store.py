@@ -0,0 +1,181 @@
+"""Bounded ADK session storage for the host UI.
+
+Every browser session gets its own ADK session. To keep memory bounded over
+long uptimes, sessions are evicted least-recently-used once ``max_sessions``
+is exceeded and after ``ttl_seconds`` of inactivity. Optionally the sessions
+are persisted in SQLite through ADK's ``DatabaseSessionService``; call
+:meth:`BoundedSessionService.restore` at startup so sessions stored by an
+earlier process are tracked (and evicted) too.
+"""
+
+import asyncio
+import os
+import time
+
+from collections import OrderedDict
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import (
+    BaseSessionService,
+    DatabaseSessionService,
+    InMemorySessionService,
+    Session,
+)
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+
+
+SessionKey = tuple[str, str, str]
+
+
+class BoundedSessionService(BaseSessionService):
+    """Wraps another session service with LRU + idle-TTL eviction."""
+
+    def __init__(
+        self,
+        inner: BaseSessionService,
+        max_sessions: int = 1000,
+        ttl_seconds: float = 24 * 60 * 60,
+    ):
+        self._inner = inner
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._last_used: OrderedDict[SessionKey, float] = OrderedDict()
+        self._lock = asyncio.Lock()
+        self.evicted = 0
+        self.restored = 0
+
+    @classmethod
+    def from_env(cls) -> 'BoundedSessionService':
+        db_path = os.getenv('HOST_SESSION_DB')
+        if db_path:
+            inner: BaseSessionService = DatabaseSessionService(
+                db_url=f'sqlite:///{db_path}'
+            )
+        else:
+            inner = InMemorySessionService()
+        return cls(
+            inner,
+            max_sessions=int(os.getenv('HOST_SESSION_MAX', 1000)),
+            ttl_seconds=float(os.getenv('HOST_SESSION_TTL', 24 * 60 * 60)),
+        )
+
+    async def restore(self, *, app_name: str, user_id: str) -> int:
+        """Track sessions already stored by the backend, then evict the stale ones.
+
+        Their idle time is taken from ``last_update_time`` (epoch seconds).
+        Returns the number of sessions restored.
+        """
+        response = await self._inner.list_sessions(app_name=app_name, user_id=user_id)
+        offset = time.monotonic() - time.time()
+        restored = 0
+        for session in response.sessions:
+            key = (app_name, user_id, session.id)
+            if key not in self._last_used:
+                # 墙钟时间换算到 monotonic 时间轴
+                self._last_used[key] = session.last_update_time + offset
+                restored += 1
+        if restored:
+            # 按最近使用时间重排，最久未用的在 LRU 头部
+            self._last_used = OrderedDict(sorted(self._last_used.items(), key=lambda kv: kv[1]))
+        self.restored += restored
+        await self._evict()
+        return restored
+
+    def _touch(self, key: SessionKey) -> None:
+        self._last_used[key] = time.monotonic()
+        self._last_used.move_to_end(key)
+
+    async def _evict(self) -> None:
+        now = time.monotonic()
+        victims = []
+        for key, last_used in self._last_used.items():
+            over_capacity = len(self._last_used) - len(victims) > self.max_sessions
+            if over_capacity or now - last_used > self.ttl_seconds:
+                victims.append(key)
+            else:
+                break  # OrderedDict 按最近使用排序，后面的都更新
+        for key in victims:
+            self._last_used.pop(key, None)
+            app_name, user_id, session_id = key
+            try:
+                await self._inner.delete_session(
+                    app_name=app_name, user_id=user_id, session_id=session_id
+                )
+            except Exception:
+                pass
+            self.evicted += 1
+
+    async def ensure_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> Session:
+        """Return the session, creating it on first use."""
+        async with self._lock:
+            session = await self.get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id
+            )
+            if session is None:
+                session = await self.create_session(
+                    app_name=app_name, user_id=user_id, session_id=session_id
+                )
+            return session
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session = await self._inner.create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        self._touch((app_name, user_id, session.id))
+        await self._evict()
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        session = await self._inner.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None:
+            self._touch((app_name, user_id, session_id))
+        return session
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: str
+    ) -> ListSessionsResponse:
+        return await self._inner.list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        self._last_used.pop((app_name, user_id, session_id), None)
+        await self._inner.delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        self._touch((session.app_name, session.user_id, session.id))
+        return await self._inner.append_event(session, event)
+
+    def stats(self) -> dict:
+        return {
+            'backend': type(self._inner).__name__,
+            'sessions': len(self._last_used),
+            'max_sessions': self.max_sessions,
+            'ttl_seconds': self.ttl_seconds,
+            'evicted': self.evicted,
+            'restored': self.restored,
+        }
@@ -0,0 +1,220 @@
+"""One user turn through the routing agent, as a stream of plain events.
+
+Both front ends consume :meth:`TurnRunner.run_turn`: the headless SSE API
+serializes its events as they are produced, and the Gradio UI renders them
+as chat messages. Each event is a JSON-friendly dict with a ``type`` of
+``session``, ``tool_call``, ``tool_response``, ``progress``, ``final`` or
+``error``.
+"""
+
+import asyncio
+import datetime
+import time
+import traceback
+
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from google.adk.events import Event
+from google.adk.runners import Runner
+from google.genai import types
+from log_sink import LOG_SINK
+from progress import PROGRESS_BUS
+from session_store import BoundedSessionService
+
+
+ERROR_MESSAGE = (
+    'An error occurred while processing your request. '
+    'Please check the server logs for details.'
+)
+
+
+async def _pump_events(
+    event_iterator: AsyncIterator[Event], queue: asyncio.Queue
+) -> None:
+    """Forward runner events into ``queue`` so they interleave with progress."""
+    try:
+        async for event in event_iterator:
+            await queue.put(("event", event))
+    except Exception as e:
+        await queue.put(("error", e))
+    finally:
+        await queue.put(("done", None))
+
+
+def _event_to_dicts(event: Event) -> list[dict[str, Any]]:
+    """Split one ADK event into tool_call / tool_response / final events."""
+    out: list[dict[str, Any]] = []
+    if event.content and event.content.parts:
+        for part in event.content.parts:
+            if part.function_call:
+                out.append({
+                    "type": "tool_call",
+                    "name": part.function_call.name,
+                    "call": part.function_call.model_dump(exclude_none=True),
+                })
+            elif part.function_response:
+                response_content = part.function_response.response
+                if isinstance(response_content, dict) and "response" in response_content:
+                    response_content = response_content["response"]
+                out.append({
+                    "type": "tool_response",
+                    "name": part.function_response.name,
+                    "response": response_content,
+                })
+
+    if event.is_final_response():
+        final_response_text = ""
+        if event.content and event.content.parts:
+            final_response_text = "".join(
+                [p.text for p in event.content.parts if p.text]
+            )
+        elif event.actions and event.actions.escalate:
+            final_response_text = f"Agent escalated: {event.error_message or 'No specific message.'}"
+        out.append({"type": "final", "text": final_response_text})
+    return out
+
+
+@dataclass
+class _SessionLock:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+
+
+class TurnRunner:
+    """Runs user turns against the routing agent, one at a time per session."""
+
+    def __init__(
+        self,
+        runner: Runner,
+        session_service: BoundedSessionService,
+        app_name: str,
+        user_id: str,
+        instruction=None,
+    ):
+        self.runner = runner
+        self.session_service = session_service
+        self.app_name = app_name
+        self.user_id = user_id
+        self.instruction = instruction
+        # 同一会话的多轮请求必须串行（ADK 会话不支持并发写入）
+        self._session_locks: dict[str, _SessionLock] = {}
+        self.active_turns = 0
+        self.completed_turns = 0
+        self.failed_turns = 0
+
+    def stats(self) -> dict:
+        return {
+            'active_turns': self.active_turns,
+            'completed_turns': self.completed_turns,
+            'failed_turns': self.failed_turns,
+            'sessions_with_locks': len(self._session_locks),
+        }
+
+    async def run_turn(self, message: str, session_id: str) -> AsyncIterator[dict[str, Any]]:
+        """Run one turn and yield its events; ends after ``final`` or ``error``."""
+        entry = self._session_locks.get(session_id)
+        if entry is None:
+            entry = self._session_locks[session_id] = _SessionLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                self.active_turns += 1
+                try:
+                    async for item in self._run_turn_locked(message, session_id):
+                        yield item
+                finally:
+                    self.active_turns -= 1
+        finally:
+            entry.users -= 1
+            if entry.users == 0:  # 无人使用时回收锁
+                self._session_locks.pop(session_id, None)
+
+    async def _run_turn_locked(
+        self, message: str, session_id: str
+    ) -> AsyncIterator[dict[str, Any]]:
+        start_time = time.time()
+        runtime_record = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "session_id": session_id,
+            "user_message": message,
+            "events": [],
+            "final_response": None,
+            "error": None,
+        }
+
+        queue: asyncio.Queue | None = None
+        pump: asyncio.Task | None = None
+        try:
+            yield {"type": "session", "session_id": session_id}
+            LOG_SINK.info("turn_start", session_id=session_id, user_message=message)
+            ctx = await self.session_service.ensure_session(
+                app_name=self.app_name, user_id=self.user_id, session_id=session_id
+            )
+            if self.instruction is not None:
+                prompt_text = self.instruction(ctx)
+                LOG_SINK.debug("model_prompt", system_prompt=prompt_text, user_message=message)
+
+            event_iterator: AsyncIterator[Event] = self.runner.run_async(
+                user_id=self.user_id,
+                session_id=session_id,
+                new_message=types.Content(role="user", parts=[types.Part(text=message)]),
+            )
+
+            # 工具内部流式收到的子 agent 片段经 PROGRESS_BUS 推送到同一个队列
+            queue = PROGRESS_BUS.subscribe(session_id)
+            pump = asyncio.create_task(_pump_events(event_iterator, queue))
+
+            while True:
+                kind, item = await queue.get()
+                if kind == "done":
+                    break
+                if kind == "error":
+                    raise item
+                if kind == "progress":
+                    yield {"type": "progress", "event": item}
+                    continue
+
+                event = item
+                # --- 记录事件
+                runtime_record["events"].append({
+                    "time": time.time(),
+                    "event_type": event.type if hasattr(event, "type") else "unknown",
+                    "content": str(event.content)[:300] if event.content else None,
+                })
+                LOG_SINK.debug("model_event", adk_event=event)
+
+                final = None
+                for out in _event_to_dicts(event):
+                    if out["type"] == "final":
+                        final = out
+                    else:
+                        yield out
+                # --- 最终响应阶段
+                if final is not None:
+                    runtime_record["final_response"] = final["text"]
+                    yield final
+                    break
+            self.completed_turns += 1
+
+        except Exception as e:
+            self.failed_turns += 1
+            runtime_record["error"] = str(e)
+            LOG_SINK.error(
+                "turn_error",
+                session_id=session_id,
+                error_type=type(e).__name__,
+                error=str(e),
+                traceback=traceback.format_exc(),
+            )
+            yield {"type": "error", "message": ERROR_MESSAGE}
+
+        finally:
+            if pump is not None:
+                pump.cancel()
+            if queue is not None:
+                PROGRESS_BUS.unsubscribe(session_id, queue)
+            runtime_record["duration_sec"] = round(time.time() - start_time, 3)
+            runtime_record["status"] = "completed" if not runtime_record["error"] else "error"
+            LOG_SINK.info("turn_summary", **runtime_record)
@@ -0,0 +1,134 @@
+"""Optional warm-up of registry lookups and agent connections at startup.
+
+For every keyword the registry is queried, connections to the returned
+candidates are opened in the shared pool and each candidate is probed by
+fetching its agent card. The host reports ready once every keyword has at
+least one responding candidate, so the first user request does not pay for
+connection setup or a dead replica. A keyword the registry does not serve
+(``resolve`` raises ``LookupError``, e.g. no Transport family in the local
+registry) is marked ``skipped`` and does not hold readiness back; any other
+lookup error counts as a failure. Registry lookups are not cached here:
+real requests still run their own task-specific lookup.
+"""
+
+import asyncio
+import os
+import time
+
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+
+DEFAULT_KEYWORDS = ['Weather', 'Accommodations', 'TripAdvisor', 'Location', 'Transport']
+
+
+@dataclass
+class WarmupConfig:
+    enabled: bool = False
+    keywords: list[str] = field(default_factory=lambda: list(DEFAULT_KEYWORDS))
+    timeout: float = 30.0
+    blocking: bool = True
+
+    @classmethod
+    def from_env(cls) -> 'WarmupConfig':
+        keywords = os.getenv('HOST_WARMUP_KEYWORDS')
+        return cls(
+            enabled=os.getenv('HOST_WARMUP', 'false').lower() in ('1', 'true', 'yes'),
+            keywords=(
+                [k.strip() for k in keywords.split(',') if k.strip()]
+                if keywords
+                else list(DEFAULT_KEYWORDS)
+            ),
+            timeout=float(os.getenv('HOST_WARMUP_TIMEOUT', 30)),
+            blocking=os.getenv('HOST_WARMUP_BLOCKING', 'true').lower() in ('1', 'true', 'yes'),
+        )
+
+
+@dataclass
+class Readiness:
+    """Warm-up progress; ``status`` is cold, warming, ready or degraded."""
+
+    status: str = 'cold'
+    keywords: dict[str, dict[str, Any]] = field(default_factory=dict)
+    agents: dict[str, dict[str, Any]] = field(default_factory=dict)
+    elapsed: float | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == 'ready'
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'status': self.status,
+            'elapsed': None if self.elapsed is None else round(self.elapsed, 3),
+            'keywords': self.keywords,
+            'agents': self.agents,
+        }
+
+
+async def run_warmup(
+    config: WarmupConfig,
+    resolve: Callable[[str], Awaitable[Sequence[Any]]],
+    connect: Callable[[Sequence[Any]], Awaitable[None]],
+    probe: Callable[[Any], Awaitable[Any]],
+    readiness: Readiness,
+) -> Readiness:
+    """Warm every keyword concurrently and update ``readiness`` in place.
+
+    ``resolve(keyword)`` returns registry candidates (``name``/``url``) and
+    raises ``LookupError`` for a keyword the registry has no agents for,
+    ``connect(candidates)`` opens their connections and ``probe(candidate)``
+    raises if the agent does not respond.
+    """
+    readiness.status = 'warming'
+    started = time.monotonic()
+    probes: dict[str, asyncio.Task] = {}
+
+    async def probe_agent(candidate: Any) -> bool:
+        probe_started = time.monotonic()
+        row = readiness.agents.setdefault(candidate.url, {'name': candidate.name})
+        try:
+            await probe(candidate)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            row.update(ok=False, error=f'{type(e).__name__}: {e}')
+            return False
+        row.update(ok=True, latency_ms=round((time.monotonic() - probe_started) * 1000, 1))
+        return True
+
+    async def warm_keyword(keyword: str) -> None:
+        row = readiness.keywords.setdefault(keyword, {})
+        try:
+            candidates = list(await resolve(keyword))
+        except LookupError as e:
+            # Registry 可达但没有这个家族：不影响就绪判断
+            row.update(candidates=0, responding=0, skipped=True, reason=str(e))
+            return
+        except Exception as e:
+            row.update(candidates=0, responding=0, error=f'{type(e).__name__}: {e}')
+            return
+        row['candidates'] = len(candidates)
+        await connect(candidates)
+        # 同一 URL 可能被多个 keyword 返回：每个 agent 只探测一次
+        for candidate in candidates:
+            if candidate.url not in probes:
+                probes[candidate.url] = asyncio.create_task(probe_agent(candidate))
+        outcomes = await asyncio.gather(*(probes[c.url] for c in candidates))
+        row['responding'] = sum(outcomes)
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(warm_keyword(k) for k in config.keywords)), config.timeout
+        )
+    except asyncio.TimeoutError:
+        for task in probes.values():
+            task.cancel()
+    readiness.elapsed = time.monotonic() - started
+    served = [k for k in config.keywords if not readiness.keywords.get(k, {}).get('skipped')]
+    all_ready = bool(served) and all(
+        readiness.keywords.get(k, {}).get('responding', 0) > 0 for k in served
+    )
+    readiness.status = 'ready' if all_ready else 'degraded'
+    return readiness
@@ -0,0 +1,68 @@
+"""会话粘性：用 rendezvous hashing（HRW，最高随机权重）把同一 contextId 固定到同一副本。
+
+同名（``name`` 相同、``url`` 不同）的候选视为同一 agent 的多个副本。对每个
+``(context_id, url)`` 计算稳定哈希权重，权重最高的副本即该会话的主副本：
+
+- 同一会话的每一轮都落到同一副本，远端的会话状态（ADK
+  ``InMemorySessionService`` / LangGraph ``MemorySaver``）与缓存保持热态；
+- 副本加入或离开时，只有权重排名受影响的会话迁移（约 1/n），
+  其余会话不动；主副本不可用时按权重次序落到下一个副本，恢复后自动回迁。
+"""
+
+import hashlib
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+def rendezvous_weight(key: str, node: str) -> int:
+    """``(key, node)`` 的稳定 64 位权重（跨进程一致，不用内置 ``hash``）。"""
+    digest = hashlib.blake2b(f"{key}\x00{node}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def rendezvous_order(key: str, nodes: Iterable[str]) -> List[str]:
+    """按权重降序排列 ``nodes``；第一个即 ``key`` 的归属节点。"""
+    return sorted(nodes, key=lambda node: rendezvous_weight(key, node), reverse=True)
+
+
+def _replica_groups(candidates: Iterable[T]) -> dict:
+    # name -> 该 agent 的全部副本；dict 保持首次出现（即 score 最高副本）的次序
+    groups: dict = {}
+    for item in candidates:
+        groups.setdefault(item.name, []).append(item)
+    return groups
+
+
+def sticky_order(candidates: Iterable[T], context_id: str) -> List[T]:
+    """
+    保持 agent 之间的原有次序，同一 agent 的副本按 ``context_id`` 的
+    rendezvous 权重重排并相邻放置：主副本在前，后面依次是故障转移目标。
+    """
+    ordered: List[T] = []
+    for replicas in _replica_groups(candidates).values():
+        if len(replicas) > 1:
+            replicas = sorted(
+                replicas, key=lambda c: rendezvous_weight(context_id, c.url), reverse=True
+            )
+        ordered.extend(replicas)
+    return ordered
+
+
+def pick_replicas(
+    candidates: Iterable[T],
+    context_id: str,
+    allow: Optional[Callable[[str], bool]] = None,
+) -> List[T]:
+    """
+    每个 agent 只保留一个副本：按权重次序第一个 ``allow(url)`` 为真的副本；
+    都不可用时仍返回主副本，由上层的熔断/健康度逻辑处理。
+    """
+    picked: List[T] = []
+    for replicas in _replica_groups(candidates).values():
+        ranked = sticky_order(replicas, context_id)
+        if allow is not None:
+            ranked = [c for c in ranked if allow(c.url)] or ranked
+        picked.append(ranked[0])
+    return picked
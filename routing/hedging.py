@@ -0,0 +1,106 @@
+import math
+import os
+from collections import deque
+from typing import Optional
+
+
+class HedgePolicy:
+    """对冲请求策略：主候选在其历史延迟的 P{percentile} 内未返回时，
+    并发请求下一个候选，取先到的有效结果。
+
+    - 每个 agent URL 保留最近 ``window`` 次调用的延迟；样本不足
+      ``min_samples`` 时用 ``default_delay``，结果再夹在
+      ``[min_delay, max_delay]`` 之间。
+    - 被取消（输给对冲）或失败的调用也记录已耗时间，作为延迟的下界样本；
+      只记录胜出者会让分位数越来越低，对冲越来越早。
+    - ``max_rate`` 限制对冲占请求数的比例，避免故障时额外负载翻倍。
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        percentile: float = 95.0,
+        min_samples: int = 5,
+        default_delay: float = 2.0,
+        min_delay: float = 0.05,
+        max_delay: float = 10.0,
+        max_rate: float = 0.2,
+        window: int = 100,
+    ) -> None:
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_rate = max_rate
+        self.window = window
+        self._latencies: dict[str, deque] = {}
+        self.requests = 0
+        self.hedges = 0
+        self.primary_wins = 0
+        self.hedge_wins = 0
+        self.failover_wins = 0
+        self.censored = 0
+        self.failovers = 0
+        self.cancelled = 0
+        self.failures = 0
+
+    @classmethod
+    def from_env(cls) -> "HedgePolicy":
+        return cls(
+            enabled=os.getenv("HEDGE_ENABLED", "true").lower() in ("1", "true", "yes"),
+            percentile=float(os.getenv("HEDGE_PERCENTILE", 95)),
+            min_samples=int(os.getenv("HEDGE_MIN_SAMPLES", 5)),
+            default_delay=float(os.getenv("HEDGE_DEFAULT_DELAY", 2.0)),
+            min_delay=float(os.getenv("HEDGE_MIN_DELAY", 0.05)),
+            max_delay=float(os.getenv("HEDGE_MAX_DELAY", 10.0)),
+            max_rate=float(os.getenv("HEDGE_MAX_RATE", 0.2)),
+            window=int(os.getenv("HEDGE_WINDOW", 100)),
+        )
+
+    def record(self, url: str, latency: float) -> None:
+        samples = self._latencies.get(url)
+        if samples is None:
+            samples = self._latencies[url] = deque(maxlen=self.window)
+        samples.append(latency)
+
+    def record_censored(self, url: str, elapsed: float) -> None:
+        """记录未拿到结果的调用（被取消或失败）已耗的时间，作为下界样本。"""
+        self.censored += 1
+        self.record(url, elapsed)
+
+    def delay(self, url: str) -> float:
+        """Seconds to wait on ``url`` before hedging to the next candidate."""
+        samples = self._latencies.get(url)
+        if not samples or len(samples) < self.min_samples:
+            value = self.default_delay
+        else:
+            ordered = sorted(samples)
+            index = min(len(ordered) - 1, max(0, math.ceil(self.percentile / 100 * len(ordered)) - 1))
+            value = ordered[index]
+        return min(self.max_delay, max(self.min_delay, value))
+
+    def next_delay(self, url: str) -> Optional[float]:
+        """对冲等待时间；不允许再对冲（关闭或超出比例上限）时返回 None。"""
+        if not self.enabled or self.hedges >= self.max_rate * max(self.requests, 1):
+            return None
+        return self.delay(url)
+
+    def stats(self) -> dict:
+        finished = self.primary_wins + self.hedge_wins + self.failover_wins
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+            "primary_wins": self.primary_wins,
+            "hedge_wins": self.hedge_wins,
+            "hedge_win_rate": round(self.hedge_wins / finished, 4) if finished else 0.0,
+            "failover_wins": self.failover_wins,
+            "failovers": self.failovers,
+            "censored": self.censored,
+            "cancelled": self.cancelled,
+            "failures": self.failures,
+            "delays": {url: round(self.delay(url), 3) for url in self._latencies},
+        }
@@ -0,0 +1,363 @@
+"""本地向量化 Registry：``/api/v1/{keyword}/list`` 服务的离线替身。
+
+按关键词家族保存已注册 agent 的描述向量（哈希 n-gram，L2 归一化），
+查询时对任务文本做同样的编码，用一次矩阵-向量乘积算出余弦相似度，
+再用 ``argpartition`` 取 top-k。注册/注销是增量的：只写入或交换一行，
+不重建索引。
+
+- :meth:`LocalRegistry.list_agents` 与 ``RegistryClient.list_agents`` 同签名，
+  可直接替换（``REGISTRY_LOCAL=true``）。
+- ``python -m routing.local_registry --port 18080`` 以 HTTP 服务方式运行，
+  供 ``RegistryClient`` 通过 ``REGISTRY_BASE_URL`` 调用。
+- 每次注册/注销递增版本号，:meth:`LocalRegistry.watch`（``GET /api/v1/watch``）
+  以长轮询方式推送变更家族的快照，供 ``RegistryWatcher`` 订阅。
+
+向量运算使用 NumPy（项目的直接依赖）。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from .registry_models import (
+    RegistryAgentItem,
+    RegistryListReq,
+    RegistryListResp,
+    RegistryRegisterReq,
+    RegistryWatchResp,
+)
+
+
+DEFAULT_DIM = 256
+MAX_WATCH_TIMEOUT = 60.0
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# 未提供 REGISTRY_LOCAL_FILE 时的示例注册表（与仓库内三个 agent 对应）
+DEFAULT_AGENTS = {
+    "weather": [
+        {
+            "agent_id": "a1",
+            "name": "Weather Agent",
+            "description": "Handles weather queries and forecasts for cities and states",
+            "url": "http://127.0.0.1:10001",
+        },
+    ],
+    "accommodations": [
+        {
+            "agent_id": "a2",
+            "name": "Airbnb Agent",
+            "description": "Handles accommodation search and booking queries on airbnb",
+            "url": "http://127.0.0.1:10002",
+        },
+    ],
+    "tripadvisor": [
+        {
+            "agent_id": "a3",
+            "name": "TripAdvisor Agent",
+            "description": "Searches attractions, restaurants and reviews on TripAdvisor",
+            "url": "http://127.0.0.1:10003",
+        },
+    ],
+    "location": [
+        {
+            "agent_id": "a3",
+            "name": "TripAdvisor Agent",
+            "description": "Finds locations and nearby places by address or coordinates",
+            "url": "http://127.0.0.1:10003",
+        },
+    ],
+}
+
+
+class HashedNgramEmbedder:
+    """词 + 字符三元组的哈希词袋向量（无需模型，离线可用）。
+
+    哈希用 crc32 而不是内置 ``hash``，保证跨进程结果一致。
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM, char_n: int = 3):
+        self.dim = dim
+        self.char_n = char_n
+
+    def features(self, text: str) -> List[int]:
+        buckets = []
+        for word in _WORD_RE.findall(text.lower()):
+            buckets.append(zlib.crc32(word.encode()) % self.dim)
+            padded = f"#{word}#"
+            for i in range(len(padded) - self.char_n + 1):
+                buckets.append(zlib.crc32(padded[i:i + self.char_n].encode()) % self.dim)
+        return buckets
+
+    def embed(self, text: str) -> np.ndarray:
+        vec = np.bincount(self.features(text), minlength=self.dim).astype(np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def embed_many(self, texts: Iterable[str]) -> np.ndarray:
+        texts = list(texts)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            out[row] = np.bincount(self.features(text), minlength=self.dim)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+@dataclass
+class _Family:
+    """一个关键词家族：向量矩阵 + 按列号对齐的 agent 元数据。
+
+    矩阵按列存放（dim × capacity，容量倍增）：哈希向量很稀疏，查询只需
+    读取任务文本命中的那几行维度，而不是整个矩阵。
+    """
+
+    dim: int
+    vectors: Optional[np.ndarray] = None
+    agents: List[RegistryAgentItem] = field(default_factory=list)
+    rows: dict = field(default_factory=dict)  # agent_id -> 列号
+
+    def __post_init__(self):
+        if self.vectors is None:
+            self.vectors = np.zeros((self.dim, 16), dtype=np.float32)
+
+    @property
+    def size(self) -> int:
+        return len(self.agents)
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.size + extra
+        capacity = self.vectors.shape[1]
+        if needed > capacity:
+            grown = np.zeros((self.dim, max(needed, 2 * capacity)), dtype=np.float32)
+            grown[:, :self.size] = self.vectors[:, :self.size]
+            self.vectors = grown
+
+    def upsert(self, agents: List[RegistryAgentItem], vectors: np.ndarray) -> None:
+        self._reserve(len(agents))
+        cols = []
+        for agent in agents:
+            row = self.rows.get(agent.agent_id)
+            if row is None:
+                row = self.size
+                self.rows[agent.agent_id] = row
+                self.agents.append(agent)
+            else:
+                self.agents[row] = agent
+            cols.append(row)
+        self.vectors[:, cols] = vectors.T
+
+    def remove(self, agent_id: str) -> bool:
+        row = self.rows.pop(agent_id, None)
+        if row is None:
+            return False
+        last = self.size - 1
+        if row != last:
+            # 用最后一列填补空位，O(1) 删除
+            self.vectors[:, row] = self.vectors[:, last]
+            self.agents[row] = self.agents[last]
+            self.rows[self.agents[row].agent_id] = row
+        self.vectors[:, last] = 0
+        self.agents.pop()
+        return True
+
+    def top_k(self, query: np.ndarray, k: int) -> List[tuple]:
+        n = self.size
+        if n == 0 or k <= 0:
+            return []
+        dims = np.flatnonzero(query)
+        scores = query[dims] @ self.vectors[dims, :n]
+        k = min(k, n)
+        if k < n:
+            idx = np.argpartition(scores, n - k)[n - k:]
+        else:
+            idx = np.arange(n)
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        return [(int(i), float(scores[i])) for i in idx]
+
+
+class LocalRegistry:
+    """进程内 Registry，实现 RegistryListReq / RegistryListResp 协议。"""
+
+    def __init__(self, embedder: Optional[HashedNgramEmbedder] = None) -> None:
+        self.embedder = embedder or HashedNgramEmbedder()
+        self._families: dict[str, _Family] = {}
+        self.queries = 0
+        self.registrations = 0
+        # 变更订阅：全局递增版本号 + 每个家族最后一次变化时的版本号
+        self.epoch = uuid.uuid4().hex
+        self.version = 0
+        self._changed_at: dict[str, int] = {}
+        self._change_event: Optional[asyncio.Event] = None
+        self.watches = 0
+
+    @classmethod
+    def from_env(cls) -> "LocalRegistry":
+        registry = cls(HashedNgramEmbedder(int(os.getenv("REGISTRY_LOCAL_DIM", DEFAULT_DIM))))
+        path = os.getenv("REGISTRY_LOCAL_FILE")
+        if path:
+            with open(path, encoding="utf-8") as f:
+                seed = json.load(f)
+        else:
+            seed = DEFAULT_AGENTS
+        for keyword, agents in seed.items():
+            registry.register_many(keyword, [RegistryRegisterReq(**a) for a in agents])
+        return registry
+
+    @staticmethod
+    def _key(keyword: str) -> str:
+        return keyword.strip().lower()
+
+    @staticmethod
+    def _text(agent: RegistryRegisterReq) -> str:
+        return f"{agent.name} {agent.description or ''}"
+
+    def register(self, keyword: str, agent: RegistryRegisterReq) -> None:
+        """注册或更新（同 agent_id 覆盖）一个 agent。"""
+        self.register_many(keyword, [agent])
+
+    def register_many(self, keyword: str, agents: List[RegistryRegisterReq]) -> None:
+        if not agents:
+            return
+        key = self._key(keyword)
+        family = self._families.get(key)
+        if family is None:
+            family = self._families[key] = _Family(self.embedder.dim)
+        vectors = self.embedder.embed_many(self._text(a) for a in agents)
+        items = [RegistryAgentItem(score=0.0, **a.model_dump()) for a in agents]
+        family.upsert(items, vectors)
+        self.registrations += len(agents)
+        self._bump(key)
+
+    def unregister(self, keyword: str, agent_id: str) -> bool:
+        key = self._key(keyword)
+        family = self._families.get(key)
+        if family is None or not family.remove(agent_id):
+            return False
+        self._bump(key)
+        return True
+
+    def _bump(self, key: str) -> None:
+        self.version += 1
+        self._changed_at[key] = self.version
+        if self._change_event is not None:
+            self._change_event.set()
+            self._change_event = None
+
+    def snapshot(self, keyword: str) -> List[RegistryAgentItem]:
+        """某个家族当前全部 agent（score 为 0）。"""
+        family = self._families.get(self._key(keyword))
+        return list(family.agents) if family is not None else []
+
+    def changes_since(self, since: int, epoch: Optional[str] = None) -> RegistryWatchResp:
+        """``since`` 之后变化过的家族快照；epoch 不符或版本超前时返回全量。"""
+        full = epoch != self.epoch or since <= 0 or since > self.version
+        keys = self._families if full else [
+            k for k, changed in self._changed_at.items() if changed > since
+        ]
+        return RegistryWatchResp(
+            status="success",
+            epoch=self.epoch,
+            version=self.version,
+            full=full,
+            families={k: self.snapshot(k) for k in keys},
+        )
+
+    async def watch(
+        self, since: int, epoch: Optional[str] = None, timeout: float = 30.0
+    ) -> RegistryWatchResp:
+        """长轮询：有变更立即返回，否则最多等待 ``timeout`` 秒后返回空变更。"""
+        self.watches += 1
+        resp = self.changes_since(since, epoch)
+        if resp.families or resp.full:
+            return resp
+        if self._change_event is None:
+            self._change_event = asyncio.Event()
+        try:
+            await asyncio.wait_for(
+                self._change_event.wait(), min(max(timeout, 0.0), MAX_WATCH_TIMEOUT)
+            )
+        except asyncio.TimeoutError:
+            pass
+        return self.changes_since(since, epoch)
+
+    def search(self, keyword: str, task: str, top_k: int) -> List[RegistryAgentItem]:
+        """按任务文本与描述的余弦相似度降序返回前 k 个候选。"""
+        self.queries += 1
+        family = self._families.get(self._key(keyword))
+        if family is None:
+            return []
+        hits = family.top_k(self.embedder.embed(task), top_k)
+        return [
+            family.agents[row].model_copy(update={"score": round(score, 6)})
+            for row, score in hits
+        ]
+
+    async def list_agents(self, keyword: str, req: RegistryListReq) -> RegistryListResp:
+        """与 ``RegistryClient.list_agents`` 相同的协议。"""
+        agents = self.search(keyword, req.task, req.top_k)
+        return RegistryListResp(
+            status="success", request_id=req.request_id, count=len(agents), agents=agents
+        )
+
+    def stats(self) -> dict:
+        return {
+            "mode": "local",
+            "dim": self.embedder.dim,
+            "families": {k: f.size for k, f in self._families.items()},
+            "queries": self.queries,
+            "registrations": self.registrations,
+            "version": self.version,
+            "watches": self.watches,
+        }
+
+    async def aclose(self) -> None:
+        return None
+
+
+def create_app(registry: LocalRegistry):
+    """HTTP 形式的本地 Registry（与远端 Registry 的 API 一致）。"""
+    from fastapi import FastAPI
+
+    app = FastAPI(title="Local Agent Registry")
+
+    @app.post("/api/v1/{keyword}/list", response_model=RegistryListResp)
+    async def list_agents(keyword: str, req: RegistryListReq) -> RegistryListResp:
+        return await registry.list_agents(keyword, req)
+
+    @app.post("/api/v1/{keyword}/register")
+    async def register(keyword: str, agent: RegistryRegisterReq) -> dict:
+        registry.register(keyword, agent)
+        return {"status": "success", "agent_id": agent.agent_id}
+
+    @app.delete("/api/v1/{keyword}/{agent_id}")
+    async def unregister(keyword: str, agent_id: str) -> dict:
+        removed = registry.unregister(keyword, agent_id)
+        return {"status": "success" if removed else "not_found", "agent_id": agent_id}
+
+    @app.get("/api/v1/watch", response_model=RegistryWatchResp)
+    async def watch(since: int = 0, epoch: Optional[str] = None, timeout: float = 30.0):
+        return await registry.watch(since, epoch, timeout)
+
+    @app.get("/api/v1/stats")
+    async def stats() -> dict:
+        return registry.stats()
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the local agent registry.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args()
+    uvicorn.run(create_app(LocalRegistry.from_env()), host=args.host, port=args.port)
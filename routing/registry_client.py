@@ -1,13 +1,118 @@
+import asyncio
+import os
+import random
+import time
+from typing import Optional
+
 import httpx
-from .registry_models import RegistryListReq, RegistryListResp
+from .registry_models import RegistryListReq, RegistryListResp, RegistryWatchResp
+
+
+# 可重试：连接层失败与网关/限流类状态码（list 是只读查询，重发是安全的）。
+# NetworkError 含 ReadError/WriteError：复用已被对端关闭的 keep-alive 连接时即抛出；
+# TimeoutException 含 Connect/Read/Write/Pool 超时
+RETRYABLE_EXCEPTIONS = (
+    httpx.NetworkError,
+    httpx.TimeoutException,
+    httpx.RemoteProtocolError,
+)
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
 
 
 class RegistryClient:
-    """子系统2 -> Registry 的 HTTP 客户端：我们写请求体，解析响应体。"""
+    """子系统2 -> Registry 的 HTTP 客户端：我们写请求体，解析响应体。
 
-    def __init__(self, base_url: str, timeout: float = 8.0) -> None:
+    持有一个长连接池（keep-alive），每次查询复用已建立的连接；
+    对幂等失败做有限次数、带抖动的指数退避重试，并受单次调用总时限约束。
+    可作为 async context manager 使用，退出时关闭连接池。
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 8.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.1,
+        backoff_max: float = 1.0,
+        deadline: Optional[float] = None,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 30.0,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # 单次 list_agents（含全部重试）的总时限；默认足够每次尝试都用满单次超时，
+        # 否则一次读超时就耗尽总时限，重试永远不会发生
+        self.deadline = deadline if deadline is not None else timeout * (max_retries + 1)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing: set = set()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.watches = 0
+
+    @classmethod
+    def from_env(cls, base_url: Optional[str] = None) -> "RegistryClient":
+        deadline = os.getenv("REGISTRY_DEADLINE")
+        return cls(
+            base_url or os.getenv("REGISTRY_BASE_URL", "http://localhost:18080"),
+            timeout=float(os.getenv("REGISTRY_TIMEOUT", 8.0)),
+            max_retries=int(os.getenv("REGISTRY_MAX_RETRIES", 2)),
+            backoff_base=float(os.getenv("REGISTRY_BACKOFF_BASE", 0.1)),
+            backoff_max=float(os.getenv("REGISTRY_BACKOFF_MAX", 1.0)),
+            deadline=float(deadline) if deadline else None,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """当前事件循环上的连接池客户端（首次使用时创建）。
+
+        httpx 连接绑定在创建它的事件循环上；循环变化（如启动时的
+        asyncio.run 已结束）时重建客户端，并关闭旧客户端。
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            if self._client is not None and not self._client.is_closed:
+                self._discard(self._client, self._loop)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                trust_env=False,
+            )
+            self._loop = loop
+        return self._client
+
+    def _discard(self, client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """关闭属于另一个事件循环的旧客户端。"""
+        if loop is not None and loop.is_running():
+            # 旧循环仍在运行（如 Gradio 的线程）：在它自己的循环上关闭
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        # 旧循环已结束：在当前循环上尽力关闭（套接字可能已随旧循环失效）
+        task = asyncio.get_running_loop().create_task(self._aclose_quietly(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _aclose_quietly(client: httpx.AsyncClient) -> None:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
+
+    def _backoff(self, attempt: int) -> float:
+        # full jitter：在 [0, min(max, base * 2^attempt)] 内均匀取值
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
 
     async def list_agents(self, keyword: str, req: RegistryListReq) -> RegistryListResp:
         """
@@ -19,10 +124,78 @@ class RegistryClient:
 
         Returns:
             RegistryListResp
+
+        Raises:
+            httpx.HTTPError: 最后一次尝试的错误（重试用尽或不可重试）
+            TimeoutError:    总时限内未能完成
+        """
+        self.calls += 1
+        url = f"/api/v1/{keyword}/list"
+        deadline_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                self.failures += 1
+                raise TimeoutError(
+                    f"registry lookup for '{keyword}' exceeded {self.deadline:.1f}s"
+                )
+            try:
+                r = await self.client.post(
+                    url, json=req.model_dump(), timeout=min(self.timeout, remaining)
+                )
+                r.raise_for_status()
+                return RegistryListResp.model_validate(r.json())
+            except (*RETRYABLE_EXCEPTIONS, httpx.HTTPStatusError) as e:
+                retryable = not isinstance(e, httpx.HTTPStatusError) or (
+                    e.response.status_code in RETRYABLE_STATUS
+                )
+                delay = self._backoff(attempt)
+                if (
+                    not retryable
+                    or attempt >= self.max_retries
+                    or time.monotonic() + delay >= deadline_at
+                ):
+                    self.failures += 1
+                    raise
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    async def watch(
+        self, since: int, epoch: Optional[str] = None, timeout: float = 30.0
+    ) -> RegistryWatchResp:
+        """
+        调用 GET /api/v1/watch：长轮询 ``since`` 之后的变更（服务端最多挂起
+        ``timeout`` 秒）。不做重试，失败由订阅方退避后重连。
         """
-        url = f"{self.base_url}/api/v1/{keyword}/list"
-        async with httpx.AsyncClient(timeout=self.timeout, trust_env=False) as cli:
-            r = await cli.post(url, json=req.model_dump())
-            r.raise_for_status()
-            return RegistryListResp.model_validate(r.json())
-#发请求的部分
\ No newline at end of file
+        self.watches += 1
+        params: dict = {"since": since, "timeout": timeout}
+        if epoch:
+            params["epoch"] = epoch
+        r = await self.client.get(
+            "/api/v1/watch", params=params, timeout=timeout + self.timeout
+        )
+        r.raise_for_status()
+        return RegistryWatchResp.model_validate(r.json())
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "watches": self.watches,
+            "retries": self.retries,
+            "failures": self.failures,
+            "pooled": self._client is not None and not self._client.is_closed,
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+    async def __aenter__(self) -> "RegistryClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
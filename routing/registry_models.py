@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -26,3 +26,26 @@ class RegistryListResp(BaseModel):
     count: int
     agents: List[RegistryAgentItem] = []
     ##API格式
+
+
+class RegistryRegisterReq(BaseModel):
+    """POST /api/v1/{keyword}/register 的请求体（本地 Registry）"""
+    agent_id: str
+    name: str
+    description: Optional[str] = None
+    url: str
+    version: float = 1.0
+
+
+class RegistryWatchResp(BaseModel):
+    """GET /api/v1/watch 的响应体（长轮询订阅变更）
+
+    ``families`` 只包含 ``since`` 之后变化过的关键词家族的完整快照（空列表表示
+    该家族已清空）；``full=True`` 时是全量快照，客户端应丢弃未出现的家族。
+    超时无变化时 ``families`` 为空、``version`` 不变。
+    """
+    status: str                # "success" / "error"
+    epoch: str                 # Registry 实例标识；变化说明版本号已重置
+    version: int
+    full: bool = False
+    families: Dict[str, List[RegistryAgentItem]] = {}
@@ -0,0 +1,203 @@
+"""Registry 变更订阅：用长轮询维护本地候选快照，代替每次请求查询 Registry。
+
+``RegistryWatcher`` 在后台循环调用 ``source.watch(since, epoch, timeout)``
+（``RegistryClient`` 走 ``GET /api/v1/watch``），按关键词家族保存
+``RegistryAgentItem`` 快照；``search`` 直接从快照返回候选，不再访问 Registry。
+
+- 默认（``rerank=False``）原样返回 Registry 给出的家族次序与 ``score``。快照
+  不含按任务计算的排名，所以家族内 agent 数超过 ``top_k`` 时无法得知 Registry
+  会选哪 k 个，``search`` 返回 None，调用方回源查询。
+- ``rerank=True``（``REGISTRY_WATCH_RERANK=true``）时快照同步到一个进程内
+  ``LocalRegistry`` 镜像，按任务文本与描述的哈希 n-gram 相似度重新排序；
+  返回的 ``score`` 是本地相似度而非 Registry 的分数，自适应 top-k 与健康度
+  排序都会基于它，只适合 Registry 本身也按描述相似度排序的部署。
+- 最近一次成功同步（含"超时无变化"）超过 ``stale_after`` 秒即视为过期，
+  ``search`` 返回 None，调用方回退到直接查询 Registry。
+- 断线后带抖动指数退避重连；epoch 变化（Registry 重启）时服务端返回全量快照。
+- 快照变化时回调 ``add_listener`` 注册的函数（参数为关键词），
+  供上层失效自己的缓存。
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Callable, List, Optional
+
+from .local_registry import DEFAULT_DIM, HashedNgramEmbedder, LocalRegistry
+from .registry_models import RegistryAgentItem, RegistryRegisterReq, RegistryWatchResp
+
+
+logger = logging.getLogger(__name__)
+
+
+class RegistryWatcher:
+    """订阅 Registry 变更并在内存中提供候选查询。"""
+
+    def __init__(
+        self,
+        source,
+        poll_timeout: float = 30.0,
+        stale_after: float = 75.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 15.0,
+        dim: int = DEFAULT_DIM,
+        rerank: bool = False,
+    ) -> None:
+        self.source = source
+        self.poll_timeout = poll_timeout
+        # 必须大于 poll_timeout：一次无变化的长轮询本身就要挂起这么久
+        self.stale_after = max(stale_after, poll_timeout + 1.0)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rerank = rerank
+        self.mirror = LocalRegistry(HashedNgramEmbedder(dim)) if rerank else None
+        self.snapshots: dict[str, List[RegistryAgentItem]] = {}
+        self.epoch: Optional[str] = None
+        self.version = 0
+        self.synced_at: Optional[float] = None
+        self._listeners: List[Callable[[str], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.polls = 0
+        self.changes = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.hits = 0
+        self.stale_misses = 0
+        self.rank_misses = 0
+
+    @classmethod
+    def from_env(cls, source) -> "RegistryWatcher":
+        return cls(
+            source,
+            poll_timeout=float(os.getenv("REGISTRY_WATCH_TIMEOUT", 30.0)),
+            stale_after=float(os.getenv("REGISTRY_SNAPSHOT_STALE_AFTER", 75.0)),
+            backoff_max=float(os.getenv("REGISTRY_WATCH_BACKOFF_MAX", 15.0)),
+            dim=int(os.getenv("REGISTRY_LOCAL_DIM", DEFAULT_DIM)),
+            rerank=os.getenv("REGISTRY_WATCH_RERANK", "false").lower() in ("1", "true", "yes"),
+        )
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        self._listeners.append(listener)
+
+    @property
+    def stale(self) -> bool:
+        return self.synced_at is None or time.monotonic() - self.synced_at > self.stale_after
+
+    def ensure_started(self) -> None:
+        """在当前事件循环上启动订阅任务（已在运行则不做任何事）。"""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._task = loop.create_task(self._run())
+            self._loop = loop
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            # 首次（或重连后首次）不挂起，立即拿到全量快照
+            timeout = self.poll_timeout if self.synced_at is not None and attempt == 0 else 0.0
+            try:
+                self.polls += 1
+                resp = await self.source.watch(self.version, self.epoch, timeout)
+                if resp.status != "success":
+                    raise RuntimeError(f"registry watch returned status={resp.status!r}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                self.last_error = repr(e)
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                attempt += 1
+                logger.warning("registry watch failed (%s); retrying in %.2fs", e, delay)
+                await asyncio.sleep(delay)
+                continue
+            attempt = 0
+            self.apply(resp)
+
+    def apply(self, resp: RegistryWatchResp) -> List[str]:
+        """合并一次 watch 响应，返回发生变化的关键词。"""
+        changed = []
+        # 与 LocalRegistry 一致：家族名不区分大小写
+        families = {LocalRegistry._key(k): v for k, v in resp.families.items()}
+        if resp.full or resp.epoch != self.epoch:
+            for keyword in self.snapshots.keys() - families.keys():
+                families[keyword] = []
+        for keyword, items in families.items():
+            if self._replace(keyword, items):
+                changed.append(keyword)
+        self.epoch, self.version = resp.epoch, resp.version
+        self.synced_at = time.monotonic()
+        self.changes += len(changed)
+        for keyword in changed:
+            for listener in self._listeners:
+                listener(keyword)
+        return changed
+
+    def _replace(self, keyword: str, items: List[RegistryAgentItem]) -> bool:
+        previous = self.snapshots.get(keyword, [])
+        if self.mirror is not None:
+            old = {a.agent_id: a for a in previous}
+            new = {a.agent_id: a for a in items}
+            for agent_id in old.keys() - new.keys():
+                self.mirror.unregister(keyword, agent_id)
+            self.mirror.register_many(keyword, [
+                RegistryRegisterReq(**a.model_dump(exclude={"score"}))
+                for agent_id, a in new.items()
+                if old.get(agent_id) != a
+            ])
+        if items:
+            self.snapshots[keyword] = list(items)
+        else:
+            self.snapshots.pop(keyword, None)
+        # 次序与 score 也属于 Registry 的排名：任何变化都要通知上层失效缓存
+        return previous != list(items)
+
+    def search(self, keyword: str, task: str, top_k: int) -> Optional[List[RegistryAgentItem]]:
+        """
+        快照未过期时在内存中返回前 k 个候选；快照过期，或不重排时家族大小超过
+        ``top_k``（Registry 按任务选出的子集未知）时返回 None，调用方回源。
+        """
+        if self.stale:
+            self.stale_misses += 1
+            return None
+        if self.mirror is not None:
+            self.hits += 1
+            return self.mirror.search(keyword, task, top_k)
+        items = self.snapshots.get(LocalRegistry._key(keyword), [])
+        if len(items) > top_k:
+            self.rank_misses += 1
+            return None
+        self.hits += 1
+        return list(items)
+
+    def stats(self) -> dict:
+        return {
+            "epoch": self.epoch,
+            "version": self.version,
+            "stale": self.stale,
+            "synced_ago": (
+                round(time.monotonic() - self.synced_at, 3) if self.synced_at is not None else None
+            ),
+            "families": {k: len(v) for k, v in self.snapshots.items()},
+            "polls": self.polls,
+            "changes": self.changes,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "rerank": self.rerank,
+            "hits": self.hits,
+            "stale_misses": self.stale_misses,
+            "rank_misses": self.rank_misses,
+        }
+
+    async def aclose(self) -> None:
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        if self._loop is asyncio.get_running_loop():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
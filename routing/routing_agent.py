@@ -1,5 +1,8 @@
 # pylint: disable=logging-fstring-interpolation
+import asyncio
+import logging
 import os
+import time
 import uuid
 from typing import Any, Optional, List, Tuple
 
@@ -14,13 +17,17 @@ from a2a.types import (
 )
 from google.adk.tools.tool_context import ToolContext
 
-from remote_agent_connection import RemoteAgentConnections
+from .affinity import sticky_order
+from .hedging import HedgePolicy
 from .registry_client import RegistryClient
-from .registry_models import RegistryListReq, RegistryListResp
+from .remote_agent_connection import RemoteAgentConnections
+from .registry_models import RegistryAgentItem, RegistryListReq, RegistryListResp
 
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 class RoutingAgent:
     """
@@ -41,14 +48,32 @@ class RoutingAgent:
 class RoutingAgent:
     def __init__(self):
         self._connections = {}
-        self.registry = None  # 实际项目中这里通常是 registry 客户端实例
+        # url -> 直连连接（复用 httpx 连接池）
+        self._agent_connections: dict[str, RemoteAgentConnections] = {}
+        self.hedging = HedgePolicy.from_env()
+        # REGISTRY_LOCAL=true：进程内向量 Registry；配置了 REGISTRY_BASE_URL 时走真实
+        # Registry（长连接池 + 重试）；都没有时用内置示例数据
+        self.registry = None
+        # REGISTRY_WATCH=true：订阅远端 Registry 变更，快照新鲜时候选查询在内存完成
+        self.watcher = None
+        if os.getenv("REGISTRY_LOCAL", "false").lower() in ("1", "true", "yes"):
+            from .local_registry import LocalRegistry  # 仅本地模式用到，按需导入
 
-    async def resolve_client(
+            self.registry = LocalRegistry.from_env()
+        elif os.getenv("REGISTRY_BASE_URL"):
+            self.registry = RegistryClient.from_env()
+            if os.getenv("REGISTRY_WATCH", "false").lower() in ("1", "true", "yes"):
+                from .registry_watch import RegistryWatcher  # 仅订阅模式用到，按需导入
+
+                self.watcher = RegistryWatcher.from_env(self.registry)
+
+    async def resolve_candidates(
         self, keyword: str, task: str, top_k: int
-    ) -> List[Tuple[str, str]]:
+    ) -> List[RegistryAgentItem]:
         """
-        调用 Registry，按 score 降序选取前 k 个候选，
-        返回 [(agent_name, url), ...]。
+        调用 Registry，按 score 降序返回前 k 个候选（保留 score 等完整字段），
+        供上层结合自身指标（如健康度）重新排序。
+        启用变更订阅且快照未过期时直接从内存快照返回，过期时才回源查询。
         """
         # === 构造请求（纯字典） ===
         req = {
@@ -57,10 +82,45 @@ class RoutingAgent:
             "top_k": top_k,
         }
 
-        #resp: RegistryListResp = await self.registry.list_agents(keyword, req)
-        resp = {
+        agents = None
+        if self.watcher is not None:
+            self.watcher.ensure_started()
+            agents = self.watcher.search(keyword, task, top_k)
+
+        if agents is not None:
+            resp = RegistryListResp(
+                status="success", request_id=req["request_id"], count=len(agents), agents=agents
+            )
+        elif self.registry is not None:
+            resp: RegistryListResp = await self.registry.list_agents(
+                keyword, RegistryListReq(**req)
+            )
+        else:
+            resp = self._demo_response(req["request_id"])
+
+        # === 验证响应 ===
+        resp = RegistryListResp.model_validate(resp)
+        if resp.status != "success" or not resp.agents:
+            raise LookupError(
+                f"No agent candidates for keyword='{keyword}', task='{task[:80]}...'"
+            )
+
+        # === 按分数降序排序 ===
+        agents_sorted = sorted(resp.agents, key=lambda a: a.score, reverse=True)
+
+        # === 限制 top_k ===
+        count = len(agents_sorted)
+        k = min(top_k, count) if count > 0 else 0
+        if k == 0:
+            raise LookupError("No valid candidates after sorting.")
+        return agents_sorted[:k]
+
+    @staticmethod
+    def _demo_response(request_id: str) -> dict:
+        """未配置 Registry 时使用的示例响应。"""
+        return {
             "status": "success",
-            "request_id": req["request_id"],
+            "request_id": request_id,
             "count": 2,
             "agents": [
                 {
@@ -82,30 +142,70 @@ class RoutingAgent:
             ],
         }
 
-        # === 验证响应 ===
-        if resp["status"] != "success" or not resp["agents"]:
-            raise LookupError(
-                f"No agent candidates for keyword='{keyword}', task='{task[:80]}...'"
-            )
+    async def aclose(self) -> None:
+        """停止变更订阅，关闭 Registry 连接池与直连连接。"""
+        if self.watcher is not None:
+            await self.watcher.aclose()
+        if self.registry is not None:
+            await self.registry.aclose()
+        for connection in self._agent_connections.values():
+            await connection.aclose()
+        self._agent_connections.clear()
 
-        # === 按分数降序排序 ===
-        agents_sorted = sorted(resp["agents"], key=lambda a: a["score"], reverse=True)
+    def _connection_for(self, url: str) -> RemoteAgentConnections:
+        connection = self._agent_connections.get(url)
+        if connection is None:
+            connection = self._agent_connections[url] = RemoteAgentConnections(url)
+        return connection
 
-        # === 限制 top_k ===
-        count = len(agents_sorted)
-        k = min(top_k, count) if count > 0 else 0
-        if k == 0:
-            raise LookupError("No valid candidates after sorting.")
+    async def resolve_client(
+        self, keyword: str, task: str, top_k: int, context_id: Optional[str] = None
+    ) -> List[Tuple[str, str]]:
+        """
+        调用 Registry，按 score 降序选取前 k 个候选，
+        返回 [(agent_name, url), ...]。
+
+        给定 context_id 时，同一 agent 的多个副本按 rendezvous hashing 排序，
+        同一会话总是先发往同一副本（其余副本作为对冲/故障转移目标）。
+        """
+        candidates = await self.resolve_candidates(keyword, task, top_k)
+        if context_id:
+            candidates = sticky_order(candidates, context_id)
 
         # === 构造结果 [(agent_name, url)] ===
         results: List[Tuple[str, str]] = []
-        for item in agents_sorted[:k]:
-            results.append((item["name"], item["url"]))
+        for item in candidates:
+            results.append((item.name, item.url))
             # 可选缓存
-            self._connections[item["name"]] = item["url"]
+            self._connections[item.name] = item.url
 
         return results
 
+    @staticmethod
+    def _build_request(task: str, context_id: str, input_meta: dict) -> SendMessageRequest:
+        message_id = input_meta.get("message_id") or uuid.uuid4().hex
+        payload: dict[str, Any] = {
+            "message": {
+                "role": "user",
+                "parts": [{"type": "text", "text": task}],
+                "messageId": message_id,
+                "contextId": context_id,
+                # "metadata": input_meta,  # 远端支持时再打开
+            }
+        }
+        return SendMessageRequest(
+            id=message_id, params=MessageSendParams.model_validate(payload)
+        )
+
+    @staticmethod
+    def _task_from(agent_name: str, send_response: SendMessageResponse) -> Task:
+        """校验 A2A 响应，返回其中的 Task；无效时抛 ValueError。"""
+        if not isinstance(send_response.root, SendMessageSuccessResponse):
+            raise ValueError(f"{agent_name}: non-success response")
+        if not isinstance(send_response.root.result, Task):
+            raise ValueError(f"{agent_name}: success wrapper but no Task")
+        return send_response.root.result
+
     # -------- 入口：路由 + 发送消息 + 解析 --------
     async def send_message_to_agent(
             self,
@@ -115,60 +215,97 @@ class RoutingAgent:
             top_k: int = 3,
     ) -> Optional[Task]:
         """
-        先路由（取 Top-k），再按得分从高到低依次直连 /messages。
-        返回第一个成功的 Task；若都失败，返回 None（并在异常中提供聚合信息也可选）。
+        先路由（取 Top-k），再按得分从高到低直连 /messages。
+
+        主候选在其历史延迟的对冲分位数内没有返回时，并发请求下一个候选
+        （对冲），取先到的有效 Task 并取消其余请求；候选失败时立即切换到
+        下一个。若都失败，返回 None。
         """
         state = tool_context.state
 
-        # 1) 路由：拿前 k 个候选
-        candidates = await self.resolve_client(keyword=keyword, task=task, top_k=top_k)
-
-        # 2) 固定一次 context_id（多次重试保持同一会话）
+        # 1) 固定 context_id（写回 state：多次重试与后续轮次保持同一会话）
         context_id = state.get("context_id") or str(uuid.uuid4())
         state["context_id"] = context_id
 
+        # 2) 路由：拿前 k 个候选（同一会话粘在同一副本上）
+        candidates = await self.resolve_client(
+            keyword=keyword, task=task, top_k=top_k, context_id=context_id
+        )
+
         input_meta = state.get("input_message_metadata") or {}
 
-        # 3) 逐个候选尝试发送
+        # 3) 发送：主候选超时未返回则对冲，失败则切换
+        hedging = self.hedging
+        hedging.requests += 1
         errors: list[str] = []
-        for agent_name, connection in candidates:
-            state["active_agent"] = agent_name
-            message_id = input_meta.get("message_id") or uuid.uuid4().hex
-
-            payload: dict[str, Any] = {
-                "message": {
-                    "role": "user",
-                    "parts": [{"type": "text", "text": task}],
-                    "messageId": message_id,
-                    "contextId": context_id,
-                    # "metadata": input_meta,  # 远端支持时再打开
-                }
-            }
+        pending: dict[asyncio.Task, tuple[str, str, str, float]] = {}
+        waiting = list(candidates)
 
-            message_request = SendMessageRequest(
-                id=message_id, params=MessageSendParams.model_validate(payload)
-            )
+        def launch(reason: str) -> Optional[str]:
+            if not waiting:
+                return None
+            agent_name, url = waiting.pop(0)
+            request = self._build_request(task, context_id, input_meta)
+            call = asyncio.create_task(self._connection_for(url).send_message(request))
+            pending[call] = (agent_name, url, reason, time.monotonic())
+            return url
 
-            try:
-                send_response: SendMessageResponse = await connection.send_message(message_request)
-            except Exception as e:
-                errors.append(f"{agent_name}: request failed ({e})")
-                continue
+        state["active_agent"] = candidates[0][0] if candidates else None
+        last_url = launch("primary")
+        try:
+            while pending:
+                delay = hedging.next_delay(last_url) if waiting else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # 超过对冲阈值仍未返回：并发请求下一个候选
+                    hedging.hedges += 1
+                    last_url = launch("hedge")
+                    continue
 
-            # 校验 A2A 响应
-            if not isinstance(send_response.root, SendMessageSuccessResponse):
-                errors.append(f"{agent_name}: non-success response")
-                continue
-            if not isinstance(send_response.root.result, Task):
-                errors.append(f"{agent_name}: success wrapper but no Task")
-                continue
+                for call in done:
+                    agent_name, url, reason, started = pending.pop(call)
+                    try:
+                        result = self._task_from(agent_name, call.result())
+                    except Exception as e:
+                        hedging.record_censored(url, time.monotonic() - started)
+                        errors.append(
+                            str(e) if isinstance(e, ValueError) else f"{agent_name}: request failed ({e})"
+                        )
+                        continue
+                    # 首个有效结果胜出
+                    hedging.record(url, time.monotonic() - started)
+                    if reason == "primary":
+                        hedging.primary_wins += 1
+                    elif reason == "hedge":
+                        hedging.hedge_wins += 1
+                    else:
+                        hedging.failover_wins += 1
+                    state["active_agent"] = agent_name
+                    return result
 
-            #  首个成功即返回
-            return send_response.root.result
+                if not pending:
+                    # 当前请求全部失败：立即切换到下一个候选
+                    failover_url = launch("failover")
+                    if failover_url is not None:
+                        hedging.failovers += 1
+                        last_url = failover_url
+        finally:
+            now = time.monotonic()
+            for call, (_, url, _, started) in pending.items():
+                call.cancel()
+                hedging.cancelled += 1
+                # 输掉的调用至少耗时这么久：作为下界样本，避免分位数只看胜出者
+                hedging.record_censored(url, now - started)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
 
         # 所有候选都失败
-        # print 或 log 一下便于排查
+        hedging.failures += 1
         if errors:
-            print("All candidates failed:\n" + "\n".join(errors))
+            logger.warning(
+                "all candidates failed for keyword=%r context_id=%s: %s",
+                keyword, context_id, "; ".join(errors),
+            )
         return None
-
@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+
+
+# host_agent 的模块使用扁平导入（与 `uv run .` 启动时一致）；routing 按包导入
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'host_agent'))
+sys.path.insert(0, ROOT)
+
+# LOG_SINK 在导入时创建：测试的事件日志写到临时目录，而不是仓库里的 ./logs
+os.environ.setdefault(
+    'HOST_LOG_PATH', os.path.join(tempfile.mkdtemp(prefix='host-tests-'), 'host_events.jsonl')
+)
+os.environ.setdefault('HOST_LOG_ECHO_LEVEL', 'warning')
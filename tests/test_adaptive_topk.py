@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+from adaptive_topk import AdaptiveTopK, TopKConfig
+from agent_health import HealthTracker
+
+
+def candidate(url, score):
+    return SimpleNamespace(url=url, score=score)
+
+
+def proven(health, *urls, latency=0.5):
+    for url in urls:
+        for _ in range(3):
+            health.record_success(url, latency)
+
+
+def test_dominant_proven_candidate_is_called_alone():
+    health = HealthTracker()
+    proven(health, 'http://a', 'http://b')
+    topk = AdaptiveTopK(TopKConfig(max_k=3), health)
+    k, reasons = topk.choose([candidate('http://a', 0.9), candidate('http://b', 0.3)], 10.0)
+    assert (k, reasons) == (1, ['dominant'])
+
+
+def test_close_scores_and_unproven_best_add_agents_up_to_max_k():
+    topk = AdaptiveTopK(TopKConfig(max_k=3), HealthTracker())
+    k, reasons = topk.choose(
+        [candidate('http://a', 0.9), candidate('http://b', 0.85), candidate('http://c', 0.1)]
+    )
+    assert k == 3
+    assert reasons == ['close_scores=2', 'unproven']
+
+
+def test_k_never_exceeds_the_candidate_count():
+    topk = AdaptiveTopK(TopKConfig(max_k=3), HealthTracker())
+    k, _ = topk.choose([candidate('http://a', 0.9)], 10.0)
+    assert k == 1
+
+
+def test_saved_ratio_counts_baseline_per_request_candidates():
+    topk = AdaptiveTopK(TopKConfig(max_k=3), HealthTracker())
+    # 每个家族只有一个 agent：固定 top-3 也只会调用 1 次，没有节省
+    for _ in range(4):
+        topk.record(1, ['dominant'], available=1)
+    stats = topk.stats()
+    assert stats['baseline_calls'] == 4
+    assert stats['agent_calls_saved'] == 0
+    assert stats['saved_ratio'] == 0.0
+
+    topk.record(1, ['dominant'], available=5)
+    stats = topk.stats()
+    assert stats['baseline_calls'] == 7
+    assert stats['agent_calls_saved'] == 2
+    assert stats['saved_ratio'] == round(2 / 7, 4)
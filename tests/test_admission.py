@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from admission import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    AdmissionController,
+    AdmissionRejected,
+    admission_priority,
+)
+
+
+def test_queued_calls_are_admitted_in_priority_order():
+    ctl = AdmissionController(global_limit=1, max_wait=1.0)
+    order = []
+
+    async def call(name, priority):
+        async with ctl.slot('http://a', priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        first = asyncio.create_task(call('first', PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        low = asyncio.create_task(call('low', 5))
+        await asyncio.sleep(0)
+        high = asyncio.create_task(call('high', PRIORITY_INTERACTIVE))
+        await asyncio.gather(first, low, high)
+
+    asyncio.run(main())
+    assert order == ['first', 'high', 'low']
+    assert ctl.stats()['active'] == 0
+
+
+def test_wait_longer_than_max_wait_is_rejected():
+    ctl = AdmissionController(global_limit=1, max_wait=0.02)
+
+    async def main():
+        await ctl.acquire('http://a')
+        with pytest.raises(AdmissionRejected) as err:
+            await ctl.acquire('http://a')
+        return err.value
+
+    rejected = asyncio.run(main())
+    assert rejected.reason == 'timeout'
+    assert ctl.rejected['timeout'] == 1
+    assert ctl.stats()['queue_depth'] == 0
+
+
+def test_full_queue_and_background_calls_are_rejected_immediately():
+    ctl = AdmissionController(global_limit=1, max_queue=1, max_wait=1.0)
+
+    async def main():
+        await ctl.acquire('http://a')
+        waiter = asyncio.create_task(ctl.acquire('http://a'))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected, match='queue_full'):
+            await ctl.acquire('http://a')
+        with admission_priority(PRIORITY_BACKGROUND), pytest.raises(AdmissionRejected, match='busy'):
+            await ctl.acquire('http://b')
+        ctl.release('http://a')
+        await waiter
+        ctl.release('http://a')
+
+    asyncio.run(main())
+    assert ctl.rejected == {'queue_full': 1, 'timeout': 0, 'busy': 1}
+    assert ctl.stats()['active'] == 0
+
+
+def test_per_agent_limit_does_not_block_other_agents():
+    ctl = AdmissionController(global_limit=4, per_agent_limit=1, max_wait=0.02)
+
+    async def main():
+        await ctl.acquire('http://a')
+        await ctl.acquire('http://b')
+        with pytest.raises(AdmissionRejected, match='timeout'):
+            await ctl.acquire('http://a')
+
+    asyncio.run(main())
+    assert ctl.stats()['active_per_agent'] == {'http://a': 1, 'http://b': 1}
+
+
+def test_cancelled_waiter_leaves_no_slot_behind():
+    ctl = AdmissionController(global_limit=1, max_wait=1.0)
+
+    async def main():
+        await ctl.acquire('http://a')
+        waiter = asyncio.create_task(ctl.acquire('http://a'))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        ctl.release('http://a')
+
+    asyncio.run(main())
+    assert ctl.stats()['active'] == 0
+    assert ctl.stats()['queue_depth'] == 0
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+from routing.affinity import pick_replicas, rendezvous_order, rendezvous_weight, sticky_order
+
+
+def replica(name, url):
+    return SimpleNamespace(name=name, url=url)
+
+
+NODES = [f'http://weather-{i}' for i in range(5)]
+
+
+def test_weight_is_stable_and_order_independent():
+    assert rendezvous_weight('ctx', 'http://a') == rendezvous_weight('ctx', 'http://a')
+    assert rendezvous_order('ctx', NODES) == rendezvous_order('ctx', list(reversed(NODES)))
+
+
+def test_removing_a_node_only_moves_the_contexts_it_owned():
+    contexts = [f'ctx-{i}' for i in range(200)]
+    before = {c: rendezvous_order(c, NODES)[0] for c in contexts}
+    removed = NODES[2]
+    after = {c: rendezvous_order(c, [n for n in NODES if n != removed])[0] for c in contexts}
+    moved = [c for c in contexts if before[c] != after[c]]
+    assert moved and all(before[c] == removed for c in moved)
+    assert len(moved) == sum(owner == removed for owner in before.values())
+
+
+def test_adding_a_node_moves_contexts_only_onto_it():
+    contexts = [f'ctx-{i}' for i in range(200)]
+    before = {c: rendezvous_order(c, NODES)[0] for c in contexts}
+    after = {c: rendezvous_order(c, NODES + ['http://weather-new'])[0] for c in contexts}
+    assert all(after[c] in (before[c], 'http://weather-new') for c in contexts)
+
+
+def test_pick_replicas_keeps_one_replica_per_agent_in_agent_order():
+    candidates = [replica('Weather', u) for u in NODES[:3]] + [replica('Airbnb', 'http://airbnb')]
+    picked = pick_replicas(candidates, 'ctx-1')
+    assert [c.name for c in picked] == ['Weather', 'Airbnb']
+    assert picked[0].url == rendezvous_order('ctx-1', NODES[:3])[0]
+    assert pick_replicas(list(reversed(candidates[:3])), 'ctx-1')[0].url == picked[0].url
+
+
+def test_unavailable_primary_fails_over_to_the_next_replica():
+    candidates = [replica('Weather', u) for u in NODES]
+    primary, backup = [c.url for c in sticky_order(candidates, 'ctx-7')][:2]
+    picked = pick_replicas(candidates, 'ctx-7', allow=lambda url: url != primary)
+    assert picked[0].url == backup
+    # 全部不可用时仍返回主副本
+    assert pick_replicas(candidates, 'ctx-7', allow=lambda url: False)[0].url == primary
@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+import pytest
+
+import agent_health
+from agent_health import CircuitState, HealthTracker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(agent_health, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def tripped(clock, url='http://a'):
+    health = HealthTracker(failure_threshold=2, open_seconds=30)
+    health.record_failure(url, 1.0)
+    health.record_failure(url, 1.0)
+    return health
+
+
+def test_consecutive_failures_open_the_circuit(clock):
+    health = tripped(clock)
+    assert health.get('http://a').state is CircuitState.OPEN
+    assert not health.allow('http://a')
+    assert not health.would_allow('http://a')
+
+
+def test_half_open_lets_a_single_probe_through(clock):
+    health = tripped(clock)
+    clock[0] += 30
+    assert health.would_allow('http://a')
+    assert health.allow('http://a')
+    assert health.get('http://a').state is CircuitState.HALF_OPEN
+    assert not health.allow('http://a')
+    assert not health.would_allow('http://a')
+
+
+def test_successful_probe_closes_the_circuit(clock):
+    health = tripped(clock)
+    clock[0] += 30
+    health.allow('http://a')
+    health.record_success('http://a', 0.5)
+    assert health.get('http://a').state is CircuitState.CLOSED
+    assert health.allow('http://a') and health.allow('http://a')
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    health = tripped(clock)
+    clock[0] += 30
+    health.allow('http://a')
+    health.record_failure('http://a')
+    assert health.get('http://a').state is CircuitState.OPEN
+    clock[0] += 29
+    assert not health.allow('http://a')
+
+
+def test_released_or_cancelled_probe_can_be_claimed_again(clock):
+    health = tripped(clock)
+    clock[0] += 30
+    assert health.allow('http://a')
+    health.release_probe('http://a')
+    assert health.allow('http://a')
+    health.record_cancelled('http://a', 2.0)
+    assert health.get('http://a').state is CircuitState.HALF_OPEN
+    assert health.allow('http://a')
+
+
+def test_rank_skips_open_circuits_but_never_returns_empty(clock):
+    health = tripped(clock, 'http://a')
+    a = SimpleNamespace(url='http://a', score=0.9)
+    b = SimpleNamespace(url='http://b', score=0.5)
+    assert health.rank([a, b], 2) == [b]
+    assert health.rank([a], 1) == [a]
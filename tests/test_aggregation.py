@@ -0,0 +1,62 @@
+from aggregation import (
+    AggregationConfig,
+    Aggregator,
+    MinHasher,
+    split_units,
+    truncate_keeping_links,
+)
+
+
+LISTING = '- Cozy loft near the Louvre with a balcony and a full kitchen [link](https://airbnb.com/rooms/1?src=a)'
+
+
+def test_identical_items_from_two_agents_are_kept_once():
+    agg = Aggregator()
+    other = LISTING.replace('src=a', 'src=b')
+    text = agg.aggregate([('A', LISTING, 0.9), ('B', other + '\n- Studio by the river', 0.5)])
+    assert text.count('Cozy loft') == 1
+    assert 'Studio by the river' in text
+    assert agg.stats.duplicates_removed == 1
+
+
+def test_higher_scored_agent_keeps_the_shared_item():
+    agg = Aggregator()
+    text = agg.aggregate([('Low', f'Low intro\n\n{LISTING}', 0.2), ('High', LISTING, 0.9)])
+    assert text.startswith(LISTING)
+    assert text.count('Cozy loft') == 1
+
+
+def test_similar_items_within_one_answer_are_not_deduplicated():
+    answer = '- Room 1\n  - Price: $120 per night\n- Room 2\n  - Price: $120 per night'
+    agg = Aggregator()
+    assert agg.aggregate([('A', answer, 1.0)]) == answer
+    assert split_units(answer) == ['- Room 1\n  - Price: $120 per night', '- Room 2\n  - Price: $120 per night']
+
+
+def test_minhash_similarity_tracks_jaccard():
+    hasher = MinHasher(num_perm=128)
+    a = {f'w{i}' for i in range(100)}
+    b = {f'w{i}' for i in range(50, 150)}
+    assert hasher.similarity(hasher.signature(a), hasher.signature(a)) == 1.0
+    assert abs(hasher.similarity(hasher.signature(a), hasher.signature(b)) - 1 / 3) < 0.15
+    assert hasher.similarity(hasher.signature(set()), hasher.signature(a)) == 0.0
+
+
+def test_budget_drops_lower_ranked_units_and_reports_them():
+    agg = Aggregator(AggregationConfig(token_budget=30, min_truncate_tokens=1000))
+    units = '\n\n'.join(f'Paragraph {i} ' + 'word ' * 20 for i in range(5))
+    text = agg.aggregate([('A', units, 1.0)])
+    assert 'Paragraph 0' in text and 'Paragraph 4' not in text
+    assert 'more item(s) omitted' in text
+
+
+def test_truncation_keeps_links_from_the_cut_tail():
+    text = 'Start ' + 'filler ' * 30 + '[book](https://example.com/a) end'
+    out = truncate_keeping_links(text, 40)
+    assert len(out) < len(text)
+    assert out.endswith('[book](https://example.com/a)')
+
+
+def test_disabled_aggregation_only_joins_answers():
+    agg = Aggregator(AggregationConfig(enabled=False))
+    assert agg.aggregate([('A', ' a ', 1.0), ('B', 'a', 0.5)]) == 'a\n\n---\n\na'
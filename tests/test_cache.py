@@ -0,0 +1,124 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import cache
+from cache import SingleFlight, TTLCache, normalize_text
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    c = TTLCache(ttl=10)
+    c.set('a', 1)
+    c.set('b', 2, ttl=30)
+    clock[0] += 10
+    assert c.get('a') is None
+    assert c.get('b') == 2
+    clock[0] += 20
+    assert c.get('b', 'gone') == 'gone'
+    assert len(c) == 0
+    assert (c.hits, c.misses) == (1, 2)
+
+
+def test_lru_eviction_keeps_recently_used_entries(clock):
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set('a', 1)
+    c.set('b', 2)
+    c.get('a')
+    c.set('c', 3)
+    assert c.keys() == ['a', 'c']
+    assert c.stats()['evictions'] == 1
+
+
+def test_non_positive_ttl_is_not_stored(clock):
+    c = TTLCache(ttl=60)
+    c.set('a', 1, ttl=0)
+    assert 'a' not in c.keys()
+
+
+def test_normalize_text_collapses_case_and_whitespace():
+    assert normalize_text('  Weather   in\tPARIS ') == 'weather in paris'
+    assert normalize_text(None) == ''
+
+
+def test_concurrent_callers_share_one_call():
+    sf = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return 'value'
+
+    async def main():
+        return await asyncio.gather(*(sf.do('k', fetch) for _ in range(5)))
+
+    assert asyncio.run(main()) == ['value'] * 5
+    assert len(calls) == 1
+    assert sf.stats() == {'calls': 1, 'shared': 4, 'leader_cancelled': 0, 'inflight': 0}
+
+
+def test_leader_exception_reaches_every_follower():
+    sf = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('down')
+
+    async def main():
+        return await asyncio.gather(*(sf.do('k', fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert sf.calls == 1
+
+
+def test_follower_retries_when_only_the_leader_is_cancelled():
+    sf = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        leader = asyncio.create_task(sf.do('k', fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(sf.do('k', fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == 2
+    assert sf.leader_cancelled == 1
+
+
+def test_cancelled_follower_does_not_cancel_the_leader():
+    sf = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.03)
+        return 'value'
+
+    async def main():
+        leader = asyncio.create_task(sf.do('k', fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(sf.do('k', fetch))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(main()) == 'value'
+    assert sf.leader_cancelled == 0
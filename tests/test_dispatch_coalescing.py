@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from routing_agent import RoutingAgent
+
+
+class FakeFanout:
+    """Stub for ``_dispatch_uncoalesced``: counts remote calls per contextId."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.contexts = []
+
+    async def __call__(self, keyword, task, tool_context):
+        self.contexts.append(tool_context.state['context_id'])
+        await asyncio.sleep(self.delay)
+        tool_context.state['remote_keywords'] = [keyword.lower()]
+        return f'answer to {task}', ['Weather Agent'], [('Weather Agent', 'http://w')], True
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setenv('DISPATCH_COALESCE', 'true')
+    monkeypatch.delenv('DISPATCH_SHARED_KEYWORDS', raising=False)
+    agent = RoutingAgent()
+    agent._dispatch_uncoalesced = FakeFanout()
+    return agent
+
+
+def sessions(n, **state):
+    return [SimpleNamespace(state={'context_id': f'ctx-{i}', **state}) for i in range(n)]
+
+
+async def dispatch_all(agent, contexts, task='Weather in Paris?'):
+    return await asyncio.gather(*(agent._dispatch('Weather', task, c) for c in contexts))
+
+
+def test_first_turn_calls_from_different_sessions_share_one_remote_call(agent):
+    contexts = sessions(5)
+    texts = asyncio.run(dispatch_all(agent, contexts))
+    assert texts == ['answer to Weather in Paris?'] * 5
+    assert len(agent._dispatch_uncoalesced.contexts) == 1
+    assert agent.coalesce_stats['cross_session'] == 4
+    # 每个会话都记录了选中的 agent，context_id 不被改写
+    for i, c in enumerate(contexts):
+        assert c.state['active_agent'] == ['Weather Agent']
+        assert c.state['context_id'] == f'ctx-{i}'
+
+
+def test_stateful_follow_ups_only_coalesce_within_their_session(agent):
+    contexts = sessions(3, remote_keywords=['weather'])
+    asyncio.run(dispatch_all(agent, contexts + [contexts[0]]))
+    assert sorted(agent._dispatch_uncoalesced.contexts) == ['ctx-0', 'ctx-1', 'ctx-2']
+
+
+def test_shared_keywords_coalesce_even_for_follow_ups(monkeypatch, agent):
+    monkeypatch.setenv('DISPATCH_SHARED_KEYWORDS', 'Weather, TripAdvisor')
+    shared = RoutingAgent()
+    shared._dispatch_uncoalesced = FakeFanout()
+    asyncio.run(dispatch_all(shared, sessions(3, remote_keywords=['weather'])))
+    assert len(shared._dispatch_uncoalesced.contexts) == 1
+
+
+def test_later_call_after_the_flight_finished_is_not_coalesced(agent):
+    async def main():
+        await agent._dispatch('Weather', 'Weather in Paris?', sessions(1)[0])
+        await agent._dispatch('Weather', 'Weather in Paris?', sessions(2)[1])
+
+    asyncio.run(main())
+    assert agent._dispatch_uncoalesced.contexts == ['ctx-0', 'ctx-1']
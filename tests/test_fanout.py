@@ -0,0 +1,64 @@
+import asyncio
+
+from fanout import CompletionPolicy, FanoutConfig, fan_out
+
+
+def call(result, delay=0.0):
+    async def run():
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return run
+
+
+def ok(result):
+    return not (isinstance(result, dict) and 'error' in result)
+
+
+def run(calls, **config):
+    return asyncio.run(fan_out(calls, ok, FanoutConfig(**config)))
+
+
+def test_duplicate_keys_keep_every_result_in_candidate_order():
+    out = run([('http://a', call('first', 0.02)), ('http://a', call('second')), ('http://b', call('third'))])
+    assert out.results == [('http://a', 'first'), ('http://a', 'second'), ('http://b', 'third')]
+
+
+def test_all_waits_for_every_call_and_reports_exceptions_as_errors():
+    out = run([('a', call(RuntimeError('boom'))), ('b', call('ok', 0.01))])
+    assert out.results == [('a', {'error': 'boom'}), ('b', 'ok')]
+    assert out.cancelled == [] and not out.timed_out
+
+
+def test_first_success_cancels_the_rest():
+    out = run(
+        [('slow', call('late', 1.0)), ('bad', call(RuntimeError('x'))), ('fast', call('ok', 0.01))],
+        policy=CompletionPolicy.FIRST_SUCCESS,
+    )
+    assert [k for k, _ in out.results] == ['bad', 'fast']
+    assert out.cancelled == ['slow']
+
+
+def test_quorum_returns_once_enough_calls_succeeded():
+    out = run(
+        [('a', call('a', 0.01)), ('b', call('b', 0.02)), ('c', call('c', 1.0))],
+        policy=CompletionPolicy.QUORUM, quorum=2,
+    )
+    assert out.results == [('a', 'a'), ('b', 'b')]
+    assert out.cancelled == ['c']
+
+
+def test_best_of_keeps_top_ranked_successes():
+    out = run(
+        [('a', call(RuntimeError('x'))), ('b', call('b', 0.02)), ('c', call('c'))],
+        policy=CompletionPolicy.BEST_OF, best_of=1, deadline=0.1,
+    )
+    assert out.results == [('b', 'b')]
+
+
+def test_deadline_returns_partial_results():
+    out = run([('a', call('a')), ('b', call('b', 1.0)), ('b', call('b2', 1.0))], deadline=0.05)
+    assert out.results == [('a', 'a')]
+    assert out.cancelled == ['b', 'b'] and out.timed_out
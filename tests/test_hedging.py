@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+
+from a2a.types import (
+    SendMessageResponse,
+    SendMessageSuccessResponse,
+    Task,
+    TaskState,
+    TaskStatus,
+)
+
+from routing.hedging import HedgePolicy
+from routing.routing_agent import RoutingAgent
+
+
+def ok_response():
+    task = Task(id='t1', context_id='c1', status=TaskStatus(state=TaskState.completed))
+    return SendMessageResponse(root=SendMessageSuccessResponse(id='m1', result=task))
+
+
+class FakeConnection:
+    def __init__(self, delay, fail=False):
+        self.delay = delay
+        self.fail = fail
+
+    async def send_message(self, request):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError('refused')
+        return ok_response()
+
+
+def router(connections, **policy):
+    agent = RoutingAgent()
+    agent.hedging = HedgePolicy(max_rate=1.0, **policy)
+
+    async def resolve_client(keyword, task, top_k, context_id=None):
+        return [(f'Agent {url}', url) for url in connections]
+
+    agent.resolve_client = resolve_client
+    agent._connection_for = connections.__getitem__
+    return agent
+
+
+def send(agent):
+    return asyncio.run(
+        agent.send_message_to_agent('weather', 'rain?', SimpleNamespace(state={}))
+    )
+
+
+def test_cancelled_slow_primary_is_recorded_as_a_lower_bound():
+    agent = router(
+        {'http://slow': FakeConnection(1.0), 'http://fast': FakeConnection(0.01)},
+        default_delay=0.05,
+    )
+    assert send(agent) is not None
+    stats = agent.hedging.stats()
+    assert stats['hedge_wins'] == 1
+    assert stats['cancelled'] == 1
+    assert stats['censored'] == 1
+    # 被取消的主候选留下了下界样本（约为对冲等待 + 胜出者耗时）
+    assert agent.hedging._latencies['http://slow'][0] >= 0.05
+
+
+def test_failover_win_is_counted_and_failed_attempt_recorded():
+    agent = router(
+        {'http://down': FakeConnection(0.0, fail=True), 'http://up': FakeConnection(0.0)},
+        default_delay=5.0,
+    )
+    assert send(agent) is not None
+    stats = agent.hedging.stats()
+    assert stats['failovers'] == 1
+    assert stats['failover_wins'] == 1
+    assert stats['censored'] == 1
+    assert len(agent.hedging._latencies['http://down']) == 1
+
+
+def test_delay_uses_percentile_of_recorded_samples():
+    policy = HedgePolicy(min_samples=3, percentile=50, min_delay=0.0)
+    assert policy.delay('http://a') == policy.default_delay
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        policy.record('http://a', latency)
+    assert policy.delay('http://a') == 0.2
+    policy.record_censored('http://a', 5.0)
+    assert policy.delay('http://a') == 0.3
+
+
+def test_hedge_rate_is_capped():
+    policy = HedgePolicy(max_rate=0.5)
+    policy.requests, policy.hedges = 4, 2
+    assert policy.next_delay('http://a') is None
+    policy.requests = 5
+    assert policy.next_delay('http://a') is not None
@@ -0,0 +1,54 @@
+import asyncio
+
+from routing.local_registry import LocalRegistry
+from routing.registry_models import RegistryListReq, RegistryRegisterReq
+
+
+def agent(agent_id, description):
+    return RegistryRegisterReq(
+        agent_id=agent_id, name=agent_id, description=description, url=f'http://{agent_id}'
+    )
+
+
+def registry():
+    reg = LocalRegistry()
+    reg.register_many('Weather', [
+        agent('forecast', 'weather forecast temperature rain for a city'),
+        agent('alerts', 'severe storm warnings and weather alerts'),
+        agent('hotels', 'hotel booking and room prices'),
+    ])
+    return reg
+
+
+def test_search_returns_top_k_by_descending_similarity():
+    hits = registry().search('weather', 'What is the weather forecast for Paris?', 2)
+    assert [h.agent_id for h in hits] == ['forecast', 'alerts']
+    assert hits[0].score >= hits[1].score > 0
+
+
+def test_top_k_larger_than_family_returns_every_agent():
+    hits = registry().search(' WEATHER ', 'forecast', 10)
+    assert len(hits) == 3
+    assert [h.score for h in hits] == sorted((h.score for h in hits), reverse=True)
+
+
+def test_unknown_keyword_returns_no_candidates():
+    assert registry().search('Transport', 'train to Lyon', 3) == []
+
+
+def test_update_and_unregister_keep_rows_consistent():
+    reg = registry()
+    reg.register('weather', agent('hotels', 'weather forecast temperature rain for a city'))
+    assert reg.unregister('weather', 'forecast')
+    assert not reg.unregister('weather', 'forecast')
+    hits = reg.search('weather', 'weather forecast for Paris', 3)
+    assert [h.agent_id for h in hits][0] == 'hotels'
+    assert {h.agent_id for h in hits} == {'hotels', 'alerts'}
+
+
+def test_list_agents_speaks_the_registry_protocol():
+    resp = asyncio.run(registry().list_agents(
+        'weather', RegistryListReq(request_id='r1', task='storm warnings', top_k=1)
+    ))
+    assert (resp.status, resp.request_id, resp.count) == ('success', 'r1', 1)
+    assert resp.agents[0].agent_id == 'alerts'
@@ -0,0 +1,57 @@
+import json
+
+from log_sink import LogSink, _parse_rates
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_are_written_as_json_lines_on_close(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    sink = LogSink(str(path), echo_level='error')
+    sink.info('dispatch', keyword='Weather', agents=['A'])
+    sink.debug('detail', n=1)
+    sink.close()
+    records = read(path)
+    assert [r['event'] for r in records] == ['dispatch', 'detail']
+    assert records[0]['keyword'] == 'Weather' and records[0]['level'] == 'info'
+    assert sink.stats()['written'] == 2
+
+
+def test_min_level_and_sampling_filter_before_queueing(tmp_path):
+    sink = LogSink(
+        str(tmp_path / 'events.jsonl'),
+        min_level='info',
+        sample_rates={'debug': 1.0, 'info': 0.0, 'warning': 1.0, 'error': 1.0},
+    )
+    sink.debug('ignored')
+    sink.info('sampled')
+    assert sink.stats() == {'queued': 0, 'written': 0, 'dropped': 0, 'sampled_out': 1}
+    assert sink._thread is None
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    sink = LogSink(str(tmp_path / 'events.jsonl'), queue_size=1)
+    sink._ensure_started = lambda: None  # 不启动写线程，队列不会被消费
+    sink.info('a')
+    sink.info('b')
+    assert sink.dropped == 1
+
+
+def test_size_based_rotation_keeps_backups(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    sink = LogSink(str(path), max_bytes=1, backups=2, echo_level='error')
+    for i in range(4):
+        sink._write([{'ts': 0, 'level': 'info', 'event': f'e{i}'}])
+    sink._file.close()
+    assert [r['event'] for r in read(path)] == ['e3']
+    assert [r['event'] for r in read(f'{path}.1')] == ['e2']
+    assert [r['event'] for r in read(f'{path}.2')] == ['e1']
+
+
+def test_parse_rates_overrides_defaults():
+    assert _parse_rates('debug=0.1, INFO=0.5') == {
+        'debug': 0.1, 'info': 0.5, 'warning': 1.0, 'error': 1.0,
+    }
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from plan_executor import PlanError, StepFailed, execute_plan
+
+
+class FakeAgents:
+    """Stub dispatch: answers by keyword, records calls and peak concurrency."""
+
+    def __init__(self, answers, delay=0.01):
+        self.answers = answers
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, keyword, task):
+        self.calls.append((keyword, task))
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            answer = self.answers[keyword]
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+        finally:
+            self.running -= 1
+
+
+def run(steps, dispatch, **kwargs):
+    return asyncio.run(execute_plan(steps, dispatch, **kwargs))
+
+
+def test_dependency_answer_is_filled_into_task():
+    agents = FakeAgents({'Accommodations': 'Hotel X in Paris', 'TripAdvisor': 'Louvre'})
+    results = run(
+        [
+            {'id': 'stay', 'keyword': 'Accommodations', 'task': 'hotel in Paris'},
+            {
+                'id': 'sights',
+                'keyword': 'TripAdvisor',
+                'task': 'attractions near {stay}',
+                'depends_on': ['stay'],
+            },
+        ],
+        agents,
+    )
+    assert [r.status for r in results] == ['done', 'done']
+    assert results[1].task == 'attractions near Hotel X in Paris'
+    assert agents.calls[1] == ('TripAdvisor', 'attractions near Hotel X in Paris')
+
+
+def test_failed_step_skips_dependents_and_keeps_independent_steps():
+    agents = FakeAgents({
+        'Accommodations': StepFailed('no agent answered'),
+        'TripAdvisor': 'Louvre',
+        'Weather': 'Sunny',
+    })
+    events = []
+    results = run(
+        [
+            {'id': 'stay', 'keyword': 'Accommodations', 'task': 'hotel in Paris'},
+            {'id': 'near', 'keyword': 'TripAdvisor', 'task': 'near {stay}', 'depends_on': 'stay'},
+            {'id': 'after', 'keyword': 'Weather', 'task': 'weather', 'depends_on': ['near']},
+            {'id': 'weather', 'keyword': 'Weather', 'task': 'weather in Paris'},
+        ],
+        agents,
+        on_event=events.append,
+    )
+    by_id = {r.id: r for r in results}
+    assert by_id['stay'].status == 'failed'
+    assert 'StepFailed' in by_id['stay'].error
+    assert by_id['near'].status == 'skipped'
+    assert by_id['after'].status == 'skipped'
+    assert by_id['weather'].status == 'done'
+    # 失败步骤的错误文本不会传给下游
+    assert [k for k, _ in agents.calls] == ['Accommodations', 'Weather']
+    assert events[-1]['type'] == 'plan_done'
+    assert sorted(events[-1]['failed']) == ['after', 'near', 'stay']
+
+
+def test_parallel_branches_run_concurrently_and_results_keep_input_order():
+    agents = FakeAgents({'Weather': 'w', 'TripAdvisor': 't', 'Accommodations': 'a'}, delay=0.05)
+    steps = [
+        {'id': 'summary', 'keyword': 'TripAdvisor', 'task': 'plan', 'depends_on': ['w', 'a']},
+        {'id': 'w', 'keyword': 'Weather', 'task': 'weather'},
+        {'id': 'a', 'keyword': 'Accommodations', 'task': 'stay'},
+    ]
+    results = run(steps, agents)
+    assert [r.id for r in results] == ['summary', 'w', 'a']
+    assert agents.peak == 2
+    assert 'Result of w (Weather):\nw' in results[0].task
+    assert 'Result of a (Accommodations):\na' in results[0].task
+
+
+def test_max_concurrency_limits_parallel_branches():
+    agents = FakeAgents({'Weather': 'w'})
+    steps = [{'id': f's{i}', 'keyword': 'Weather', 'task': str(i)} for i in range(4)]
+    results = run(steps, agents, max_concurrency=1)
+    assert all(r.status == 'done' for r in results)
+    assert agents.peak == 1
+
+
+@pytest.mark.parametrize(
+    'steps',
+    [
+        [],
+        [{'id': 'a', 'keyword': 'Weather', 'task': 'x', 'depends_on': ['missing']}],
+        [
+            {'id': 'a', 'keyword': 'Weather', 'task': 'x', 'depends_on': ['b']},
+            {'id': 'b', 'keyword': 'Weather', 'task': 'y', 'depends_on': ['a']},
+        ],
+    ],
+)
+def test_malformed_plans_are_rejected(steps):
+    with pytest.raises(PlanError):
+        run(steps, FakeAgents({}))
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from prefetch import (
+    PrefetchConfig,
+    Prefetcher,
+    extract_destination,
+    render_template,
+    template_instructions,
+)
+
+
+@pytest.mark.parametrize(
+    'task, expected',
+    [
+        ('Find a hotel in Paris for 2 adults', ('Paris', ())),
+        ('Find an apartment in Washington D.C. from 2025-05-01 to 2025-05-03',
+         ('Washington D.C.', ('2025-05-01', '2025-05-03'))),
+        ('Rooms for New Year in Rio de Janeiro', ('Rio de Janeiro', ())),
+        ('Stay near Austin, TX on March 3', ('Austin, TX', ('march 3',))),
+        ('Need a place for Christmas', None),
+        ('cheap rooms please', None),
+    ],
+)
+def test_extract_destination(task, expected):
+    assert extract_destination(task) == expected
+
+
+def test_render_template_includes_dates_only_when_given():
+    assert render_template('Weather', 'Paris', ()) == 'What is the weather forecast for Paris?'
+    assert render_template('weather', 'Paris', ('2025-05-01', '2025-05-03')) == (
+        'What is the weather forecast for Paris from 2025-05-01 to 2025-05-03?'
+    )
+    assert render_template('Accommodations', 'Paris', ()) is None
+
+
+def test_template_instructions_cover_requested_keywords():
+    text = template_instructions(['Weather', 'Accommodations', 'Weather'])
+    assert text.count('\n') == 0
+    assert '"Weather"' in text and 'weather forecast for <destination>' in text
+
+
+class FakeBackend:
+    """Dispatch + response cache stub recording remote calls."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self.cache = {}
+
+    async def dispatch(self, keyword, task):
+        self.calls.append((keyword, task))
+        await asyncio.sleep(self.delay)
+        self.cache[(keyword.lower(), task.lower())] = f'answer: {task}'
+        return self.cache[(keyword.lower(), task.lower())]
+
+    async def read(self, keyword, task):
+        return self.cache.get((keyword.lower(), task.lower()))
+
+
+def prefetcher(backend):
+    config = PrefetchConfig(
+        enabled=True, related={'accommodations': ['Weather']}, delay=0.0, max_inflight=4
+    )
+    return Prefetcher(config, dispatch=backend.dispatch, cache_read=backend.read)
+
+
+def test_follow_up_in_template_form_joins_the_running_prefetch():
+    backend = FakeBackend()
+
+    async def main():
+        p = prefetcher(backend)
+        assert p.schedule('Accommodations', 'Find a hotel in Paris on 2025-05-01') == 1
+        answer = await p.lookup('Weather', 'what is the weather forecast for paris on 2025-05-01?')
+        # 已完成后，同一任务由响应缓存应答并计为预取命中
+        p.record_cache_hit('Weather', 'What is the weather forecast for Paris on 2025-05-01?')
+        return p, answer
+
+    p, answer = asyncio.run(main())
+    assert answer == 'answer: What is the weather forecast for Paris on 2025-05-01?'
+    assert len(backend.calls) == 1
+    stats = p.stats()
+    assert (stats['joined_inflight'], stats['hits'], stats['useful']) == (1, 2, 1)
+
+
+@pytest.mark.parametrize(
+    'task',
+    [
+        'What is the weather forecast for Paris?',  # 没有日期：不用带日期的预取答案
+        'Will it rain in Paris at 3pm on 2025-05-01?',  # 具体问题
+        'What is the weather forecast for Lyon on 2025-05-01?',
+    ],
+)
+def test_other_tasks_do_not_use_the_prefetch(task):
+    backend = FakeBackend()
+
+    async def main():
+        p = prefetcher(backend)
+        p.schedule('Accommodations', 'Find a hotel in Paris on 2025-05-01')
+        return await p.lookup('Weather', task)
+
+    assert asyncio.run(main()) is None
@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+import pytest
+
+from routing.registry_client import RegistryClient
+from routing.registry_models import RegistryListReq
+
+
+AGENT = {
+    'score': 0.9,
+    'agent_id': 'w1',
+    'name': 'Weather Agent',
+    'url': 'http://weather',
+    'version': 1.0,
+}
+
+
+def install(registry, handler):
+    """Swap the pooled client for one backed by ``handler`` on the running loop."""
+    registry._client = httpx.AsyncClient(
+        base_url=registry.base_url, transport=httpx.MockTransport(handler)
+    )
+    registry._loop = asyncio.get_running_loop()
+
+
+def list_resp(request):
+    return httpx.Response(
+        200,
+        json={'status': 'success', 'request_id': 'r1', 'count': 1, 'agents': [AGENT]},
+    )
+
+
+@pytest.mark.parametrize('error', [httpx.ReadError, httpx.WriteError, httpx.ReadTimeout])
+def test_stale_keepalive_errors_are_retried(error):
+    registry = RegistryClient('http://registry', backoff_base=0.0)
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise error('connection reset', request=request)
+        return list_resp(request)
+
+    async def main():
+        install(registry, handler)
+        return await registry.list_agents('weather', RegistryListReq(request_id='r1', task='rain'))
+
+    resp = asyncio.run(main())
+    assert [a.agent_id for a in resp.agents] == ['w1']
+    assert len(attempts) == 2
+    assert registry.retries == 1
+
+
+def test_default_deadline_leaves_room_for_every_attempt():
+    assert RegistryClient('http://registry', timeout=8.0, max_retries=2).deadline == 24.0
+    assert RegistryClient('http://registry', timeout=8.0, deadline=5.0).deadline == 5.0
+
+
+def test_non_retryable_status_is_raised_immediately():
+    registry = RegistryClient('http://registry')
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        return httpx.Response(404)
+
+    async def main():
+        install(registry, handler)
+        await registry.list_agents('weather', RegistryListReq(request_id='r1', task='rain'))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(main())
+    assert len(attempts) == 1
+
+
+def test_client_of_a_finished_loop_is_closed_on_the_next_loop():
+    registry = RegistryClient('http://registry')
+
+    async def first():
+        return registry.client
+
+    async def second():
+        client = registry.client
+        await asyncio.sleep(0)
+        return client
+
+    old = asyncio.run(first())
+    new = asyncio.run(second())
+    assert new is not old
+    assert old.is_closed
+    asyncio.run(registry.aclose())
@@ -0,0 +1,61 @@
+from routing.registry_models import RegistryAgentItem, RegistryWatchResp
+from routing.registry_watch import RegistryWatcher
+
+
+def item(agent_id, score, description=''):
+    return RegistryAgentItem(
+        score=score,
+        agent_id=agent_id,
+        name=agent_id.upper(),
+        description=description,
+        url=f'http://{agent_id}',
+        version=1.0,
+    )
+
+
+def resp(version, families, full=False):
+    return RegistryWatchResp(
+        status='success', epoch='e1', version=version, full=full, families=families
+    )
+
+
+def test_snapshot_keeps_registry_order_and_scores():
+    watcher = RegistryWatcher(source=None)
+    watcher.apply(resp(1, {'Weather': [item('b', 0.9), item('a', 0.4)]}, full=True))
+    agents = watcher.search('weather', 'rain in Paris', top_k=3)
+    assert [(a.agent_id, a.score) for a in agents] == [('b', 0.9), ('a', 0.4)]
+
+
+def test_family_larger_than_top_k_falls_back_to_the_registry():
+    watcher = RegistryWatcher(source=None)
+    watcher.apply(resp(1, {'weather': [item('a', 0.9), item('b', 0.4)]}, full=True))
+    assert watcher.search('weather', 'rain', top_k=1) is None
+    assert watcher.stats()['rank_misses'] == 1
+
+
+def test_score_change_notifies_listeners_and_full_snapshot_drops_families():
+    watcher = RegistryWatcher(source=None)
+    changed = []
+    watcher.add_listener(changed.append)
+    watcher.apply(resp(1, {'weather': [item('a', 0.9)], 'transport': [item('t', 1.0)]}, full=True))
+    watcher.apply(resp(2, {'weather': [item('a', 0.5)]}))
+    assert changed == ['weather', 'transport', 'weather']
+    watcher.apply(resp(3, {'weather': [item('a', 0.5)]}, full=True))
+    assert changed[-1] == 'transport'
+    assert watcher.search('transport', 'bus', top_k=3) == []
+
+
+def test_stale_snapshot_is_not_served():
+    watcher = RegistryWatcher(source=None)
+    assert watcher.search('weather', 'rain', top_k=3) is None
+    assert watcher.stats()['stale_misses'] == 1
+
+
+def test_rerank_orders_by_local_similarity_when_enabled():
+    watcher = RegistryWatcher(source=None, rerank=True)
+    watcher.apply(resp(1, {'weather': [
+        item('hotel', 0.9, 'hotel rooms and booking'),
+        item('rain', 0.1, 'weather forecast rain and temperature'),
+    ]}, full=True))
+    agents = watcher.search('weather', 'rain forecast for tomorrow', top_k=1)
+    assert [a.agent_id for a in agents] == ['rain']
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+from google.adk.sessions import DatabaseSessionService, InMemorySessionService
+
+from session_store import BoundedSessionService
+
+
+APP, USER = 'routing_app', 'default_user'
+
+
+def stored_sessions(ages):
+    """An in-memory backend holding sessions last updated ``ages`` seconds ago."""
+    inner = InMemorySessionService()
+
+    async def fill():
+        for session_id, age in ages.items():
+            await inner.create_session(app_name=APP, user_id=USER, session_id=session_id)
+            inner.sessions[APP][USER][session_id].last_update_time = time.time() - age
+
+    asyncio.run(fill())
+    return inner
+
+
+def remaining(inner):
+    async def ids():
+        response = await inner.list_sessions(app_name=APP, user_id=USER)
+        return sorted(s.id for s in response.sessions)
+
+    return asyncio.run(ids())
+
+
+def test_restore_evicts_least_recently_updated_sessions_over_capacity():
+    inner = stored_sessions({'new': 10, 'old': 300, 'mid': 100})
+    store = BoundedSessionService(inner, max_sessions=2, ttl_seconds=3600)
+    assert asyncio.run(store.restore(app_name=APP, user_id=USER)) == 3
+    assert remaining(inner) == ['mid', 'new']
+    assert store.stats()['sessions'] == 2
+    assert store.stats()['evicted'] == 1
+
+
+def test_restore_evicts_sessions_past_the_ttl():
+    inner = stored_sessions({'fresh': 10, 'stale': 7200})
+    store = BoundedSessionService(inner, ttl_seconds=3600)
+    asyncio.run(store.restore(app_name=APP, user_id=USER))
+    assert remaining(inner) == ['fresh']
+
+
+def test_restore_reads_sessions_persisted_by_a_previous_process(tmp_path):
+    db_url = f'sqlite:///{tmp_path / "sessions.sqlite3"}'
+
+    async def previous_process():
+        store = BoundedSessionService(DatabaseSessionService(db_url=db_url))
+        await store.create_session(app_name=APP, user_id=USER, session_id='s1')
+
+    async def restart():
+        store = BoundedSessionService(DatabaseSessionService(db_url=db_url))
+        return store, await store.restore(app_name=APP, user_id=USER)
+
+    asyncio.run(previous_process())
+    store, restored = asyncio.run(restart())
+    assert restored == 1
+    assert store.stats()['sessions'] == 1
+
+
+def test_lru_eviction_keeps_recently_read_sessions():
+    store = BoundedSessionService(InMemorySessionService(), max_sessions=2)
+
+    async def main():
+        for session_id in ('a', 'b'):
+            await store.create_session(app_name=APP, user_id=USER, session_id=session_id)
+        await store.get_session(app_name=APP, user_id=USER, session_id='a')
+        await store.create_session(app_name=APP, user_id=USER, session_id='c')
+        return [
+            await store.get_session(app_name=APP, user_id=USER, session_id=s) is not None
+            for s in ('a', 'b', 'c')
+        ]
+
+    assert asyncio.run(main()) == [True, False, True]
@@ -0,0 +1,59 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from a2a.types import Artifact, Part, TaskArtifactUpdateEvent, TextPart
+
+from routing_agent import RoutingAgent
+
+
+def artifact_chunk(text, append=False):
+    event = TaskArtifactUpdateEvent(
+        task_id='t1',
+        context_id='c1',
+        append=append,
+        artifact=Artifact(artifact_id='a1', parts=[Part(root=TextPart(text=text))]),
+    )
+    return SimpleNamespace(root=SimpleNamespace(result=event))
+
+
+class FakeStream:
+    """Stub connection: yields ``chunks`` then raises ``error`` (if any)."""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    async def send_message_streaming(self, request):
+        for chunk in self.chunks:
+            yield chunk
+        if self.error is not None:
+            raise self.error
+
+
+@pytest.fixture(scope='module')
+def agent():
+    return RoutingAgent()
+
+
+def stream(agent, client):
+    return asyncio.run(agent._stream_from_agent('Weather Agent', client, None, None))
+
+
+def test_complete_stream_returns_assembled_artifacts(agent):
+    client = FakeStream([artifact_chunk('Sunny'), artifact_chunk(', 25C', append=True)])
+    assert stream(agent, client) == 'Sunny, 25C'
+
+
+def test_failure_before_first_event_is_raised_for_blocking_fallback(agent):
+    client = FakeStream([], error=httpx.RemoteProtocolError('no SSE support'))
+    with pytest.raises(httpx.RemoteProtocolError):
+        stream(agent, client)
+
+
+def test_failure_after_chunks_returns_partial_instead_of_resending(agent):
+    client = FakeStream([artifact_chunk('Sunny')], error=httpx.ReadError('reset'))
+    result = stream(agent, client)
+    assert result['partial'] == 'Sunny'
+    assert 'stream interrupted' in result['error']
@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+from warmup import Readiness, WarmupConfig, run_warmup
+
+
+FAMILIES = {
+    'Weather': [SimpleNamespace(name='Weather Agent', url='http://w')],
+    'Accommodations': [SimpleNamespace(name='Airbnb Agent', url='http://a')],
+}
+
+
+async def resolve(keyword):
+    if keyword not in FAMILIES:
+        raise LookupError(f'No agent candidates for keyword={keyword!r}')
+    return FAMILIES[keyword]
+
+
+async def connect(candidates):
+    return None
+
+
+def warm(keywords, probe, resolve=resolve):
+    config = WarmupConfig(enabled=True, keywords=keywords, timeout=5.0)
+    return asyncio.run(run_warmup(config, resolve, connect, probe, Readiness()))
+
+
+async def healthy(candidate):
+    return None
+
+
+def test_family_the_registry_does_not_serve_is_skipped():
+    readiness = warm(['Weather', 'Accommodations', 'Transport'], healthy)
+    assert readiness.status == 'ready'
+    assert readiness.keywords['Transport']['skipped'] is True
+    assert readiness.keywords['Weather']['responding'] == 1
+
+
+def test_unreachable_registry_is_a_failure():
+    async def broken(keyword):
+        raise ConnectionError('registry down')
+
+    readiness = warm(['Weather'], healthy, resolve=broken)
+    assert readiness.status == 'degraded'
+    assert 'ConnectionError' in readiness.keywords['Weather']['error']
+
+
+def test_dead_agent_degrades_and_is_probed_once():
+    probed = []
+
+    async def probe(candidate):
+        probed.append(candidate.url)
+        if candidate.url == 'http://a':
+            raise TimeoutError('no card')
+
+    readiness = warm(['Weather', 'Accommodations', 'Accommodations'], probe)
+    assert readiness.status == 'degraded'
+    assert readiness.agents['http://a']['ok'] is False
+    assert sorted(probed) == ['http://a', 'http://w']
+
+
+def test_nothing_served_is_not_ready():
+    assert warm(['Transport'], healthy).status == 'degraded'